@@ -0,0 +1,202 @@
+"""backfill.py
+과거 시즌 기록을 시즌 범위로 한 번에 적재하는 실행 파일이다.
+
+    python backfill.py 1982 2024 --season-workers 2 --workers 2
+
+끝난 작업 단위와 저장이 끝난 시즌은 crawl_journal.CrawlJournal에 기록되므로, 중간에 죽으면 같은 인자로 다시 실행해
+이어서 진행한다(--fresh로 처음부터).
+최대 season-workers개 시즌을 동시에 수집하고(시즌마다 workers개 세션), 모든 세션은 하나의 요청 예산
+(rate_limiter.RateLimiter)을 나눠 쓴다. 수집이 끝난 시즌은 곧바로 DB에 한 트랜잭션으로 저장한 뒤 메모리에서 버리므로
+메모리에 올라가는 시즌은 최대 season-workers개이다.
+팀 순위(TeamRankDaily)는 시즌을 고를 수 없어 현재 순위만 보여 주므로 기본으로 타자/투수 기록만 수집한다.
+"""
+import argparse
+import os
+import os.path
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from dotenv import load_dotenv
+
+# 현재 디렉토리의 절대 경로
+current_dir = os.path.dirname(os.path.abspath(__file__))
+load_dotenv(os.path.join(current_dir, '.env'))
+
+import metrics
+from crawl_journal import CrawlJournal
+from crawl_pool import PLAYER_CATEGORIES, crawl_categories
+from kbo_site import HITTER_URL
+from http_fetcher import check_robots_txt
+from rate_limiter import RateLimiter
+
+# ddlSeason 드롭다운의 첫 시즌
+FIRST_SEASON = 1982
+
+
+def season_range(start, end):
+    """start~end(양 끝 포함) 시즌 문자열 목록을 반환한다."""
+    start, end = int(start), int(end)
+    if start > end:
+        start, end = end, start
+    if start < FIRST_SEASON:
+        raise ValueError(f"{FIRST_SEASON}시즌 이전 기록은 없음: {start}")
+    return [str(season) for season in range(start, end + 1)]
+
+
+def open_headless_browser():
+    """브라우저 fallback 풀의 워커마다 headless 크롬을 열어 타자 기록 페이지에 접속한다."""
+    from browser import create_driver, open_page
+
+    driver = create_driver(headless=True)
+    open_page(driver, HITTER_URL)
+    return driver
+
+
+def load_season(season, frames, categories):
+    """한 시즌의 수집 결과를 한 트랜잭션으로 저장하고 ({category: UpsertCounts}, 모두 저장했는지)를 반환한다."""
+    from db import load_session
+
+    counts = {}
+    complete = True
+    with load_session() as session:
+        for category in categories:
+            df = frames.get(category)
+            if df is None:
+                print(f"   ⚠️ {season}시즌 {category} 수집 실패: 저장을 건너뜀")
+                complete = False
+                continue
+            if len(df) == 0:
+                continue
+            try:
+                counts[category] = session.write(category, df)
+            except Exception as e:
+                print(f"   ⚠️ {season}시즌 {category} 저장 실패: {e}")
+                complete = False
+    return counts, complete
+
+
+def backfill(seasons, categories=PLAYER_CATEGORIES, season_workers=1, workers=1, sleep_fn=None,
+             modes=('http', 'browser'), load=True, journal=None):
+    """seasons를 시즌 단위로 병렬 수집하고, 끝난 시즌부터 바로 DB에 저장한다.
+
+    동시에 진행(수집 중이거나 저장 대기 중)하는 시즌은 최대 season_workers개이다.
+    journal을 넘기면 저장이 끝난 시즌은 건너뛰고, 끝난 작업 단위는 다시 수집하지 않는다.
+    반환값은 {season: {category: UpsertCounts}} (load=False면 {season: {category: 행 수}}).
+    """
+    season_workers = max(1, int(season_workers))
+    todo = list(seasons)
+    summary = {}
+    if journal is not None:
+        loaded = journal.loaded_seasons()
+        if loaded & set(todo):
+            print(f"   ♻️ 이전 실행에서 저장이 끝난 시즌 {len(loaded & set(todo))}개를 건너뛴다")
+        todo = [season for season in todo if season not in loaded]
+
+    def crawl_season(season):
+        return crawl_categories([season], categories, modes, workers, sleep_fn, open_headless_browser,
+                                journal=journal)
+
+    with ThreadPoolExecutor(max_workers=season_workers) as executor:
+        running = {}
+        while todo or running:
+            while todo and len(running) < season_workers:
+                season = todo.pop(0)
+                print(f"🗓️  {season}시즌 수집 시작")
+                running[executor.submit(crawl_season, season)] = season
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                season = running.pop(future)
+                try:
+                    frames = future.result()
+                except Exception as e:
+                    print(f"   ❌ {season}시즌 수집 실패: {e}")
+                    summary[season] = {}
+                    continue
+                if load:
+                    try:
+                        summary[season], complete = load_season(season, frames, categories)
+                    except Exception as e:
+                        print(f"   ❌ {season}시즌 저장 실패: {e}")
+                        summary[season] = {}
+                        continue
+                    if journal is not None and complete:
+                        journal.mark_loaded(season)
+                else:
+                    summary[season] = {c: len(df) for c, df in frames.items()}
+                print(f"   ✅ {season}시즌 완료: {summary[season]}")
+                # 저장이 끝난 시즌의 DataFrame은 여기서 놓아 준다
+                del frames
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='KBO 과거 시즌 기록 일괄 적재')
+    parser.add_argument('start', help='첫 시즌 (예: 1982)')
+    parser.add_argument('end', help='마지막 시즌 (예: 2024)')
+    parser.add_argument('--season-workers', type=int, default=int(os.getenv('BACKFILL_SEASON_WORKERS', '2')),
+                        help='동시에 수집하는 시즌 수')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('CRAWL_WORKERS', '1')),
+                        help='시즌마다 여는 세션 수')
+    parser.add_argument('--rps', type=float, default=float(os.getenv('CRAWL_RPS', '2.0')),
+                        help='모든 세션이 공유하는 초당 요청 수')
+    parser.add_argument('--burst', type=int, default=int(os.getenv('CRAWL_BURST', '2')))
+    parser.add_argument('--categories', default=','.join(PLAYER_CATEGORIES),
+                        help='쉼표로 구분한 카테고리 (hitters,pitchers)')
+    parser.add_argument('--no-load', action='store_true', help='DB에 저장하지 않고 수집만 한다')
+    parser.add_argument('--fresh', action='store_true', help='중단된 이전 실행을 이어받지 않고 처음부터 수집한다')
+    args = parser.parse_args(argv)
+
+    seasons = season_range(args.start, args.end)
+    categories = tuple(c.strip() for c in args.categories.split(',') if c.strip())
+    modes = ('http', 'browser') if os.getenv('FETCH_MODE', 'http').lower() == 'http' else ('browser',)
+
+    if not check_robots_txt(HITTER_URL):
+        print("\n🛑 크롤링 중단 중")
+        return 1
+
+    metrics.reset()
+    started = time.time()
+    limiter = RateLimiter(args.rps, args.burst)
+    print(f"📚 {seasons[0]}~{seasons[-1]} ({len(seasons)}개 시즌) 백필 시작: "
+          f"시즌 {args.season_workers}개 동시 x 세션 {args.workers}개, 전체 요청 예산 초당 {args.rps}회")
+
+    if not args.no_load:
+        from db import pooled_conn, create_tables, close_pool
+
+        with pooled_conn() as conn:
+            create_tables(conn)
+    journal = None if args.no_load else CrawlJournal(f"backfill-{seasons[0]}-{seasons[-1]}-{'+'.join(categories)}")
+    if journal is not None and args.fresh:
+        journal.clear()
+    try:
+        summary = backfill(seasons, categories, args.season_workers, args.workers, limiter, modes,
+                           load=not args.no_load, journal=journal)
+        if journal is not None:
+            # 일부 카테고리만 저장된 시즌도 실패로 본다 (다음 실행에서 이어서 진행)
+            loaded = journal.loaded_seasons()
+            failed = [season for season in summary if season not in loaded]
+        else:
+            failed = [season for season, counts in summary.items() if not counts]
+        if journal is not None and not failed:
+            journal.clear()
+    finally:
+        if journal is not None:
+            journal.close()
+        if not args.no_load:
+            close_pool()
+
+    print(f"\n🏁 백필 완료: 이번 실행에서 {len(summary) - len(failed)}/{len(summary)}개 시즌 저장")
+    print(f"   ⏱️ 서버 요청 {limiter.requests}회, 예산 대기 {limiter.waited:.1f}초, 오류 {limiter.errors}회")
+    report = metrics.run_report(started, time.time(), 1 if failed else 0, command='backfill',
+                                seasons=[seasons[0], seasons[-1]], categories=list(categories), failed=failed)
+    metrics.write_run_report(report)
+    for line in metrics.summary_lines(report):
+        print(f"   {line}")
+    if failed:
+        print(f"   ⚠️ 실패한 시즌: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
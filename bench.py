@@ -0,0 +1,350 @@
+"""bench.py
+네트워크 없이 기록 표 추출, 열 변환, DB 저장 처리량을 재는 벤치마크 실행 파일이다.
+
+    python bench.py                          # 모든 벤치마크, 결과는 bench_results/bench-<시각>.json
+    python bench.py --sizes 30,300 --only extract
+    python bench.py --compare bench_results/bench-20250101-000000.json --fail-on-regression
+    python bench.py --record                 # 실제 KBO 페이지를 bench_fixtures/에 받아 둔다 (네트워크 필요)
+
+기록 표는 bench_fixtures/에 받아 둔 실제 페이지(카테고리, 한 쪽 행 수마다 하나)를 먼저 쓰고, 그 크기의 페이지가 없을 때만
+kbo_fixtures.py가 실제 페이지 구조로 만든 합성 페이지를 쓴다. 결과의 source가 어느 쪽인지 남기며 --compare는 같은 출처끼리만 비교한다.
+upsert 벤치마크는 PG* 환경 변수의 Postgres(로컬 docker 등)에 임시 스키마를 만들어 실행하고, 연결할 수 없으면 건너뛴다.
+    docker run --rm -e POSTGRES_PASSWORD=postgres -p 5432:5432 postgres:16
+"""
+import argparse
+import json
+import os
+import os.path
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import db
+import kbo_fixtures
+from kbo_site import record_table_from_html, rankings_table_from_html
+from stat_schema import apply_schema, parse_innings_column
+
+RESULT_DIR = os.getenv('BENCH_RESULT_DIR', 'bench_results')
+DEFAULT_SIZES = (30, 300, 3000)
+# 한 번 잴 때 최소 실행 시간(초). 짧은 작업은 이 시간이 넘을 때까지 반복한 평균을 쓴다
+MIN_SAMPLE_SECONDS = 0.05
+
+RECORD_SPECS = {
+    'hitters': (db.HITTERS_COLMAP, db.HITTERS_KINDS, db.PLAYER_KEY, db.df_to_hitters_table),
+    'pitchers': (db.PITCHERS_COLMAP, db.PITCHERS_KINDS, db.PLAYER_KEY, db.df_to_pitchers_table),
+    'team_rankings': (db.TEAM_RANKINGS_COLMAP, db.TEAM_RANKINGS_KINDS, ('team', 'year'), db.df_to_team_rankings_table),
+}
+
+
+def measure(fn, repeat=5):
+    """fn()을 repeat번 재서 {median_s, best_s, loops}를 반환한다. 짧은 fn은 여러 번 돌린 평균을 한 번으로 본다."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SAMPLE_SECONDS or loops >= 1 << 16:
+            break
+        loops *= 2
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops)
+    return {'median_s': statistics.median(samples), 'best_s': min(samples), 'loops': loops}
+
+
+class Bench:
+    """벤치마크 결과를 모은다. only가 있으면 이름에 그 문자열이 들어간 것만 실행한다."""
+
+    def __init__(self, repeat=5, only=None):
+        self.repeat = repeat
+        self.only = only
+        self.results = {}
+
+    def run(self, name, fn, rows=0, nbytes=0, source=None):
+        if self.only and not any(o in name for o in self.only):
+            return None
+        result = measure(fn, self.repeat)
+        result['rows'] = rows
+        if source:
+            result['source'] = source
+        if rows:
+            result['rows_per_s'] = round(rows / result['median_s'], 1)
+        if nbytes:
+            result['bytes'] = nbytes
+            result['mb_per_s'] = round(nbytes / result['median_s'] / 1024 / 1024, 2)
+        self.results[name] = result
+        print(f"   {name:<40} {result['median_s'] * 1000:10.3f}ms"
+              + (f"  {result['rows_per_s']:>12,.0f} rows/s" if rows else '')
+              + ('  (합성 페이지)' if source == 'synthetic' else ''))
+        return result
+
+    def skip(self, name, reason):
+        if self.only and not any(o in name for o in self.only):
+            return
+        self.results[name] = {'skipped': reason}
+        print(f"   {name:<40} 건너뜀: {reason}")
+
+
+def _text_frame(df):
+    """추출한 DataFrame을 셀 문자열 DataFrame으로 바꾼다(표의 원래 글자를 셀 단위 변환에 넘기기 위해)."""
+    return df.apply(lambda s: s.map(lambda v: None if v is None or (isinstance(v, float) and pd.isna(v)) else str(v)))
+
+
+def _page_sizes(category, sizes):
+    # 받아 둔 실제 페이지의 크기(한 쪽 30행, 마지막 쪽 등)도 함께 잰다
+    return sorted(set(sizes) | set(kbo_fixtures.recorded_sizes(category)))
+
+
+def bench_extract(bench, sizes):
+    print("\n🧪 표 추출 (html -> DataFrame)")
+    for category in ('hitters', 'pitchers'):
+        for n in _page_sizes(category, sizes):
+            html, source = kbo_fixtures.page_fixture(category, n)
+            rows = len(record_table_from_html(html))
+            bench.run(f"extract.{category}.{n}", lambda h=html: record_table_from_html(h), rows,
+                      len(html.encode('utf-8')), source)
+    html, source = kbo_fixtures.page_fixture('team_rankings')
+    rows = len(rankings_table_from_html(html, '2025'))
+    bench.run(f"extract.team_rankings.{rows}", lambda: rankings_table_from_html(html, '2025'), rows,
+              len(html.encode('utf-8')), source)
+
+
+def bench_coerce(bench, sizes):
+    print("\n🧪 열 변환 (셀 단위 _safe_number vs 열 단위)")
+    for category in ('hitters', 'pitchers'):
+        colmap, kinds, _, _ = RECORD_SPECS[category]
+        for n in _page_sizes(category, sizes):
+            html, source = kbo_fixtures.page_fixture(category, n)
+            raw = record_table_from_html(html)
+            text = _text_frame(raw)
+            cols = [(c, kinds.get(colmap[c], 'real')) for c in text.columns if c in colmap and colmap[c] != 'year']
+            cells = len(raw) * len(cols)
+
+            def per_cell(text=text, cols=cols):
+                for c, kind in cols:
+                    [db._safe_number(v, kind) for v in text[c]]
+
+            def per_column(text=text, cols=cols):
+                for c, kind in cols:
+                    db._coerce_column(text[c], kind)
+
+            bench.run(f"coerce.safe_number.{category}.{n}", per_cell, cells, source=source)
+            bench.run(f"coerce.column.{category}.{n}", per_column, cells, source=source)
+            raw = raw.assign(year=2025)
+            bench.run(f"coerce.apply_schema.{category}.{n}", lambda r=raw, c=category: apply_schema(r, c), len(raw),
+                      source=source)
+
+    for n in sizes:
+        ip = [row[0][10] for row in kbo_fixtures.pitcher_rows(n)]
+        series = pd.Series(ip, dtype=object)
+        bench.run(f"innings.fractional.{n}", lambda ip=ip: [db._parse_fractional_innings(s) for s in ip], n)
+        bench.run(f"innings.column.{n}", lambda s=series: parse_innings_column(s), n)
+
+
+def _typed_frames(sizes):
+    """{(category, 행 수): (DataFrame, 출처)}. 받아 둔 실제 페이지가 있으면 그 표를 쓴다."""
+    frames = {}
+    for category in ('hitters', 'pitchers'):
+        for n in _page_sizes(category, sizes):
+            html, source = kbo_fixtures.page_fixture(category, n)
+            df = record_table_from_html(html).assign(year=2025)
+            frames[(category, n)] = apply_schema(df, category), source
+    html, source = kbo_fixtures.page_fixture('team_rankings')
+    df = apply_schema(rankings_table_from_html(html, '2025'), 'team_rankings')
+    frames[('team_rankings', len(df))] = df, source
+    return frames
+
+
+def bench_records(bench, frames):
+    print("\n🧪 DB 레코드 변환 (frame_to_records, COPY 버퍼)")
+    for (category, n), (df, source) in frames.items():
+        colmap, kinds, keys, _ = RECORD_SPECS[category]
+        bench.run(f"records.{category}.{n}", lambda df=df, c=colmap, k=kinds, keys=keys: db.frame_to_records(df, c, k, keys),
+                  len(df), source=source)
+        _, records = db.frame_to_records(df, colmap, kinds, keys)
+        bench.run(f"copy_text.{category}.{n}", lambda r=records: db._copy_text(r), len(df), source=source)
+
+
+def _upsert_names(frames):
+    return [f"{kind}.{c}.{n}" for c, n in frames for kind in ('upsert', 'upsert_unchanged')]
+
+
+def bench_upsert(bench, frames):
+    print("\n🧪 upsert (로컬 Postgres)")
+    names = _upsert_names(frames)
+    try:
+        conn = db.psycopg2.connect(connect_timeout=3, **db._conn_params())
+    except Exception as e:
+        reason = f"Postgres에 연결할 수 없음 ({str(e).strip().splitlines()[0]})"
+        for name in names:
+            bench.skip(name, reason)
+        return
+    schema = f"bench_{os.getpid()}"
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA {schema}")
+            cur.execute(f"SET search_path TO {schema}")
+        db.create_tables(conn)
+        conn.commit()
+        for (category, n), (df, source) in frames.items():
+            table = category
+            writer = RECORD_SPECS[category][3]
+
+            def insert(df=df, writer=writer, table=table):
+                with conn.cursor() as cur:
+                    cur.execute(f"TRUNCATE {table}")
+                writer(df, conn=conn)
+                conn.commit()
+
+            bench.run(f"upsert.{category}.{n}", insert, len(df), source=source)
+            # 같은 값을 다시 저장: IS DISTINCT FROM 가드로 갱신 없이 끝나는 경로
+            bench.run(f"upsert_unchanged.{category}.{n}", lambda df=df, w=writer: (w(df, conn=conn), conn.commit()),
+                      len(df), source=source)
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+def environment():
+    """결과를 비교할 때 필요한 실행 환경 정보."""
+    import lxml.etree
+    import numpy
+
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                         cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).decode().strip()
+    except Exception:
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': numpy.__version__,
+        'lxml': '.'.join(map(str, lxml.etree.LXML_VERSION)),
+        'psycopg2': getattr(db.psycopg2, '__version__', None),
+        'commit': commit,
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """baseline 결과와 median을 비교해 출력하고, threshold배 이상 느려진 항목 이름 목록을 반환한다."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    print(f"\n📈 {baseline_path} 대비 (median, {threshold:.2f}배 이상 느려지면 ❌)")
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if 'median_s' not in result or not old or 'median_s' not in old:
+            continue
+        # 실제 페이지와 합성 페이지의 시간은 비교할 수 없다 (source가 없는 예전 결과는 합성 페이지)
+        sources = old.get('source') or 'synthetic', result.get('source') or 'synthetic'
+        if sources[0] != sources[1]:
+            print(f"      {name:<40} 출처가 달라 비교하지 않음 ({sources[0]} -> {sources[1]})")
+            continue
+        ratio = result['median_s'] / old['median_s']
+        mark = '❌' if ratio >= threshold else ('✅' if ratio <= 1 / threshold else '  ')
+        print(f"   {mark} {name:<40} {old['median_s'] * 1000:10.3f}ms -> {result['median_s'] * 1000:10.3f}ms ({ratio:.2f}x)")
+        if ratio >= threshold:
+            regressions.append(name)
+    return regressions
+
+
+def record_fixtures():
+    """실제 KBO 페이지를 FIXTURE_DIR에 저장한다(폼 상태 값은 kbo_fixtures.sanitize_page로 지움).
+
+    타자/투수는 전체 1쪽과 첫 팀의 모든 쪽을 받아 한 쪽 행 수마다 하나씩(<category>-<행 수>), 팀 순위는 한 장을 남긴다.
+    """
+    from http_fetcher import PostbackSession, check_robots_txt, fetch_remaining_pages, get_team_list_http
+    from kbo_site import HITTER_URL, PITCHER_URL, TEAM_RANK_URL, TEAM_SELECT_ID, round_trip
+    from rate_limiter import RateLimiter
+
+    if not check_robots_txt(HITTER_URL):
+        return 1
+    limiter = RateLimiter(1.0, 1)
+    for category, url in (('hitters', HITTER_URL), ('pitchers', PITCHER_URL)):
+        session = PostbackSession()
+        pages = [round_trip(limiter, lambda: session.open(url))]
+        team = get_team_list_http(session)[0]
+        pages.append(round_trip(limiter, lambda: session.select(TEAM_SELECT_ID, text=team)))
+        pages.extend(fetch_remaining_pages(session, limiter))
+        saved = set()
+        for html in pages:
+            df = record_table_from_html(html)
+            rows = len(df) if df is not None else 0
+            if not rows or rows in saved:
+                continue
+            saved.add(rows)
+            name = kbo_fixtures.fixture_name(category, rows)
+            print(f"   💾 {name}: {len(html) // 1024}KB -> {kbo_fixtures.save_page(name, html)}")
+    html = round_trip(limiter, lambda: PostbackSession().open(TEAM_RANK_URL))
+    print(f"   💾 team_rankings: {len(html) // 1024}KB -> {kbo_fixtures.save_page('team_rankings', html)}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='KBO 크롤러 오프라인 벤치마크')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='표 행 수 목록 (쉼표 구분)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', action='append', help='이름에 이 문자열이 들어간 벤치마크만 (여러 번 지정 가능)')
+    parser.add_argument('--no-db', action='store_true', help='upsert 벤치마크를 건너뛴다')
+    parser.add_argument('--out', help='결과 JSON 경로 (기본: bench_results/bench-<시각>.json)')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON')
+    parser.add_argument('--threshold', type=float, default=1.25, help='이 배수 이상 느려지면 회귀로 본다')
+    parser.add_argument('--fail-on-regression', action='store_true', help='회귀가 있으면 종료 코드 1')
+    parser.add_argument('--record', action='store_true', help='실제 페이지를 fixture로 받아 두고 끝낸다')
+    args = parser.parse_args(argv)
+
+    if args.record:
+        return record_fixtures()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    bench = Bench(args.repeat, args.only)
+    started = time.time()
+    bench_extract(bench, sizes)
+    bench_coerce(bench, sizes)
+    frames = _typed_frames(sizes)
+    bench_records(bench, frames)
+    if args.no_db:
+        for name in _upsert_names(frames):
+            bench.skip(name, '--no-db')
+    else:
+        bench_upsert(bench, frames)
+
+    result = {
+        'started': datetime.fromtimestamp(started).isoformat(timespec='seconds'),
+        'duration_seconds': round(time.time() - started, 2),
+        'sizes': sizes,
+        'repeat': args.repeat,
+        'environment': environment(),
+        'results': bench.results,
+    }
+    out = args.out or os.path.join(RESULT_DIR, f"bench-{datetime.fromtimestamp(started):%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {out} ({result['duration_seconds']}초)")
+
+    if args.compare:
+        regressions = compare(bench.results, args.compare, args.threshold)
+        if regressions:
+            print(f"   ⚠️ 느려진 항목 {len(regressions)}개: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
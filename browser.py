@@ -0,0 +1,171 @@
+"""browser.py
+Selenium 크롬 드라이버 실행과 KBO 페이지 접속 직후 처리(알럿/팝업 닫기)를 담당하는 모듈이다.
+
+HTTP 수집 모드(http_fetcher.py)가 기본이며, 브라우저는 fallback 모드에서만 실행된다.
+기록 표 하나만 읽으므로 기본 프로필(BROWSER_PROFILE=lean)은 이미지/폰트/CSS/광고 스크립트를 받지 않고
+DOM이 준비되면 바로 다음 단계로 넘어간다. 화면을 눈으로 확인할 때는 BROWSER_PROFILE=full로 실행한다.
+"""
+import os
+import time
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from driver_cache import resolve_driver, forget
+from kbo_site import USER_AGENT
+from metrics import span
+
+# 흔한 동의/쿠키 버튼 XPath
+POPUP_XPATHS = [
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'동의')]",
+    "//button[contains(., '확인')]",
+    "//button[contains(., '동의함')]",
+    "//button[contains(., '수락')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'agree')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'accept')]",
+    "//button[contains(., '닫기')]",
+]
+
+BROWSER_PROFILE = os.getenv('BROWSER_PROFILE', 'lean').lower()
+
+# lean 프로필에서 CDP(Network.setBlockedURLs)로 막는 요청. ASP.NET postback에 필요한 스크립트(.axd/.js)는 막지 않는다.
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.css', '*.mp4', '*.webm', '*.mp3',
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*facebook.net*', '*facebook.com/tr*', '*naver.net/wcslog*', '*wcs.naver.net*', '*kakao.com*',
+]
+
+# lean 프로필에서 끄는 크롬 기능 (값 2 = 차단)
+LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.stylesheets': 2,
+    'profile.managed_default_content_settings.fonts': 2,
+    'profile.managed_default_content_settings.plugins': 2,
+    'profile.managed_default_content_settings.popups': 2,
+    'profile.managed_default_content_settings.media_stream': 2,
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.geolocation': 2,
+    'profile.default_content_setting_values.automatic_downloads': 2,
+}
+
+LEAN_ARGUMENTS = [
+    '--blink-settings=imagesEnabled=false',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication',
+    '--metrics-recording-only',
+    '--mute-audio',
+    '--no-first-run',
+]
+
+
+def build_chrome_options(headless=None, profile=None):
+    """크롬 옵션을 구성한다. headless가 None이면 HEADLESS 환경 변수가 참일 때 headless로 실행한다.
+
+    profile이 'lean'(기본: BROWSER_PROFILE)이면 이미지/CSS/폰트와 불필요한 기능을 끄고,
+    페이지 로드 전략을 'eager'로 두어 DOMContentLoaded에서 driver.get()이 반환되게 한다.
+    """
+    profile = (profile or BROWSER_PROFILE).lower()
+    chrome_options = Options()
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+
+    # EC2나 서버 환경에서는 Headless 모드로 실행 (UI 없이 백그라운드 실행)
+    if headless is None:
+        headless = os.getenv('HEADLESS', 'False').lower() in ('true', '1', 't')
+    if headless:
+        print("   🖥️ Headless 모드로 실행한다 (서버/EC2 환경용)")
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1920,1080")
+
+    if profile == 'lean':
+        print("   🪶 lean 프로필: 이미지/폰트/CSS/광고 요청을 막고 DOM이 준비되면 바로 진행한다")
+        for arg in LEAN_ARGUMENTS:
+            chrome_options.add_argument(arg)
+        chrome_options.add_experimental_option('prefs', LEAN_PREFS)
+        chrome_options.page_load_strategy = 'eager'
+    return chrome_options
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """CDP로 patterns에 맞는 요청을 막는다. 크롬 prefs로 막지 못하는 CSS/광고 스크립트도 여기서 걸러진다."""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+    except Exception as e:
+        print(f"   ⚠️ 리소스 차단 설정 실패(무시하고 계속): {e}")
+
+
+def create_driver(headless=None, profile=None):
+    """크롬드라이버를 실행하여 반환한다. profile은 build_chrome_options()를 참고.
+
+    드라이버 경로는 driver_cache.resolve_driver()가 캐시에서 찾으므로 평소에는 네트워크 요청 없이 바로 실행된다.
+    캐시의 드라이버로 실행에 실패하면 캐시를 지우고 한 번 더 확인한다.
+    """
+    profile = (profile or BROWSER_PROFILE).lower()
+    chrome_options = build_chrome_options(headless, profile)
+
+    driver_path = resolve_driver()
+    try:
+        driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+    except Exception as e_cached:
+        print(f"   ⚠️ 드라이버 실행 실패({driver_path}): {e_cached}")
+        forget()
+        driver_path = resolve_driver()
+        try:
+            driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+        except Exception as e_retry:
+            print(f"   ❌ 드라이버 실행 실패: {e_retry}")
+            raise RuntimeError("chromedriver 실행 실패. CHROMEDRIVER_PATH를 확인할 것.")
+    print(f"   ✅ 드라이버 실행 성공: {driver_path}")
+    if profile == 'lean':
+        block_resources(driver)
+
+    driver.implicitly_wait(10)
+    return driver
+
+
+def open_page(driver, url):
+    """url로 이동한 뒤 접속 직후 뜨는 JS alert와 동의/쿠키 팝업을 닫는다."""
+    with span('navigate'):
+        driver.get(url)
+
+    # 일부 사이트는 접속 직후 동의/쿠키/팝업 창이 떠서 자동화가 멈춤.
+    # 자주 등장하는 알람과 동의 버튼을 자동으로 닫아 진행을 도움.
+    try:
+        # 짧게 대기 후 JS alert가 있는지 확인
+        time.sleep(0.8)
+        alert = driver.switch_to.alert
+        alert_text = alert.text if hasattr(alert, 'text') else ''
+        alert.accept()
+        print(f"   ✅ 페이지의 JS alert를 수락함: {alert_text}")
+    except Exception:
+        # 알럿이 없으면 무시
+        pass
+
+    # 후보 XPath를 한 번에 조회한다. 버튼이 없을 때 XPath마다 implicit wait(10초)를 기다리지 않도록 잠시 0으로 둔다
+    driver.implicitly_wait(0)
+    try:
+        buttons = driver.find_elements(By.XPATH, ' | '.join(POPUP_XPATHS))
+    except Exception:
+        buttons = []
+    finally:
+        driver.implicitly_wait(10)
+    for el in buttons:
+        try:
+            el.click()
+            print(f"   ✅ 팝업 버튼을 클릭함: {el.text.strip()}")
+            time.sleep(0.6)
+            break
+        except Exception:
+            continue
@@ -0,0 +1,256 @@
+"""crawl_daemon.py
+세션(HTTP/크롬)과 DB 연결 풀을 살려 둔 채 수집 작업을 받아 실행하는 상주 프로세스이다.
+
+cron으로 main.py를 매번 실행하면 크롬 시작, robots.txt 확인, 팝업 처리, 첫 접속을 매번 다시 한다.
+데몬은 시작할 때 한 번만 이 비용을 치르고, 로컬 TCP 소켓(기본 127.0.0.1:8765)으로 JSON 한 줄짜리 요청을 받는다.
+
+    {"cmd": "crawl", "season": "2025", "force": false, "wait": false}  -> {"ok": true, "job": {...}}
+    {"cmd": "status", "job": 3}                                        -> {"ok": true, "job": {...}}
+    {"cmd": "ping"} / {"cmd": "shutdown"}
+
+작업은 접수 즉시 응답하고 저장 스레드 하나가 차례로 실행한다(모든 작업이 요청 예산 하나를 쓰도록).
+아직 시작하지 않은 같은 (season, force) 작업이 있으면 새로 쌓지 않고 그 작업을 돌려준다.
+"""
+import itertools
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+import main
+from crawl_pool import WarmSessions
+
+DAEMON_ADDR = os.getenv('CRAWL_DAEMON_ADDR', '127.0.0.1:8765')
+# robots.txt를 다시 확인하는 주기(시간)
+ROBOTS_TTL_HOURS = float(os.getenv('ROBOTS_TTL_HOURS', '24'))
+# status로 조회할 수 있게 남겨 두는 끝난 작업 수
+KEEP_JOBS = 100
+
+
+def parse_addr(addr=DAEMON_ADDR):
+    """'host:port'를 (host, port)로 바꾼다."""
+    host, _, port = addr.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def _reset_browser(driver, sleep_fn):
+    # 브라우저 모드를 쓰지 않으면 selenium을 불러오지 않도록 여기서 가져온다
+    from crawler import reset_driver
+
+    reset_driver(driver, sleep_fn)
+
+
+class Job:
+    """데몬이 받은 수집 작업 하나."""
+
+    def __init__(self, job_id, season, force):
+        self.id = job_id
+        self.season = season
+        self.force = force
+        self.state = 'queued'
+        self.code = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'season': self.season,
+            'force': self.force,
+            'state': self.state,
+            'code': self.code,
+            'error': self.error,
+            'queued_seconds': round((self.started or time.time()) - self.submitted, 3),
+            'run_seconds': round(self.finished - self.started, 3) if self.finished and self.started else None,
+        }
+
+
+class CrawlDaemon:
+    """세션 보관소(WarmSessions)와 작업 큐를 가진 수집 데몬.
+
+    browsers : 시작할 때 미리 띄워 둘 크롬 수 (기본: browser 모드면 CRAWL_WORKERS, http 모드면 0)
+    """
+
+    def __init__(self, settings, browsers=None):
+        from http_fetcher import PostbackSession, reset_session
+
+        self.settings = settings
+        if browsers is None:
+            browsers = settings.workers if settings.fetch_mode == 'browser' else 0
+        self.browsers = browsers
+        size = max(settings.workers, browsers)
+        self.warm = {
+            'http': WarmSessions(PostbackSession, lambda s: None, reset_session, size),
+            'browser': WarmSessions(lambda: main.open_browser(settings), lambda d: d.quit(), _reset_browser, size),
+        }
+        self.jobs = {}
+        self.started = time.time()
+        self._ids = itertools.count(1)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._robots_ok = None
+        self._robots_at = None
+        self._worker = threading.Thread(target=self._run, name='crawl-daemon', daemon=True)
+
+    def robots_allowed(self):
+        """robots.txt 허용 여부. ROBOTS_TTL_HOURS가 지나면 다시 확인한다."""
+        from http_fetcher import check_robots_txt
+        from kbo_site import HITTER_URL
+
+        now = time.monotonic()
+        if self._robots_at is None or now - self._robots_at > ROBOTS_TTL_HOURS * 3600:
+            self._robots_ok = check_robots_txt(HITTER_URL)
+            self._robots_at = now
+        return self._robots_ok
+
+    def start(self):
+        """robots.txt를 확인하고 세션을 미리 연 뒤 작업 스레드를 시작한다. 크롤링이 허용되지 않으면 False."""
+        if not self.robots_allowed():
+            return False
+        if self.browsers:
+            print(f"   🔥 크롬 {self.browsers}개를 미리 띄워 둔다...")
+            self.warm['browser'].warm(self.browsers)
+        self._worker.start()
+        return True
+
+    def submit(self, season=main.CURRENT_SEASON, force=False):
+        """작업을 큐에 넣고 Job을 반환한다. 아직 시작하지 않은 같은 작업이 있으면 그 Job을 반환한다."""
+        season = str(season)
+        with self._lock:
+            for job in self.jobs.values():
+                if job.state == 'queued' and job.season == season and job.force == force:
+                    return job
+            job = Job(next(self._ids), season, bool(force))
+            self.jobs[job.id] = job
+            finished = [j for j in self.jobs.values() if j.done.is_set()]
+            for old in finished[:max(0, len(finished) - KEEP_JOBS)]:
+                del self.jobs[old.id]
+        self._queue.put(job)
+        return job
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            job.state = 'running'
+            job.started = time.time()
+            print(f"\n📥 작업 {job.id} 시작: {job.season}시즌 (force={job.force})")
+            try:
+                if not self.robots_allowed():
+                    raise RuntimeError('robots.txt가 크롤링을 허용하지 않음')
+                settings = self.settings._replace(force=True) if job.force else self.settings
+                job.code = main.run_crawl(settings, job.season, warm=self.warm, check_robots=False, keep_pool=True)
+                job.state = 'done' if job.code == 0 else 'failed'
+            except Exception as e:
+                job.code = 1
+                job.error = str(e)
+                job.state = 'failed'
+            job.finished = time.time()
+            job.done.set()
+            result = "크롤링 성공" if job.code == 0 else f"크롤링 실패: {job.error or f'종료 코드 {job.code}'}"
+            main.log_crawling_result(f"[daemon job {job.id}] {result}")
+            print(f"📤 작업 {job.id} 종료: {job.state} ({job.finished - job.started:.1f}초)")
+
+    def handle(self, request):
+        """요청 dict 하나를 처리하여 응답 dict를 반환한다."""
+        cmd = request.get('cmd')
+        if cmd == 'ping':
+            return {
+                'ok': True,
+                'uptime': round(time.time() - self.started, 1),
+                'warm': {mode: len(w) for mode, w in self.warm.items()},
+                'queued': self._queue.qsize(),
+            }
+        if cmd == 'crawl':
+            job = self.submit(request.get('season', main.CURRENT_SEASON), bool(request.get('force')))
+            if request.get('wait'):
+                job.done.wait()
+            return {'ok': True, 'job': job.to_dict()}
+        if cmd == 'status':
+            job = self.jobs.get(request.get('job'))
+            if job is None:
+                return {'ok': False, 'error': f"작업을 찾을 수 없음: {request.get('job')}"}
+            if request.get('wait'):
+                job.done.wait()
+            return {'ok': True, 'job': job.to_dict()}
+        return {'ok': False, 'error': f'알 수 없는 명령: {cmd}'}
+
+    def close(self):
+        """작업 스레드를 멈추고(진행 중인 작업은 끝낸다) 보관 중인 세션과 DB 연결 풀을 닫는다."""
+        if self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+        for warm in self.warm.values():
+            warm.close()
+        try:
+            from db import close_pool
+
+            close_pool()
+        except Exception:
+            pass
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon = self.server.crawl_daemon
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {'ok': False, 'error': f'JSON 형식 오류: {e}'}
+            else:
+                if request.get('cmd') == 'shutdown':
+                    response = {'ok': True}
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    response = daemon.handle(request)
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve(settings, addr=DAEMON_ADDR, browsers=None):
+    """데몬을 시작하고 shutdown 요청이나 Ctrl+C까지 요청을 받는다. 종료 코드를 반환한다."""
+    daemon = CrawlDaemon(settings, browsers)
+    if not daemon.start():
+        print("\n🛑 robots.txt가 크롤링을 허용하지 않아 데몬을 시작하지 않음")
+        return 1
+    host, port = parse_addr(addr)
+    server = _Server((host, port), _Handler)
+    server.crawl_daemon = daemon
+    print(f"\n🛰️ 수집 데몬 대기 중: {host}:{port} (세션 보관 {max(settings.workers, daemon.browsers)}개)")
+    try:
+        server.serve_forever(poll_interval=0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.close()
+    print("🏁 수집 데몬 종료")
+    return 0
+
+
+def request(payload, addr=DAEMON_ADDR, timeout=None):
+    """데몬에 요청 하나를 보내고 응답 dict를 반환한다. 데몬이 없으면 OSError."""
+    host, port = parse_addr(addr)
+    with socket.create_connection((host, port), timeout=5) as sock:
+        sock.settimeout(timeout)
+        sock.sendall((json.dumps(payload) + '\n').encode('utf-8'))
+        with sock.makefile('rb') as f:
+            line = f.readline()
+    if not line:
+        raise OSError('데몬이 응답 없이 연결을 닫음')
+    return json.loads(line)
@@ -0,0 +1,115 @@
+"""crawl_journal.py
+수집 실행 중 끝난 작업 단위(season, category, team)를 SQLite에 기록하는 재시작용 저널이다.
+
+작업 단위가 끝날 때마다 그 DataFrame을 바로 저널에 남기므로, 실행이 중간에 죽어도 같은 run_id로 다시 실행하면
+끝난 단위는 저널에서 불러오고 끝나지 않은 단위부터 다시 수집한다.
+DB 저장까지 끝나면 clear()로 그 실행(또는 시즌)의 기록을 지운다.
+팀 하나의 페이지들은 한 번에(동시에) 받으므로 팀이 재시작할 수 있는 가장 작은 단위이다.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+JOURNAL_PATH = os.getenv('CRAWL_JOURNAL_PATH', 'crawl_journal.sqlite3')
+
+
+class CrawlJournal:
+    """run_id별로 끝난 작업 단위와 DB 저장이 끝난 시즌을 기록한다.
+
+    max_age(초)를 주면 그보다 오래된 기록은 이어받지 않는다(매일 실행에서 어제 데이터를 쓰지 않도록).
+    """
+
+    def __init__(self, run_id, path=JOURNAL_PATH, max_age=None):
+        self.run_id = run_id
+        self.path = path
+        self.resumed = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS journal_units (
+                run_id TEXT NOT NULL,
+                season TEXT NOT NULL,
+                category TEXT NOT NULL,
+                team TEXT NOT NULL,
+                frame BLOB,
+                done_at REAL NOT NULL,
+                PRIMARY KEY (run_id, season, category, team)
+            )
+            """)
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS journal_seasons (
+                run_id TEXT NOT NULL,
+                season TEXT NOT NULL,
+                loaded_at REAL NOT NULL,
+                PRIMARY KEY (run_id, season)
+            )
+            """)
+            if max_age is not None:
+                cutoff = time.time() - max_age
+                self._conn.execute("DELETE FROM journal_units WHERE run_id=? AND done_at < ?", (run_id, cutoff))
+                self._conn.execute("DELETE FROM journal_seasons WHERE run_id=? AND loaded_at < ?", (run_id, cutoff))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _unit_key(unit):
+        return (str(unit.season), unit.category, unit.team or '')
+
+    def pending_units(self):
+        """이어받을 수 있는 끝난 작업 단위 수."""
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM journal_units WHERE run_id=?", (self.run_id,)).fetchone()
+        return row[0]
+
+    def load(self, unit):
+        """unit이 이미 끝났으면 (True, DataFrame 또는 None), 아니면 (False, None)을 반환한다."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT frame FROM journal_units WHERE run_id=? AND season=? AND category=? AND team=?",
+                (self.run_id,) + self._unit_key(unit),
+            ).fetchone()
+        if row is None:
+            return False, None
+        self.resumed += 1
+        return True, pickle.loads(row[0]) if row[0] is not None else None
+
+    def record(self, unit, df):
+        """unit이 끝났음을 수집 결과(df, None 가능)와 함께 기록한다."""
+        frame = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL) if df is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO journal_units (run_id, season, category, team, frame, done_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.run_id,) + self._unit_key(unit) + (frame, time.time()),
+            )
+
+    def loaded_seasons(self):
+        """DB 저장까지 끝난 시즌 집합."""
+        with self._lock:
+            rows = self._conn.execute("SELECT season FROM journal_seasons WHERE run_id=?", (self.run_id,)).fetchall()
+        return {r[0] for r in rows}
+
+    def mark_loaded(self, season):
+        """season의 DB 저장이 끝났음을 기록하고, 그 시즌의 작업 단위 기록은 지운다."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO journal_seasons (run_id, season, loaded_at) VALUES (?, ?, ?)",
+                (self.run_id, str(season), time.time()),
+            )
+            self._conn.execute("DELETE FROM journal_units WHERE run_id=? AND season=?", (self.run_id, str(season)))
+
+    def clear(self):
+        """이 실행의 기록을 모두 지운다. 실행 전체가 끝났을 때 호출한다."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM journal_units WHERE run_id=?", (self.run_id,))
+            self._conn.execute("DELETE FROM journal_seasons WHERE run_id=?", (self.run_id,))
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,280 @@
+"""crawl_pool.py
+(season, category, team) 작업 단위를 N개의 독립 세션에 나눠 병렬로 수집하는 모듈이다.
+
+세션은 수집 모드에 따라 headless 크롬 드라이버(browser) 또는 PostbackSession(http)이며,
+워커 스레드마다 하나씩 열어 재사용한다. WarmSessions를 넘기면 세션을 닫지 않고 다음 실행에 다시 빌려준다. 모든 워커는 하나의 요청 예산(rate_limiter.RateLimiter)을 공유하고,
+결과는 완료 순서와 관계없이 작업 계획 순서(시즌 → 카테고리 → 드롭다운의 팀 순서)로 합친다.
+"""
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from metrics import span
+from stat_schema import apply_schema
+
+CrawlUnit = namedtuple('CrawlUnit', ['season', 'category', 'team'])
+
+PLAYER_CATEGORIES = ('hitters', 'pitchers')
+CATEGORIES = PLAYER_CATEGORIES + ('team_rankings',)
+# 작업 단위 하나가 실패했을 때 같은 세션으로 다시 시도하는 횟수 (503/연결 끊김 같은 일시적 오류용)
+UNIT_RETRIES = int(os.getenv('CRAWL_UNIT_RETRIES', '2'))
+
+
+class WarmSessions:
+    """여러 번의 수집 실행에 걸쳐 세션을 살려 두는 보관소. (crawl_daemon.py가 사용)
+
+    checkout(sleep_fn)은 보관 중인 세션을 refresh_fn(s, sleep_fn)으로 처음 상태로 되돌려 빌려주고(실패하면 닫고 새로 연다),
+    보관 중인 세션이 없으면 open_fn()으로 새로 연다. checkin(s)은 size개까지 보관하고 나머지는 close_fn(s)으로 닫는다.
+    refresh_fn이 보내는 요청도 sleep_fn(RateLimiter)의 예산을 쓴다. http_pool/browser_pool에 warm으로 넘기면 된다.
+    """
+
+    def __init__(self, open_fn, close_fn, refresh_fn=None, size=1):
+        self.open_fn = open_fn
+        self.close_fn = close_fn
+        self.refresh_fn = refresh_fn or (lambda s, sleep_fn: None)
+        self.size = max(0, int(size))
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._idle)
+
+    def warm(self, n=None):
+        """보관소가 n개(기본: size)가 될 때까지 세션을 미리 연다."""
+        n = self.size if n is None else min(int(n), self.size)
+        while len(self) < n:
+            session = self.open_fn()
+            with self._lock:
+                self._idle.append(session)
+
+    def checkout(self, sleep_fn=None):
+        sleep_fn = sleep_fn or (lambda: None)
+        while True:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            if session is None:
+                return self.open_fn()
+            try:
+                self.refresh_fn(session, sleep_fn)
+                return session
+            except Exception as e:
+                print(f"   ⚠️ 보관 중인 세션을 되살리지 못해 닫는다: {e}")
+                self._close(session)
+
+    def checkin(self, session):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(session)
+                return
+        self._close(session)
+
+    def _close(self, session):
+        try:
+            self.close_fn(session)
+        except Exception:
+            pass
+
+    def close(self):
+        """보관 중인 세션을 모두 닫는다."""
+        with self._lock:
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            self._close(session)
+
+
+class CrawlPool:
+    """작업 단위를 최대 workers개의 세션에 분배하는 실행기.
+
+    open_fn()      : 워커 스레드 하나가 사용할 세션을 연다
+    close_fn(s)    : 세션을 닫는다
+    teams_fn(s, season, sleep_fn)  : season의 팀 목록을 반환한다
+    unit_fn(s, unit, sleep_fn)     : CrawlUnit 하나를 수집해 DataFrame(또는 None)을 반환한다
+    state          : crawl_state.CrawlState를 넘기면 지난 저장 이후 바뀐 페이지의 행만 결과에 남긴다
+    journal        : crawl_journal.CrawlJournal을 넘기면 끝난 작업 단위를 기록하고, 이미 끝난 단위는 다시 수집하지 않는다
+    sink(unit, df) : 넘기면 작업 단위의 결과를 모으지 않고 워커 스레드에서 바로 넘긴다(pipeline.StreamWriter.put)
+    reset_fn(s, sleep_fn) : 실패한 작업 단위를 다시 시도하기 전에 세션을 처음 상태로 되돌린다
+    retries        : 작업 단위 하나를 다시 시도하는 최대 횟수. 끝내 실패한 단위는 self.failed에 남는다
+    """
+
+    def __init__(self, open_fn, close_fn, teams_fn, unit_fn, workers=1, sleep_fn=None, state=None, journal=None,
+                 sink=None, reset_fn=None, retries=UNIT_RETRIES):
+        self.open_fn = open_fn
+        self.close_fn = close_fn
+        self.teams_fn = teams_fn
+        self.unit_fn = unit_fn
+        self.workers = max(1, int(workers))
+        self.sleep_fn = sleep_fn or (lambda: None)
+        self.state = state
+        self.journal = journal
+        self.sink = sink
+        self.reset_fn = reset_fn or (lambda s, sleep_fn: None)
+        self.retries = max(0, int(retries))
+        self.errors = []
+        self.failed = []
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self.open_fn()
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _teams(self, season):
+        return self.teams_fn(self._session(), season, self.sleep_fn)
+
+    def _run_unit(self, unit):
+        done, df = self.journal.load(unit) if self.journal is not None else (False, None)
+        if not done:
+            # 추출 직후 열 타입을 정해 이후 단계(저널, digest, 저장)는 작은 숫자/category 열을 다룬다
+            df = self._collect(unit)
+            if self.journal is not None:
+                self.journal.record(unit, df)
+        if df is not None and len(df) > 0 and self.state is not None:
+            df = self.state.filter_changed(unit, df)
+        if df is not None and len(df) > 0 and self.sink is not None:
+            self.sink(unit, df)
+            return None
+        return df
+
+    def _collect(self, unit):
+        session = self._session()
+        for attempt in range(self.retries + 1):
+            try:
+                if attempt:
+                    self.reset_fn(session, self.sleep_fn)
+                with span('collect') as sp:
+                    df = apply_schema(self.unit_fn(session, unit, self.sleep_fn), unit.category)
+                    sp.add(rows=len(df) if df is not None else 0)
+                return df
+            except Exception as e:
+                if attempt >= self.retries:
+                    raise
+                # 실패한 왕복은 이미 sleep_fn(RateLimiter)에 보고되어 요청 속도가 줄었으므로 그 속도로 다시 요청한다
+                print(f"   🔁 수집 재시도 {attempt + 1}/{self.retries} {unit}: {e}")
+
+    def plan(self, seasons, categories=CATEGORIES):
+        """시즌/카테고리별 작업 단위 목록을 만든다. 팀 목록은 시즌마다 한 번만 조회한다."""
+        units = []
+        for season in seasons:
+            teams = None
+            for category in categories:
+                if category not in PLAYER_CATEGORIES:
+                    units.append(CrawlUnit(season, category, None))
+                    continue
+                if teams is None:
+                    teams = self._executor.submit(self._teams, season).result()
+                units.extend(CrawlUnit(season, category, team) for team in teams)
+        return units
+
+    def run(self, units):
+        """units를 병렬로 수집하여 {category: DataFrame}을 반환한다.
+
+        retries번 다시 시도해도 실패한 작업 단위는 self.errors에 (unit, exception), self.failed에 unit으로 남기고
+        결과에서만 빠진다. 같은 카테고리의 나머지 단위는 그대로 반환한다.
+        sink가 있으면 결과는 이미 sink로 넘어갔으므로 DataFrame은 비어 있다.
+        """
+        futures = [self._executor.submit(self._run_unit, unit) for unit in units]
+        frames = {category: [] for category in dict.fromkeys(u.category for u in units)}
+        for unit, future in zip(units, futures):
+            try:
+                df = future.result()
+            except Exception as e:
+                print(f"   ⚠️ 수집 실패 {unit}: {e}")
+                self.errors.append((unit, e))
+                self.failed.append(unit)
+                continue
+            if df is not None and len(df) > 0:
+                frames[unit.category].append(df)
+        return {category: concat_frames(dfs, category) for category, dfs in frames.items()}
+
+    def crawl(self, seasons, categories=CATEGORIES):
+        """plan()과 run()을 차례로 수행한다."""
+        return self.run(self.plan(seasons, categories))
+
+    def close(self):
+        """워커 스레드를 정리하고 열린 세션을 모두 닫는다."""
+        self._executor.shutdown(wait=True)
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            try:
+                self.close_fn(session)
+            except Exception:
+                pass
+
+
+def concat_frames(dfs, category):
+    """작업 단위별 DataFrame을 하나로 합친다. 없으면 빈 DataFrame."""
+    # 팀마다 category 값이 달라 concat하면 object가 되므로 다시 적용한다
+    return apply_schema(pd.concat(dfs, ignore_index=True), category) if dfs else pd.DataFrame()
+
+
+def crawl_categories(seasons, categories, modes, workers, sleep_fn, open_browser=None, state=None, journal=None,
+                     sink=None, warm=None):
+    """modes('http'/'browser') 순서대로 세션 풀을 만들어 seasons의 categories를 수집한다.
+
+    앞 모드에서 끝내 실패한 작업 단위만 다음 모드로 다시 수집한다(작업 계획을 못 세웠으면 전체).
+    반환값은 {category: DataFrame}이며, 모든 모드에서 실패한 단위가 남은 카테고리는 빠진다.
+    warm({mode: WarmSessions})을 넘기면 그 모드의 세션은 보관소에서 빌리고 돌려준다.
+    """
+    warm = warm or {}
+    parts = {}
+    pending = None
+    for mode in modes:
+        if pending is not None and not pending:
+            break
+        if mode == 'http':
+            pool = http_pool(workers, sleep_fn, state, journal, sink, warm.get(mode))
+        else:
+            pool = browser_pool(open_browser, workers, sleep_fn, state, journal, sink, warm.get(mode))
+        try:
+            with pool:
+                units = pool.plan(seasons, categories) if pending is None else pending
+                for category, df in pool.run(units).items():
+                    parts.setdefault(category, []).append(df)
+                pending = pool.failed
+        except Exception as e:
+            print(f"   ⚠️ {mode} 모드 수집 실패: {e}")
+        if pending and mode == 'http' and 'browser' in modes:
+            print(f"   🔁 브라우저(Selenium) 모드로 실패한 작업 단위 {len(pending)}개를 다시 수집한다")
+        elif pending is None and mode == 'http' and 'browser' in modes:
+            print("   🔁 브라우저(Selenium) 모드로 다시 수집한다")
+    failed = set(categories) if pending is None else {unit.category for unit in pending}
+    return {category: concat_frames(parts[category], category)
+            for category in categories if category in parts and category not in failed}
+
+
+def http_pool(workers=1, sleep_fn=None, state=None, journal=None, sink=None, warm=None):
+    """PostbackSession 세션을 사용하는 CrawlPool을 만든다. warm(WarmSessions)이 있으면 세션을 빌려 쓴다."""
+    from http_fetcher import PostbackSession, list_teams_http, collect_unit_http, reset_session
+
+    open_fn, close_fn = ((lambda: warm.checkout(sleep_fn)), warm.checkin) if warm is not None else \
+        (PostbackSession, lambda s: None)
+    return CrawlPool(open_fn, close_fn, list_teams_http, collect_unit_http, workers, sleep_fn,
+                     state, journal, sink, reset_session)
+
+
+def browser_pool(open_fn, workers=1, sleep_fn=None, state=None, journal=None, sink=None, warm=None):
+    """open_fn()이 여는 크롬 드라이버 세션을 사용하는 CrawlPool을 만든다. warm(WarmSessions)이 있으면 드라이버를 빌려 쓴다."""
+    from crawler import list_teams, collect_unit, reset_driver
+
+    open_fn, close_fn = ((lambda: warm.checkout(sleep_fn)), warm.checkin) if warm is not None else \
+        (open_fn, lambda d: d.quit())
+    return CrawlPool(open_fn, close_fn, list_teams, collect_unit, workers, sleep_fn,
+                     state, journal, sink, reset_driver)
@@ -0,0 +1,147 @@
+"""crawl_state.py
+수집 단위(category, season, team, page)마다 마지막으로 DB에 저장한 기록 표의 digest를 SQLite에 보관하는 모듈이다.
+
+다음 실행에서 같은 페이지의 표가 그대로면 그 행은 DB 변환/저장을 건너뛴다.
+digest는 DB 저장이 끝난 카테고리만 commit()으로 기록하므로, 저장에 실패하면 다음 실행에서 다시 저장한다.
+경기가 없는 날을 위해 TeamRankDaily 순위표 하나로 "바뀐 것이 있는지"를 먼저 확인하는 probe도 제공한다.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+STATE_PATH = os.getenv('CRAWL_STATE_PATH', 'crawl_state.sqlite3')
+# 수집 함수가 DataFrame.attrs에 남기는 페이지별 행 수 (페이지 단위 digest에 사용)
+PAGE_ROWS_ATTR = 'page_rows'
+PROBE_CATEGORY = 'probe'
+
+
+def frame_digest(df):
+    """DataFrame의 열 이름과 값으로 digest(sha1 hex)를 만든다."""
+    h = hashlib.sha1('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def page_slices(df):
+    """df를 수집한 페이지 단위로 나눠 (page, 행 slice)를 차례로 반환한다. 페이지 정보가 없으면 전체가 1페이지."""
+    rows = df.attrs.get(PAGE_ROWS_ATTR) or [len(df)]
+    if sum(rows) != len(df):
+        rows = [len(df)]
+    start = 0
+    for page, n in enumerate(rows, start=1):
+        yield page, slice(start, start + n)
+        start += n
+
+
+class CrawlState:
+    """(category, season, team, page) -> digest 저장소.
+
+    filter_changed()로 바뀐 페이지의 행만 남기고 새 digest는 카테고리별로 보류해 두었다가,
+    DB 저장이 끝나면 commit(categories)로 기록한다.
+    force=True(--force)면 지난 digest와 비교하지 않고 모든 페이지를 남기되, digest는 똑같이 보류해 두어
+    강제로 저장한 값과 저장된 digest가 어긋나지 않게 한다.
+    """
+
+    def __init__(self, path=STATE_PATH, force=False):
+        self.path = path
+        self.force = force
+        self.skipped_pages = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._pending = {}
+        with self._conn:
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_digest (
+                category TEXT NOT NULL,
+                season TEXT NOT NULL,
+                team TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (category, season, team, page)
+            )
+            """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def _key(category, season, team, page):
+        return (category, str(season), team or '', int(page))
+
+    def digest(self, category, season, team, page):
+        """저장된 digest를 반환한다. 없으면 None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest FROM crawl_digest WHERE category=? AND season=? AND team=? AND page=?",
+                self._key(category, season, team, page),
+            ).fetchone()
+        return row[0] if row else None
+
+    def stage(self, category, season, team, page, digest):
+        """digest를 기록 대기열에 올린다. commit(category)가 호출되어야 저장된다."""
+        with self._lock:
+            self._pending.setdefault(category, []).append(self._key(category, season, team, page) + (digest,))
+
+    def filter_changed(self, unit, df):
+        """unit(crawl_pool.CrawlUnit)의 df에서 지난 저장 이후 digest가 바뀐 페이지의 행만 남겨 반환한다.
+
+        모든 페이지가 그대로면 None을 반환한다. force면 비교 없이 모든 페이지의 digest를 보류하고 df를 그대로 반환한다.
+        """
+        changed = []
+        pages = 0
+        for page, rows in page_slices(df):
+            pages += 1
+            digest = frame_digest(df.iloc[rows])
+            if not self.force and self.digest(unit.category, unit.season, unit.team, page) == digest:
+                self.skipped_pages += 1
+                continue
+            self.stage(unit.category, unit.season, unit.team, page, digest)
+            changed.append(df.iloc[rows])
+        if not changed:
+            return None
+        if len(changed) == pages:
+            return df
+        return pd.concat(changed, ignore_index=True)
+
+    def commit(self, categories):
+        """categories의 보류 중인 digest를 저장한다."""
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock, self._conn:
+            for category in categories:
+                rows = self._pending.pop(category, [])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO crawl_digest (category, season, team, page, digest, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [row + (now,) for row in rows],
+                )
+
+    def discard(self):
+        """보류 중인 digest를 모두 버린다."""
+        with self._lock:
+            self._pending.clear()
+
+    def probe_rankings(self, season, fetch_fn):
+        """fetch_fn(season)으로 TeamRankDaily 순위표를 한 번 받아 지난 실행 이후 경기 결과가 바뀌었는지 확인한다.
+
+        순위표는 현재 시즌만 보여 주므로 현재 시즌에만 쓴다(main.fetch_rankings).
+        바뀌었으면(또는 처음이면) 새 digest를 PROBE_CATEGORY로 보류하고 True를 반환한다.
+        """
+        df = fetch_fn(season)
+        if df is None or len(df) == 0:
+            return True
+        digest = frame_digest(df)
+        if self.digest(PROBE_CATEGORY, season, None, 0) == digest:
+            return False
+        self.stage(PROBE_CATEGORY, season, None, 0, digest)
+        return True
+
+    def close(self):
+        self._conn.close()
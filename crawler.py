@@ -1,139 +1,248 @@
 """crawler.py
 KBO 웹사이트에서 현재 시즌의 타자 기록을 수집하는 함수들을 모아둔 모듈이다.
 함수 반환값은 pandas.DataFrame 형태이다.
+
+페이지 URL, 컨트롤 ID와 표 파싱 함수는 HTTP 수집 모드(http_fetcher.py)와 공유하며 kbo_site.py에 있다.
 """
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select, WebDriverWait
-from bs4 import BeautifulSoup
+from selenium.webdriver.support import expected_conditions as EC
 import pandas as pd
-import time
+import urllib.parse
+
+from crawl_state import PAGE_ROWS_ATTR
+from metrics import span
+from kbo_site import (
+    HITTER_URL,
+    PITCHER_URL,
+    TEAM_RANK_URL,
+    SEASON_SELECT_ID,
+    TEAM_SELECT_ID,
+    RECORD_RESULT_SELECTOR,
+    RECORD_TABLE_SELECTOR,
+    CATEGORY_URLS,
+    rankings_table_from_html,
+    round_trip,
+)
+from table_extractor import parse_document, table_to_frame, pager_state
+
+# postback 후 기록 표가 갱신되기를 기다리는 최대 시간(초)
+POSTBACK_TIMEOUT = 10
+
+# 기록 표의 텍스트와 데이터 행 수를 한 번에 읽는 스크립트(표가 없으면 null)
+_TABLE_STATE_JS = """
+var t = document.querySelector(arguments[0]);
+if (!t) { return null; }
+var rows = 0;
+t.querySelectorAll('tbody tr').forEach(function (tr) { if (tr.cells.length > 1) { rows++; } });
+return [t.innerText, rows];
+"""
+
+
+def _outer_html(driver, selector):
+    with span('page_source') as sp:
+        html = driver.execute_script(
+            "var t = document.querySelector(arguments[0]); return t ? t.outerHTML : null;", selector
+        )
+        sp.add(nbytes=len(html) if html else 0)
+    return html
+
+
+def navigate(driver, url):
+    """driver로 url을 연다."""
+    with span('navigate'):
+        driver.get(url)
 
 
 def create_table_from_page(driver):
-    html = driver.page_source
-    soup = BeautifulSoup(html, 'html.parser')
-    table = soup.select_one('#cphContents_cphContents_cphContents_udpContent > div.record_result > table')
-    df = pd.read_html(str(table), flavor='html5lib')[0]
-    return df
+    # page_source 전체 대신 기록 표의 outerHTML만 받아서 파싱한다
+    table_html = _outer_html(driver, RECORD_TABLE_SELECTOR)
+    if table_html is None:
+        return None
+    return table_to_frame(parse_document(table_html))
+
+
+def read_record_result(driver):
+    """기록 표와 페이저를 담은 div.record_result를 한 번에 읽어 (DataFrame 또는 None, PagerState)를 반환한다."""
+    result_html = _outer_html(driver, RECORD_RESULT_SELECTOR)
+    if result_html is None:
+        return None, pager_state('<div></div>')
+    fragment = parse_document(result_html)
+    tables = fragment.xpath('./table')
+    df = table_to_frame(tables[0]) if tables else None
+    return df, pager_state(fragment)
+
+
+def current_record_table(driver):
+    """현재 기록 표 WebElement를 반환한다. 없으면 None (implicit wait 없이 바로 반환)."""
+    return driver.execute_script("return document.querySelector(arguments[0]);", RECORD_TABLE_SELECTOR)
+
+
+def wait_postback(driver, old_table, expect_text=None, timeout=POSTBACK_TIMEOUT):
+    """UpdatePanel postback으로 기록 표가 새로 그려질 때까지 기다린다.
+
+    이전 표(old_table)가 stale 상태가 되고 새 표가 나타나야 하며, expect_text(예: 팀 이름)가 주어지면
+    새 표에 그 글자가 보여야 완료로 본다(기록 행이 없는 표는 예외). timeout 안에 끝나지 않으면 TimeoutException.
+    """
+    def refreshed(d):
+        if old_table is not None and not EC.staleness_of(old_table)(d):
+            return False
+        state = d.execute_script(_TABLE_STATE_JS, RECORD_TABLE_SELECTOR)
+        if state is None:
+            return False
+        text, rows = state
+        return expect_text is None or rows == 0 or expect_text in text
+
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+        refreshed, message=f"postback 후 기록 표가 갱신되지 않음 (expect={expect_text!r})"
+    )
+
+
+def postback(driver, action, expect_text=None):
+    """action()(드롭다운 선택, 페이저 클릭 등)을 실행하고 기록 표가 갱신될 때까지 기다린다."""
+    with span('postback'):
+        old_table = current_record_table(driver)
+        action()
+        wait_postback(driver, old_table, expect_text)
 
 
 def get_team_list(driver, sleep_fn):
-    sleep_fn()
-    combobox = driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ddlTeam_ddlTeam')
-    sleep_fn()
+    # 로컬 DOM 조회이므로 요청 예산을 쓰지 않는다(sleep_fn은 호환을 위해 유지)
+    combobox = driver.find_element(By.CSS_SELECTOR, '#' + TEAM_SELECT_ID)
     options = combobox.find_elements(By.TAG_NAME, 'option')[1:]
     teams = [opt.text for opt in options]
     return teams
 
 
-def collect_current_season(driver, season, sleep_fn):
-    """현재 시즌(season 문자열, 예: '2025')의 모든 팀 타자 데이터를 수집하여 하나의 DataFrame으로 반환한다."""
-    # 시즌 선택
-    season_combo = driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ddlSeason_ddlSeason')
-    season_combo = Select(season_combo)
-    season_combo.select_by_value(season)
-    teams = get_team_list(driver, sleep_fn)
+def select_season(driver, season, sleep_fn):
+    """시즌 드롭다운에서 season을 선택한다. 이미 선택되어 있으면 postback을 보내지 않는다."""
+    season_combo = Select(driver.find_element(By.CSS_SELECTOR, '#' + SEASON_SELECT_ID))
+    if season_combo.first_selected_option.get_attribute('value') == season:
+        return
+
+    round_trip(sleep_fn, lambda: postback(driver, lambda: season_combo.select_by_value(season)))
+
+
+def click_pager(driver, link_id):
+    """페이저 링크(link_id)를 클릭하고 postback을 기다린다."""
+    button = driver.find_element(By.ID, link_id)
+    postback(driver, button.click)
+
+
+def collect_team(driver, season, team, sleep_fn):
+    """팀을 선택하여 해당 팀 선수 기록을 DataFrame으로 반환한다. 기록 표가 없으면 None."""
+    combobox = driver.find_element(By.CSS_SELECTOR, '#' + TEAM_SELECT_ID)
+    team_combo = Select(combobox)
+
+    # 새 표에 팀 이름이 보일 때까지 기다려 이전 팀의 행을 이 팀으로 기록하는 경합을 막는다
+    # (이미 선택된 팀이면 postback이 일어나지 않으므로 기다리지 않는다)
+    if team_combo.first_selected_option.text != team:
+        round_trip(sleep_fn, lambda: postback(driver, lambda: team_combo.select_by_visible_text(team), expect_text=team))
+    df, state = read_record_result(driver)
+    if df is None:
+        return None
+    first_link = state.links.get(1) or state.first_id
+    if state.current != 1 and first_link:
+        # 팀을 바꿔도 페이지 번호가 유지된 경우에만 1페이지로 돌아간다
+        round_trip(sleep_fn, lambda: click_pager(driver, first_link))
+        df, state = read_record_result(driver)
+
+    # 페이저의 모든 페이지를 차례로 수집 (다음 팀 선택 시 1페이지로 돌아가므로 원복 클릭은 하지 않음)
+    dfs = [df]
+    seen = {state.current}
+    while True:
+        todo = sorted(p for p in state.links if p not in seen)
+        if todo:
+            seen.add(todo[0])
+            round_trip(sleep_fn, lambda: click_pager(driver, state.links[todo[0]]))
+            page_df, state = read_record_result(driver)
+        elif state.next_id:
+            # 다음 페이저 블록으로 넘어감
+            round_trip(sleep_fn, lambda: click_pager(driver, state.next_id))
+            page_df, state = read_record_result(driver)
+            if state.current in seen:
+                break
+            seen.add(state.current)
+        else:
+            break
+        if page_df is not None:
+            dfs.append(page_df)
+    df = pd.concat(dfs, ignore_index=True)
+
+    df['team'] = team
+    df['year'] = int(season)
+    # 페이지별 행 수 (crawl_state의 페이지 단위 digest에 사용)
+    df.attrs[PAGE_ROWS_ATTR] = [len(d) for d in dfs]
+    return df
+
 
+def collect_teams(driver, season, teams, sleep_fn):
+    """teams 순서대로 팀별 기록을 수집하여 하나의 DataFrame으로 반환한다."""
     dfs = []
     for team in teams:
-        sleep_fn()
-        combobox = driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ddlTeam_ddlTeam')
-        team_combo = Select(combobox)
-        team_combo.select_by_visible_text(team)
-        sleep_fn()
-        df = create_table_from_page(driver)
-        # 페이징이 있으면 2페이지 합치기
-        page_links = driver.find_elements(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_udpContent > div.record_result > div > a')
-        if len(page_links) > 1:
-            driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ucPager_btnNo2').click()
-            sleep_fn()
-            df2 = create_table_from_page(driver)
-            # 페이지 원복
-            driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ucPager_btnNo1').click()
-            df = pd.concat([df, df2], ignore_index=True)
-
-        df['team'] = team
-        df['year'] = int(season)
-        dfs.append(df)
+        df = collect_team(driver, season, team, sleep_fn)
+        if df is not None:
+            dfs.append(df)
 
     if dfs:
         return pd.concat(dfs, ignore_index=True)
     return pd.DataFrame()
 
 
+def collect_current_season(driver, season, sleep_fn):
+    """현재 시즌(season 문자열, 예: '2025')의 모든 팀 타자 데이터를 수집하여 하나의 DataFrame으로 반환한다."""
+    # 시즌 선택
+    select_season(driver, season, sleep_fn)
+    teams = get_team_list(driver, sleep_fn)
+    return collect_teams(driver, season, teams, sleep_fn)
+
+
 def collect_pitchers_season(driver, season, sleep_fn):
     """현재 시즌의 투수 기록을 수집하여 DataFrame으로 반환한다."""
     # 페이지로 이동(투수 기본 기록 페이지로 추정 경로)
-    target = 'https://www.koreabaseball.com/Record/Player/PitcherBasic/Basic1.aspx'
-    driver.get(target)
-    sleep_fn()
+    round_trip(sleep_fn, lambda: navigate(driver, PITCHER_URL))
 
     # 시즌 선택
-    season_combo = driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ddlSeason_ddlSeason')
-    season_combo = Select(season_combo)
-    season_combo.select_by_value(season)
-    sleep_fn()
-
+    select_season(driver, season, sleep_fn)
     teams = get_team_list(driver, sleep_fn)
-    dfs = []
-    for team in teams:
-        sleep_fn()
-        combobox = driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ddlTeam_ddlTeam')
-        team_combo = Select(combobox)
-        team_combo.select_by_visible_text(team)
-        sleep_fn()
-        html = driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
-        table = soup.select_one('#cphContents_cphContents_cphContents_udpContent > div.record_result > table')
-        if table is None:
-            continue
-        df = pd.read_html(str(table), flavor='html5lib')[0]
-        # 페이징 처리(간단)
-        page_links = driver.find_elements(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_udpContent > div.record_result > div > a')
-        if len(page_links) > 1:
-            driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ucPager_btnNo2').click()
-            sleep_fn()
-            df2 = pd.read_html(str(BeautifulSoup(driver.page_source, 'html.parser').select_one('#cphContents_cphContents_cphContents_udpContent > div.record_result > table')), flavor='html5lib')[0]
-            driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ucPager_btnNo1').click()
-            df = pd.concat([df, df2], ignore_index=True)
-
-        df['team'] = team
-        df['year'] = int(season)
-        dfs.append(df)
-
-    if dfs:
-        return pd.concat(dfs, ignore_index=True)
-    return pd.DataFrame()
+    return collect_teams(driver, season, teams, sleep_fn)
 
 
 def collect_team_rankings_season(driver, season, sleep_fn):
     """현재 시즌 팀 순위를 수집하여 DataFrame으로 반환한다."""
     # 팀 순위(일별) 페이지로 이동 — KBO 사이트의 최신 경로
-    target = 'https://www.koreabaseball.com/Record/TeamRank/TeamRankDaily.aspx'
-    driver.get(target)
-    sleep_fn()
+    round_trip(sleep_fn, lambda: navigate(driver, TEAM_RANK_URL))
 
     # 페이지에서 순위 테이블 찾기
-    html = driver.page_source
-    soup = BeautifulSoup(html, 'html.parser')
-    # 여러 가능한 선택자를 시도해서 테이블을 찾음
-    table = soup.select_one('#cphContents_cphContents_cphContents_udpContent > div.rank_result > table')
-    if table is None:
-        table = soup.select_one('table.tData')
-    if table is None:
-        # fallback: 페이지의 첫 번째 테이블
-        table = soup.find('table')
-    if table is None:
-        return pd.DataFrame()
-
-    df = pd.read_html(str(table), flavor='html5lib')[0]
-    # 표 헤더 차이에 대비: '팀명' -> '팀' 등
-    if '팀명' in df.columns and '팀' not in df.columns:
-        df = df.rename(columns={'팀명': '팀'})
-    if '게임차' in df.columns and 'GB' not in df.columns:
-        # leave both names; db layer accepts '게임차' too
-        pass
-    # 표에 연도 컬럼이 없다면 추가
-    df['year'] = int(season)
-    return df
+    return rankings_table_from_html(driver.page_source, season)
+
+
+def reset_driver(driver, sleep_fn):
+    """driver를 타자 기록 첫 페이지로 되돌린다. 이 요청도 sleep_fn(RateLimiter)의 예산을 쓴다.
+
+    지난 작업의 시즌/팀 선택이 남아 있으면 같은 선택을 건너뛰고 예전 표를 읽으므로 처음 페이지에서 다시 시작한다.
+    """
+    round_trip(sleep_fn, lambda: navigate(driver, HITTER_URL))
+
+
+def open_category(driver, category, season, sleep_fn):
+    """driver가 category 기록 페이지의 season을 보고 있도록 한다. 이미 그렇다면 아무 요청도 보내지 않는다."""
+    url = CATEGORY_URLS[category]
+    # postback 후에도 주소는 그대로이므로 경로만 비교한다
+    if urllib.parse.urlparse(driver.current_url).path.lower() != urllib.parse.urlparse(url).path.lower():
+        round_trip(sleep_fn, lambda: navigate(driver, url))
+    select_season(driver, season, sleep_fn)
+
+
+def list_teams(driver, season, sleep_fn):
+    """season의 팀 이름 목록을 반환한다(타자 기록 페이지 드롭다운 기준)."""
+    open_category(driver, 'hitters', season, sleep_fn)
+    return get_team_list(driver, sleep_fn)
+
+
+def collect_unit(driver, unit, sleep_fn):
+    """crawl_pool.CrawlUnit 하나를 수집한다. team_rankings는 team 없이 시즌 단위로 수집한다."""
+    if unit.category == 'team_rankings':
+        return collect_team_rankings_season(driver, unit.season, sleep_fn)
+    open_category(driver, unit.category, unit.season, sleep_fn)
+    return collect_team(driver, unit.season, unit.team, sleep_fn)
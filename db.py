@@ -10,10 +10,16 @@
 
 이 모듈은 psycopg2를 사용한다.
 """
+import io
 import os
 import os.path
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from metrics import span
+
 # 현재 디렉토리의 절대 경로
 current_dir = os.path.dirname(os.path.abspath(__file__))
 # .env 파일 절대 경로
@@ -21,6 +27,7 @@ env_path = os.path.join(current_dir, '.env')
 load_dotenv(env_path)
 try:
     import psycopg2
+    import psycopg2.pool
     from psycopg2.extras import execute_values
 except Exception as e:
     psycopg2 = None
@@ -53,6 +60,13 @@ def _parse_fractional_innings(s: str) -> float:
         return None
 
 
+def parse_innings_column(series):
+    """stat_schema.parse_innings_column을 불러와 (ip, outs)를 반환한다."""
+    from stat_schema import parse_innings_column as parse
+
+    return parse(series)
+
+
 def _safe_number(val, target_type: str):
     """Convert val to appropriate Python type or None.
 
@@ -79,26 +93,131 @@ def _safe_number(val, target_type: str):
         return None
 
 
+def _conn_params():
+    return dict(
+        host=os.getenv('PGHOST', 'localhost'),
+        port=int(os.getenv('PGPORT', 5432)),
+        user=os.getenv('PGUSER', 'postgres'),
+        password=os.getenv('PGPASSWORD', ''),
+        dbname=os.getenv('PGDATABASE', 'kbo'),
+    )
+
 
 def get_conn():
     """환경 변수로 Postgres 연결을 생성하여 반환한다."""
-    host = os.getenv('PGHOST', 'localhost')
-    port = int(os.getenv('PGPORT', 5432))
-    user = os.getenv('PGUSER', 'postgres')
-    password = os.getenv('PGPASSWORD', '')
-    dbname = os.getenv('PGDATABASE', 'kbo')
-
-    conn = psycopg2.connect(host=host, port=port, user=user, password=password, dbname=dbname)
+    with span('connect'):
+        conn = psycopg2.connect(**_conn_params())
     return conn
 
 
+# 프로세스 전체가 공유하는 연결 풀 (RDS/TLS 연결 비용을 한 번만 치른다)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """공유 ThreadedConnectionPool을 반환한다. 처음 호출할 때 만든다. 최대 연결 수는 PGPOOL_MAX(기본 4)."""
+    global _pool
+    if psycopg2 is None:
+        raise RuntimeError("psycopg2를 사용할 수 없음. 'psycopg2-binary'를 설치할 것")
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            maxconn = max(1, int(os.getenv('PGPOOL_MAX', '4')))
+            with span('connect'):
+                _pool = psycopg2.pool.ThreadedConnectionPool(1, maxconn, **_conn_params())
+        return _pool
+
+
+def close_pool():
+    """공유 연결 풀의 연결을 모두 닫는다."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+        _pool = None
+
+
+@contextmanager
+def pooled_conn():
+    """풀에서 연결을 빌려주고 with 블록이 끝나면 돌려받는다. 커밋되지 않은 작업은 롤백된다."""
+    pool = get_pool()
+    with span('connect'):
+        conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except psycopg2.InterfaceError:
+        broken = True
+        raise
+    finally:
+        try:
+            if not conn.closed:
+                conn.rollback()
+        except Exception:
+            broken = True
+        pool.putconn(conn, close=broken or bool(conn.closed))
+
+
+class LoadSession:
+    """한 번의 실행에서 모든 카테고리를 하나의 연결, 하나의 트랜잭션으로 저장한다.
+
+    write()는 카테고리마다 savepoint를 두어 실패한 카테고리만 되돌리고,
+    load_session()이 끝날 때 한 번에 커밋하므로 읽는 쪽은 카테고리가 섞인 중간 상태를 보지 않는다.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.errors = {}
+
+    def write(self, category, df):
+        """WRITERS[category]로 df를 저장하고 결과를 반환한다. 실패하면 savepoint로 되돌리고 예외를 다시 던진다."""
+        writer = WRITERS[category]
+        with self.conn.cursor() as cur:
+            cur.execute(f"SAVEPOINT load_{category}")
+        try:
+            with span('write', rows=len(df)):
+                result = writer(df, conn=self.conn)
+        except Exception as e:
+            with self.conn.cursor() as cur:
+                cur.execute(f"ROLLBACK TO SAVEPOINT load_{category}")
+            self.errors[category] = e
+            raise
+        with self.conn.cursor() as cur:
+            cur.execute(f"RELEASE SAVEPOINT load_{category}")
+        return result
+
+
+@contextmanager
+def load_session():
+    """풀에서 연결 하나를 빌려 LoadSession을 열고, 블록이 정상 종료되면 커밋한다(예외가 나면 롤백)."""
+    with pooled_conn() as conn:
+        session = LoadSession(conn)
+        yield session
+        conn.commit()
+
+
 def create_tables(conn):
-    """필요한 테이블을 생성한다. id 대신 (player_name, team, year)을 기본키로 사용한다."""
+    """필요한 테이블을 생성한다.
+
+    선수 기록(hitters/pitchers)은 KBO 선수 id를 키로 (player_id, year, team)을 기본키로 쓰고,
+    선수 이름/마지막 팀/활동 시즌은 players 테이블에 한 행씩 둔다(같은 이름의 선수, 시즌 중 트레이드 구분).
+    """
     with conn.cursor() as cur:
+        # players: 선수 상세 페이지 링크의 playerId -> 이름, 마지막으로 기록된 시즌의 팀
         cur.execute("""
-        CREATE TABLE IF NOT EXISTS hitters (
+        CREATE TABLE IF NOT EXISTS players (
+            player_id INTEGER PRIMARY KEY,
             player_name TEXT NOT NULL,
             team TEXT,
+            first_year INTEGER,
+            last_year INTEGER
+        );
+        """)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS hitters (
+            player_id INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            team TEXT NOT NULL,
             avg REAL,
             g INTEGER,
             pa INTEGER,
@@ -113,14 +232,15 @@ def create_tables(conn):
             sac INTEGER,
             sf INTEGER,
             year INTEGER NOT NULL,
-            PRIMARY KEY (player_name, team, year)
+            PRIMARY KEY (player_id, year, team)
         );
         """)
         # pitchers 테이블
         cur.execute("""
         CREATE TABLE IF NOT EXISTS pitchers (
+            player_id INTEGER NOT NULL,
             player_name TEXT NOT NULL,
-            team TEXT,
+            team TEXT NOT NULL,
             era REAL,
             ip REAL,
             w INTEGER,
@@ -130,8 +250,9 @@ def create_tables(conn):
             bb INTEGER,
             h INTEGER,
             hr INTEGER,
+            ip_outs INTEGER,
             year INTEGER NOT NULL,
-            PRIMARY KEY (player_name, team, year)
+            PRIMARY KEY (player_id, year, team)
         );
         """)
 
@@ -161,10 +282,40 @@ def create_tables(conn):
         cur.execute("ALTER TABLE team_rankings ADD COLUMN IF NOT EXISTS last10 TEXT;")
         cur.execute("ALTER TABLE team_rankings ADD COLUMN IF NOT EXISTS home_record TEXT;")
         cur.execute("ALTER TABLE team_rankings ADD COLUMN IF NOT EXISTS away_record TEXT;")
-        # 미래 확장: players, teams 등의 메타 테이블을 추가가능.
+        # 이닝의 정확한 아웃 카운트 (ip REAL의 1/3 반올림 오차 없이 ERA/WHIP 계산용)
+        cur.execute("ALTER TABLE pitchers ADD COLUMN IF NOT EXISTS ip_outs INTEGER;")
+        for table in PLAYER_TABLES:
+            _migrate_player_key(cur, table)
         conn.commit()
 
 
+# player_id 키를 쓰는 선수 기록 테이블과 그 키
+PLAYER_TABLES = ('hitters', 'pitchers')
+PLAYER_KEY = ('player_id', 'year', 'team')
+
+
+def _migrate_player_key(cur, table):
+    """(player_name, team, year) 기본키로 만들어진 예전 테이블을 player_id 키로 바꾼다.
+
+    예전 행에는 player_id가 없어(NULL) 기본키를 걸 수 없으므로 기본키 대신 같은 열의 유니크 인덱스를 둔다.
+    예전 행은 같은 시즌/팀/이름을 player_id와 함께 다시 저장할 때 지운다(_delete_legacy_rows).
+    """
+    cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS player_id INTEGER;")
+    cur.execute(
+        "SELECT a.attname FROM pg_index i "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+        "WHERE i.indrelid = %s::regclass AND i.indisprimary",
+        (table,),
+    )
+    if 'player_id' not in {name for (name,) in cur.fetchall()}:
+        cur.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_pkey;")
+        cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_player_key ON {table} ({', '.join(PLAYER_KEY)});")
+    # player_id가 없는 예전 행만 담는 부분 인덱스 (새로 만든 테이블에서는 비어 있다)
+    cur.execute(
+        f"CREATE INDEX IF NOT EXISTS {table}_legacy_rows ON {table} (player_name, team, year) WHERE player_id IS NULL;"
+    )
+
+
 def count_hitters_by_year(conn, year):
     """해당 연도에 저장된 hitters 레코드 수를 반환한다."""
     with conn.cursor() as cur:
@@ -189,221 +340,394 @@ def count_team_rankings_by_year(conn, year):
         return r[0] if r else 0
 
 
-def df_to_hitters_table(df):
-    """DataFrame을 hitters 테이블에 upsert 형태로 저장한다.
-    기대하는 컬럼: 한글 컬럼명(예: '선수명','팀명','HR' 등)과 'year' 열이 포함되어야 한다.
+# DataFrame 컬럼(한글 헤더) -> DB 컬럼 매핑
+HITTERS_COLMAP = {
+    'player_id': 'player_id',
+    '선수명': 'player_name',
+    '팀명': 'team',
+    'AVG': 'avg',
+    'G': 'g',
+    'PA': 'pa',
+    'AB': 'ab',
+    'R': 'r',
+    'H': 'h',
+    '2B': 'doubles',
+    '3B': 'triples',
+    'HR': 'hr',
+    'TB': 'tb',
+    'RBI': 'rbi',
+    'SAC': 'sac',
+    'SF': 'sf',
+    'year': 'year'
+}
+
+PITCHERS_COLMAP = {
+    'player_id': 'player_id',
+    '선수명': 'player_name',
+    '팀명': 'team',
+    'ERA': 'era',
+    'IP': 'ip',
+    'W': 'w',
+    'L': 'l',
+    'SV': 'sv',
+    'SO': 'so',
+    'BB': 'bb',
+    'H': 'h',
+    'HR': 'hr',
+    'IP_OUTS': 'ip_outs',
+    'year': 'year'
+}
+
+TEAM_RANKINGS_COLMAP = {
+    # accept common header variants from KBO tables
+    '팀': 'team',
+    '팀명': 'team',
+    '순위': 'rank',
+    '순위.1': 'rank',
+    '경기': 'games',
+    'G': 'games',
+    '승': 'wins',
+    '패': 'losses',
+    '무': 'draws',
+    '승률': 'pct',
+    '게임차': 'gb',
+    'GB': 'gb',
+    '연속': 'streak',
+    '최근10경기': 'last10',
+    '홈': 'home_record',
+    '방문': 'away_record',
+    'year': 'year'
+}
+
+# DB 컬럼별 변환 규칙('text', 'int', 'ip'). 나머지 컬럼은 'real'.
+HITTERS_KINDS = {
+    'player_id': 'int', 'player_name': 'text', 'team': 'text',
+    'year': 'int', 'g': 'int', 'pa': 'int', 'ab': 'int', 'r': 'int', 'h': 'int', 'doubles': 'int',
+    'triples': 'int', 'hr': 'int', 'tb': 'int', 'rbi': 'int', 'sac': 'int', 'sf': 'int',
+}
+PITCHERS_KINDS = {
+    'player_id': 'int', 'player_name': 'text', 'team': 'text',
+    'year': 'int', 'w': 'int', 'l': 'int', 'sv': 'int', 'so': 'int', 'bb': 'int', 'h': 'int', 'hr': 'int',
+    'ip': 'ip', 'ip_outs': 'int',
+}
+TEAM_RANKINGS_KINDS = {
+    'team': 'text', 'streak': 'text', 'last10': 'text', 'home_record': 'text', 'away_record': 'text',
+    'year': 'int', 'rank': 'int', 'wins': 'int', 'losses': 'int', 'draws': 'int', 'games': 'int',
+}
+
+
+def _coerce_column(series, kind):
+    """컬럼 전체를 한 번에 변환한다. _safe_number(val, kind)를 셀마다 호출한 것과 같은 규칙이다.
+
+    text: 공백 제거 / int: 쉼표 제거 후 소수점 이하 버림 / real: 쉼표와 '%' 제거 / ip: 이닝 문자열 해석.
+    변환할 수 없는 값과 대시 표시는 NaN(-> NULL)이 된다.
     """
-    if execute_values is None:
-        raise RuntimeError("psycopg2.extras.execute_values를 사용할 수 없음. 'psycopg2-binary'를 설치할 것")
+    # pandas는 DataFrame을 저장할 때만 필요하므로 여기서 불러온다 (schema/stats 명령은 불러오지 않음)
+    import numpy as np
+    import pandas as pd
+    from stat_schema import clean_text_column, parse_innings_column
+
+    if kind != 'text' and pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        # pd.read_html/table_extractor가 이미 숫자로 바꾼 컬럼은 문자열 처리를 건너뛴다
+        num = series.astype('float64')
+    else:
+        s = clean_text_column(series)
+        if kind == 'text':
+            return s
+        if kind == 'ip':
+            return parse_innings_column(s)[0]
+        s = s.str.replace(',', '', regex=False)
+        if kind == 'real':
+            s = s.str.replace('%', '', regex=False)
+        num = pd.to_numeric(s, errors='coerce')
+    if kind == 'int':
+        num = np.trunc(num)
+    return num
+
+
+def _column_values(coerced, kind):
+    """변환된 컬럼을 DB에 넣을 파이썬 값 배열(NaN -> None, int는 파이썬 int)로 만든다."""
+    missing = coerced.isna().to_numpy()
+    if kind == 'int':
+        values = coerced.fillna(0).astype('int64').to_numpy().astype(object)
+    elif kind == 'text':
+        values = coerced.to_numpy(dtype=object, copy=True)
+    else:
+        values = coerced.astype('float64').to_numpy().astype(object)
+    values[missing] = None
+    return values
+
+
+def frame_to_records(df, colmap, kinds, key_cols):
+    """DataFrame을 (insert_cols, records)로 변환한다. records는 DB 컬럼 순서의 튜플 리스트이다.
+
+    colmap에 있는 컬럼만 사용하며(같은 DB 컬럼에 여러 헤더가 대응하면 처음 것), 기본키 컬럼 기준으로 중복을 제거한다.
+    """
+    with span('coerce', rows=len(df)):
+        return _frame_to_records(df, colmap, kinds, key_cols)
 
-    colmap = {
-        '선수명': 'player_name',
-        '팀명': 'team',
-        'AVG': 'avg',
-        'G': 'g',
-        'PA': 'pa',
-        'AB': 'ab',
-        'R': 'r',
-        'H': 'h',
-        '2B': 'doubles',
-        '3B': 'triples',
-        'HR': 'hr',
-        'TB': 'tb',
-        'RBI': 'rbi',
-        'SAC': 'sac',
-        'SF': 'sf',
-        'year': 'year'
-    }
 
+def _frame_to_records(df, colmap, kinds, key_cols):
     cols = []
     for df_col, db_col in colmap.items():
-        if df_col in df.columns:
+        if df_col in df.columns and db_col not in [c[0] for c in cols]:
             cols.append((db_col, df_col))
 
     if not cols:
-        raise ValueError('DataFrame에 필요한 컬럼이 없음. 원본 컬럼명을 확인할 것.')
+        return [], []
 
     insert_cols = [c[0] for c in cols]
-    df_cols = [c[1] for c in cols]
-    # Deduplicate by primary key columns if present (player_name, team, year)
-    key_df_cols = [df_col for db_col, df_col in cols if db_col in ('player_name', 'team', 'year')]
+    # Deduplicate by primary key columns if present
+    key_df_cols = [df_col for db_col, df_col in cols if db_col in key_cols]
     if key_df_cols:
-        df = df.copy()
         df = df.drop_duplicates(subset=key_df_cols, keep='last')
 
-    records = []
-    for _, row in df.iterrows():
-        values = []
-        for db_col, df_col in zip(insert_cols, df_cols):
-            val = row[df_col] if df_col in row.index else None
-            if db_col in ('player_name', 'team'):
-                values.append(_safe_number(val, 'text'))
-            elif db_col in ('year', 'g', 'pa', 'ab', 'r', 'h', 'doubles', 'triples', 'hr', 'tb', 'rbi', 'sac', 'sf'):
-                values.append(_safe_number(val, 'int'))
+    arrays = []
+    for db_col, df_col in cols:
+        kind = kinds.get(db_col, 'real')
+        arrays.append(_column_values(_coerce_column(df[df_col], kind), kind))
+    records = list(zip(*arrays))
+    return insert_cols, records
+
+
+# 이 건수 이상이면 execute_values 대신 COPY -> 임시 스테이징 테이블 -> INSERT ... SELECT로 저장한다
+COPY_THRESHOLD = int(os.getenv('PG_COPY_THRESHOLD', '2000'))
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_text(records):
+    """records를 COPY text 형식(탭 구분, NULL은 \\N) 문자열 버퍼로 만든다."""
+    lines = []
+    for record in records:
+        fields = []
+        for v in record:
+            if v is None:
+                fields.append('\\N')
+            elif isinstance(v, float):
+                fields.append(repr(v))
             else:
-                values.append(_safe_number(val, 'real'))
-        records.append(tuple(values))
+                fields.append(str(v).translate(_COPY_ESCAPES))
+        lines.append('\t'.join(fields))
+    lines.append('')
+    return io.StringIO('\n'.join(lines))
 
-    if not records:
-        return 0
 
-    insert_sql = (
-        f"INSERT INTO hitters ({', '.join(insert_cols)}) VALUES %s "
-        f"ON CONFLICT (player_name, team, year) DO UPDATE SET "
-        + ", ".join([f"{col}=EXCLUDED.{col}" for col in insert_cols if col not in ('player_name','team','year')])
+# upsert 결과: 새로 들어간 행 / 값이 바뀌어 갱신된 행 / 값이 같아 건드리지 않은 행
+UpsertCounts = namedtuple('UpsertCounts', ['inserted', 'updated', 'unchanged'])
+
+
+def _conflict_clause(table, insert_cols, key_cols):
+    """키 충돌 시 값이 실제로 달라진 행만 갱신하는 ON CONFLICT 절을 만든다.
+
+    값이 같은 행은 갱신하지 않으므로 dead tuple/WAL이 생기지 않고 RETURNING에도 나오지 않는다.
+    """
+    value_cols = [col for col in insert_cols if col not in key_cols]
+    if not value_cols:
+        return f"ON CONFLICT ({', '.join(key_cols)}) DO NOTHING"
+    return (
+        f"ON CONFLICT ({', '.join(key_cols)}) DO UPDATE SET "
+        + ", ".join([f"{col}=EXCLUDED.{col}" for col in value_cols])
+        + f" WHERE ({', '.join(f'{table}.{col}' for col in value_cols)})"
+        + f" IS DISTINCT FROM ({', '.join(f'EXCLUDED.{col}' for col in value_cols)})"
     )
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            execute_values(cur, insert_sql, records)
-        conn.commit()
-        return len(records)
-    finally:
-        conn.close()
 
+def _execute_upsert(cur, table, insert_cols, key_cols, records):
+    """건수에 따라 execute_values 또는 COPY 스테이징 경로로 upsert하고 UpsertCounts를 반환한다."""
+    cols = ', '.join(insert_cols)
+    # 새로 삽입된 행은 xmax가 0, 갱신된 행은 0이 아니다
+    conflict = _conflict_clause(table, insert_cols, key_cols) + f" RETURNING ({table}.xmax = 0)"
+    if len(records) < COPY_THRESHOLD:
+        rows = execute_values(cur, f"INSERT INTO {table} ({cols}) VALUES %s {conflict}", records, fetch=True)
+        inserted = sum(1 for (is_insert,) in rows if is_insert)
+        written = len(rows)
+    else:
+        # 대량 적재: 같은 트랜잭션 안에서 재사용할 수 있도록 IF NOT EXISTS + TRUNCATE
+        # _seq는 COPY로 넣은 순서(records 순서)이다. 같은 키 안에서 나중 행을 고를 때 쓴다(_upsert_players)
+        stage = f"_stage_{table}"
+        cur.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {stage} "
+            f"(LIKE {table} INCLUDING DEFAULTS, _seq bigint GENERATED ALWAYS AS IDENTITY) ON COMMIT DROP"
+        )
+        cur.execute(f"TRUNCATE {stage} RESTART IDENTITY")
+        cur.copy_expert(f"COPY {stage} ({cols}) FROM STDIN", _copy_text(records))
+        cur.execute(
+            f"WITH upserted(is_insert) AS (INSERT INTO {table} ({cols}) SELECT {cols} FROM {stage} {conflict}) "
+            "SELECT count(*) FILTER (WHERE is_insert), count(*) FROM upserted"
+        )
+        inserted, written = cur.fetchone()
+    return UpsertCounts(inserted, written - inserted, len(records) - written)
+
+
+def _in_transaction(execute, rows, conn=None):
+    """execute(cur)를 upsert 단계로 실행한다. conn이 없으면 풀에서 연결을 빌려 커밋까지 한다."""
+    if conn is not None:
+        with conn.cursor() as cur, span('upsert', rows=rows):
+            return execute(cur)
+
+    with pooled_conn() as conn:
+        with conn.cursor() as cur, span('upsert', rows=rows):
+            result = execute(cur)
+            conn.commit()
+        return result
+
+
+def _upsert_records(table, insert_cols, key_cols, records, conn=None):
+    """records를 table에 INSERT ... ON CONFLICT DO UPDATE로 저장하고 UpsertCounts를 반환한다.
+
+    COPY_THRESHOLD건 이상이면 COPY FROM STDIN으로 임시 테이블에 넣은 뒤 한 번의 INSERT ... SELECT로 합친다.
+    conn을 넘기면 그 연결의 트랜잭션 안에서 실행만 하고 커밋은 호출한 쪽(load_session)에 맡긴다.
+    """
+    return _in_transaction(
+        lambda cur: _execute_upsert(cur, table, insert_cols, key_cols, records), len(records), conn
+    )
 
-def df_to_pitchers_table(df):
-    if execute_values is None:
-        raise RuntimeError("psycopg2.extras.execute_values를 사용할 수 없음. 'psycopg2-binary'를 설치할 것")
 
-    colmap = {
-        '선수명': 'player_name',
-        '팀명': 'team',
-        'ERA': 'era',
-        'IP': 'ip',
-        'W': 'w',
-        'L': 'l',
-        'SV': 'sv',
-        'SO': 'so',
-        'BB': 'bb',
-        'H': 'h',
-        'HR': 'hr',
-        'year': 'year'
-    }
+def _player_rows(insert_cols, records):
+    """선수 기록 records에서 players 행 (player_id, player_name, team, first_year, last_year)을 id마다 하나씩 만든다.
 
-    cols = []
-    for df_col, db_col in colmap.items():
-        if df_col in df.columns:
-            cols.append((db_col, df_col))
+    이름과 팀은 가장 늦은 시즌의 값을 쓴다(시즌 중 트레이드로 한 시즌에 팀이 둘이면 records에서 나중 것).
+    """
+    pid, name, team, year = (insert_cols.index(c) for c in ('player_id', 'player_name', 'team', 'year'))
+    players = {}
+    for r in records:
+        row = players.get(r[pid])
+        if row is None:
+            players[r[pid]] = [r[pid], r[name], r[team], r[year], r[year]]
+            continue
+        if r[year] >= row[4]:
+            row[1], row[2], row[4] = r[name], r[team], r[year]
+        row[3] = min(row[3], r[year])
+    return [tuple(row) for row in players.values()]
+
+
+# players 병합: 시즌 범위를 넓히고, 더 늦거나 같은 시즌이면 이름/팀을 바꾼다(달라진 행만 갱신)
+_PLAYERS_UPSERT = (
+    "INSERT INTO players (player_id, player_name, team, first_year, last_year) {source} "
+    "ON CONFLICT (player_id) DO UPDATE SET "
+    "player_name = CASE WHEN EXCLUDED.last_year >= players.last_year THEN EXCLUDED.player_name ELSE players.player_name END, "
+    "team = CASE WHEN EXCLUDED.last_year >= players.last_year THEN EXCLUDED.team ELSE players.team END, "
+    "first_year = LEAST(players.first_year, EXCLUDED.first_year), "
+    "last_year = GREATEST(players.last_year, EXCLUDED.last_year) "
+    "WHERE EXCLUDED.first_year < players.first_year OR EXCLUDED.last_year > players.last_year "
+    "OR (EXCLUDED.last_year = players.last_year "
+    "AND (players.player_name, players.team) IS DISTINCT FROM (EXCLUDED.player_name, EXCLUDED.team))"
+)
+
+
+def _upsert_players(cur, table, insert_cols, records):
+    """선수 기록 records의 선수들을 players에 합친다.
+
+    COPY 경로로 저장한 batch는 이미 서버에 있는 스테이징 테이블에서 바로 합치고,
+    작은 batch는 선수 행을 만들어 한 문장으로 보낸다(100행씩 나누지 않음).
+    """
+    if len(records) >= COPY_THRESHOLD:
+        # _player_rows처럼 같은 시즌이면 records에서 나중 행(트레이드 후 팀)이 이긴다
+        cur.execute(_PLAYERS_UPSERT.format(source=(
+            "SELECT DISTINCT ON (player_id) player_id, player_name, team, "
+            "min(year) OVER (PARTITION BY player_id), max(year) OVER (PARTITION BY player_id) "
+            f"FROM _stage_{table} ORDER BY player_id, year DESC, _seq DESC"
+        )))
+        return
+    rows = _player_rows(insert_cols, records)
+    execute_values(cur, _PLAYERS_UPSERT.format(source="VALUES %s"), rows, page_size=max(len(rows), 1))
+
+
+def _delete_legacy_rows(cur, table, insert_cols, records):
+    """player_id 없이 저장된 예전 행 중 이번에 id와 함께 저장한 (이름, 팀, 시즌)의 행을 지운다."""
+    # 예전 행이 없으면(새 테이블, 이미 다시 저장됨) 부분 인덱스만 보고 끝낸다
+    cur.execute(f"SELECT EXISTS (SELECT 1 FROM {table} WHERE player_id IS NULL)")
+    if not cur.fetchone()[0]:
+        return
+    name, team, year = (insert_cols.index(c) for c in ('player_name', 'team', 'year'))
+    cur.execute(
+        f"DELETE FROM {table} WHERE player_id IS NULL AND (player_name, team, year) IN "
+        "(SELECT * FROM unnest(%s::text[], %s::text[], %s::int[]))",
+        ([r[name] for r in records], [r[team] for r in records], [r[year] for r in records]),
+    )
 
-    if not cols:
-        raise ValueError('투수 DataFrame에 필요한 컬럼이 없음.')
 
-    insert_cols = [c[0] for c in cols]
-    df_cols = [c[1] for c in cols]
+def _upsert_player_records(table, insert_cols, records, conn=None):
+    """선수 기록 records를 players와 함께 (player_id, year, team) 키로 저장하고 table의 UpsertCounts를 반환한다."""
+    def execute(cur):
+        counts = _execute_upsert(cur, table, insert_cols, PLAYER_KEY, records)
+        _upsert_players(cur, table, insert_cols, records)
+        _delete_legacy_rows(cur, table, insert_cols, records)
+        return counts
 
-    # Deduplicate by primary key columns if present (player_name, team, year)
-    key_df_cols = [df_col for db_col, df_col in cols if db_col in ('player_name', 'team', 'year')]
-    if key_df_cols:
-        df = df.copy()
-        df = df.drop_duplicates(subset=key_df_cols, keep='last')
+    return _in_transaction(execute, len(records), conn)
 
-    # sanitize pitcher numeric values (IP may be fractional string)
-    records2 = []
-    for _, row in df.iterrows():
-        vals = []
-        for db_col, df_col in zip(insert_cols, df_cols):
-            val = row[df_col] if df_col in row.index else None
-            if db_col in ('player_name', 'team'):
-                vals.append(_safe_number(val, 'text'))
-            elif db_col in ('year', 'w', 'l', 'sv', 'so', 'bb', 'h', 'hr'):
-                vals.append(_safe_number(val, 'int'))
-            elif db_col == 'ip':
-                vals.append(_safe_number(val, 'ip'))
-            else:
-                vals.append(_safe_number(val, 'real'))
-        records2.append(tuple(vals))
-    records = records2
-    if not records:
-        return 0
 
-    insert_sql = (
-        f"INSERT INTO pitchers ({', '.join(insert_cols)}) VALUES %s "
-        f"ON CONFLICT (player_name, team, year) DO UPDATE SET "
-        + ", ".join([f"{col}=EXCLUDED.{col}" for col in insert_cols if col not in ('player_name','team','year')])
-    )
+def _with_player_ids(df):
+    """df에 player_id 열이 없으면 선수명 링크에서 뽑아 넣고, id를 알 수 없는 행은 알리고 뺀다."""
+    from table_extractor import LINK_SUFFIX, PLAYER_ID_COLUMN, player_id_column
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            execute_values(cur, insert_sql, records)
-        conn.commit()
-        return len(records)
-    finally:
-        conn.close()
+    if PLAYER_ID_COLUMN not in df.columns:
+        link_col = f"선수명{LINK_SUFFIX}"
+        if link_col not in df.columns:
+            raise ValueError("player_id 열과 '선수명_link' 열이 모두 없음. 선수 링크를 포함해 다시 수집할 것.")
+        df = df.assign(**{PLAYER_ID_COLUMN: player_id_column(df[link_col].to_numpy())})
+    missing = df[PLAYER_ID_COLUMN].isna()
+    if missing.any():
+        print(f"   ⚠️ 선수 id를 알 수 없는 {int(missing.sum())}행은 저장하지 않음")
+        df = df[~missing]
+    return df
 
 
-def df_to_team_rankings_table(df):
+def df_to_hitters_table(df, conn=None):
+    """DataFrame을 hitters 테이블에 upsert 형태로 저장한다.
+    기대하는 컬럼: 한글 컬럼명(예: '선수명','팀명','HR' 등), 'year'와 'player_id'(또는 '선수명_link') 열이 포함되어야 한다.
+    conn을 넘기면 커밋하지 않는다(load_session 참고).
+    """
     if execute_values is None:
         raise RuntimeError("psycopg2.extras.execute_values를 사용할 수 없음. 'psycopg2-binary'를 설치할 것")
 
-    colmap = {
-    # accept common header variants from KBO tables
-    '팀': 'team',
-    '팀명': 'team',
-    '순위': 'rank',
-    '순위.1': 'rank',
-    '경기': 'games',
-    'G': 'games',
-    '승': 'wins',
-    '패': 'losses',
-    '무': 'draws',
-    '승률': 'pct',
-    '게임차': 'gb',
-    'GB': 'gb',
-    '연속': 'streak',
-    '최근10경기': 'last10',
-    '홈': 'home_record',
-    '방문': 'away_record',
-    'year': 'year'
-    }
+    df = _with_player_ids(df)
+    insert_cols, records = frame_to_records(df, HITTERS_COLMAP, HITTERS_KINDS, PLAYER_KEY)
+    if not insert_cols:
+        raise ValueError('DataFrame에 필요한 컬럼이 없음. 원본 컬럼명을 확인할 것.')
+    if not records:
+        return UpsertCounts(0, 0, 0)
+    return _upsert_player_records('hitters', insert_cols, records, conn)
 
-    cols = []
-    for df_col, db_col in colmap.items():
-        if df_col in df.columns:
-            cols.append((db_col, df_col))
 
-    if not cols:
-        raise ValueError('팀 순위 DataFrame에 필요한 컬럼이 없음.')
+def df_to_pitchers_table(df, conn=None):
+    if execute_values is None:
+        raise RuntimeError("psycopg2.extras.execute_values를 사용할 수 없음. 'psycopg2-binary'를 설치할 것")
 
-    insert_cols = [c[0] for c in cols]
-    df_cols = [c[1] for c in cols]
+    # sanitize pitcher numeric values (IP may be fractional string)
+    if 'IP' in df.columns and 'IP_OUTS' not in df.columns:
+        # '12 1/3' 같은 이닝은 컬럼 단위로 해석하고, 정확한 아웃 카운트를 ip_outs로 함께 저장
+        # (stat_schema.apply_schema를 거친 DataFrame은 이미 IP_OUTS가 있다)
+        ip, outs = parse_innings_column(df['IP'])
+        df = df.assign(IP=ip, IP_OUTS=outs)
+    df = _with_player_ids(df)
+    insert_cols, records = frame_to_records(df, PITCHERS_COLMAP, PITCHERS_KINDS, PLAYER_KEY)
+    if not insert_cols:
+        raise ValueError('투수 DataFrame에 필요한 컬럼이 없음.')
+    if not records:
+        return UpsertCounts(0, 0, 0)
+    return _upsert_player_records('pitchers', insert_cols, records, conn)
 
-    # Deduplicate by primary key columns if present (team, year)
-    key_df_cols = [df_col for db_col, df_col in cols if db_col in ('team', 'year')]
-    if key_df_cols:
-        df = df.copy()
-        df = df.drop_duplicates(subset=key_df_cols, keep='last')
+
+def df_to_team_rankings_table(df, conn=None):
+    if execute_values is None:
+        raise RuntimeError("psycopg2.extras.execute_values를 사용할 수 없음. 'psycopg2-binary'를 설치할 것")
 
     # sanitize team ranking numeric values
-    records2 = []
-    for _, row in df.iterrows():
-        vals = []
-        for db_col, df_col in zip(insert_cols, df_cols):
-            val = row[df_col] if df_col in row.index else None
-            if db_col in ('team', 'streak', 'last10', 'home_record', 'away_record'):
-                vals.append(_safe_number(val, 'text'))
-            elif db_col in ('year', 'rank', 'wins', 'losses', 'draws', 'games'):
-                vals.append(_safe_number(val, 'int'))
-            else:
-                vals.append(_safe_number(val, 'real'))
-        records2.append(tuple(vals))
-    records = records2
+    key_cols = ('team', 'year')
+    insert_cols, records = frame_to_records(df, TEAM_RANKINGS_COLMAP, TEAM_RANKINGS_KINDS, key_cols)
+    if not insert_cols:
+        raise ValueError('팀 순위 DataFrame에 필요한 컬럼이 없음.')
     if not records:
-        return 0
+        return UpsertCounts(0, 0, 0)
+    return _upsert_records('team_rankings', insert_cols, key_cols, records, conn)
 
-    insert_sql = (
-        f"INSERT INTO team_rankings ({', '.join(insert_cols)}) VALUES %s "
-        f"ON CONFLICT (team, year) DO UPDATE SET "
-        + ", ".join([f"{col}=EXCLUDED.{col}" for col in insert_cols if col not in ('team','year')])
-    )
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            execute_values(cur, insert_sql, records)
-        conn.commit()
-        return len(records)
-    finally:
-        conn.close()
+# 카테고리 -> 저장 함수 (LoadSession.write에서 사용)
+WRITERS = {
+    'hitters': df_to_hitters_table,
+    'pitchers': df_to_pitchers_table,
+    'team_rankings': df_to_team_rankings_table,
+}
@@ -0,0 +1,198 @@
+"""driver_cache.py
+설치된 Chrome에 맞는 chromedriver 경로를 찾아 JSON 파일에 보관하는 모듈이다.
+
+처음 한 번만 Chrome/드라이버의 `--version`을 실행해 major 버전이 맞는지 확인하고, (Chrome 경로 -> 버전, 드라이버 경로)를
+캐시에 남긴다. 다음 실행부터는 두 파일의 수정 시각만 비교하므로 네트워크 요청도, 하위 프로세스 실행도 없다.
+로컬에서 맞는 드라이버를 찾지 못할 때만 webdriver-manager로 내려받고(자동 감지 -> Chrome 전체 버전 -> major 버전 순),
+그것도 실패하면 CHROMEDRIVER_PATH를 그대로 쓴다. Chrome을 찾지 못한 환경도 캐시한다.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+CACHE_PATH = os.getenv('CHROMEDRIVER_CACHE_PATH', 'chromedriver_cache.json')
+_VERSION_RE = re.compile(r"(\d+)(?:\.\d+)+")
+_lock = threading.Lock()
+
+CHROME_CANDIDATES = [
+    'google-chrome',
+    'google-chrome-stable',
+    'chromium',
+    'chromium-browser',
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+]
+
+
+def _executable(name):
+    """name이 경로면 존재할 때 그대로, 명령 이름이면 PATH에서 찾은 경로를 반환한다. 없으면 None."""
+    if not name:
+        return None
+    if os.path.sep in name or '/' in name:
+        return os.path.abspath(name) if os.path.exists(name) else None
+    return shutil.which(name)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def binary_version(path):
+    """path --version 출력에서 버전 문자열(예: '128.0.6613.84')을 추출한다. 실패하면 None."""
+    try:
+        out = subprocess.check_output([path, '--version'], stderr=subprocess.STDOUT, timeout=5)
+    except Exception:
+        return None
+    m = _VERSION_RE.search(out.decode('utf-8', errors='ignore'))
+    return m.group(0) if m else None
+
+
+def _major(version):
+    return version.split('.')[0] if version else None
+
+
+def find_chrome():
+    """CHROME_PATH 또는 흔한 설치 위치에서 Chrome 실행 파일 경로를 찾는다. 없으면 None."""
+    for name in [os.getenv('CHROME_PATH')] + CHROME_CANDIDATES:
+        path = _executable(name)
+        if path:
+            return path
+    return None
+
+
+def local_drivers():
+    """네트워크 없이 찾을 수 있는 chromedriver 후보 경로를 우선순위대로 반환한다."""
+    names = [
+        os.getenv('CHROMEDRIVER_PATH'),
+        os.path.join(os.getcwd(), 'drivers', 'chromedriver'),
+        os.path.join(os.getcwd(), 'drivers', 'chromedriver.exe'),
+        'chromedriver',
+    ]
+    paths = []
+    for name in names:
+        path = _executable(name)
+        if path and path not in paths:
+            paths.append(path)
+    # webdriver-manager가 예전에 내려받아 둔 드라이버 (~/.wdm)
+    wdm_root = os.path.join(os.path.expanduser('~'), '.wdm', 'drivers', 'chromedriver')
+    for root, _, files in os.walk(wdm_root):
+        for f in files:
+            if f in ('chromedriver', 'chromedriver.exe'):
+                path = os.path.join(root, f)
+                if path not in paths:
+                    paths.append(path)
+    return paths
+
+
+def _load_cache(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path, cache):
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"   ⚠️ chromedriver 캐시 저장 실패: {e}")
+
+
+def _cached_driver(entry, chrome):
+    """캐시 항목의 Chrome/드라이버 파일이 그대로면 드라이버 경로를 반환한다. (stat만 사용)"""
+    if not entry or entry.get('chrome_mtime') != (_mtime(chrome) if chrome else None):
+        return None
+    driver = entry.get('driver')
+    if driver and entry.get('driver_mtime') == _mtime(driver):
+        return driver
+    return None
+
+
+def _download_drivers(chrome_version, major):
+    """webdriver-manager로 드라이버를 내려받아 경로를 하나씩 내놓는다. (캐시가 없을 때만 호출되는 유일한 네트워크 경로)
+
+    예전처럼 자동 감지(install())를 먼저 시도하고, 그다음 Chrome 전체 버전, 마지막으로 major 버전만 지정한다.
+    major만 주면 3.8.6은 없는 URL(404)을, 4.x는 '128'이 들어간 다른 버전(예: 131.0.6778.128)을 고를 수 있으므로 최후 수단이다.
+    """
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    attempts = [{}] + [{'version': v} for v in (chrome_version, major) if v]
+    for kwargs in attempts:
+        try:
+            try:
+                yield ChromeDriverManager(**kwargs).install()
+            except TypeError:
+                # 최신 webdriver-manager는 version 대신 driver_version을 받는다
+                yield ChromeDriverManager(driver_version=kwargs['version']).install()
+        except Exception as e:
+            print(f"   ⚠️ 드라이버 다운로드 실패({kwargs.get('version', '자동 감지')}): {e}")
+
+
+def resolve_driver(cache_path=CACHE_PATH, download=True):
+    """설치된 Chrome과 major 버전이 맞는 chromedriver 경로를 반환한다.
+
+    캐시가 유효하면 바로 반환하고, 아니면 로컬 후보를 확인한 뒤 필요하면 내려받아 캐시에 기록한다.
+    맞는 드라이버가 없으면 CHROMEDRIVER_PATH(존재할 때)를 반환하고, 그것도 없으면 RuntimeError.
+    """
+    with _lock:
+        chrome = find_chrome()
+        cache = _load_cache(cache_path)
+        # Chrome을 찾지 못한 환경도 '-' 키로 캐시해 매 실행마다 후보를 다시 훑거나 내려받지 않게 한다
+        key = chrome or '-'
+        driver = _cached_driver(cache.get(key), chrome)
+        if driver:
+            return driver
+
+        chrome_version = binary_version(chrome) if chrome else None
+        major = _major(chrome_version)
+        if chrome:
+            print(f"   🔎 Chrome 버전 확인: {chrome_version or '알 수 없음'} ({chrome})")
+
+        candidates = local_drivers()
+        driver = None
+        for path in candidates:
+            if major is None or _major(binary_version(path)) == major:
+                driver = path
+                break
+        if driver is None and download:
+            for path in _download_drivers(chrome_version, major):
+                print(f"   📥 webdriver-manager로 드라이버를 내려받음: {path}")
+                if major is None or _major(binary_version(path)) == major:
+                    driver = path
+                    break
+
+        if driver is None:
+            fallback = _executable(os.getenv('CHROMEDRIVER_PATH'))
+            if fallback:
+                print(f"   ⚠️ 버전이 맞는 드라이버를 찾지 못해 CHROMEDRIVER_PATH를 그대로 사용: {fallback}")
+                return fallback
+            raise RuntimeError("chromedriver를 찾을 수 없음. chromedriver를 설치하거나 CHROMEDRIVER_PATH를 설정할 것.")
+
+        cache[key] = {
+            'chrome_version': chrome_version,
+            'chrome_mtime': _mtime(chrome) if chrome else None,
+            'driver': driver,
+            'driver_mtime': _mtime(driver),
+        }
+        _save_cache(cache_path, cache)
+        return driver
+
+
+def forget(cache_path=CACHE_PATH):
+    """캐시를 지운다. 캐시의 드라이버로 실행에 실패했을 때 다음 resolve_driver()가 다시 확인하도록 한다."""
+    with _lock:
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
@@ -0,0 +1,369 @@
+"""http_fetcher.py
+브라우저 없이 KBO 기록 페이지(ASP.NET WebForms)의 postback을 HTTP로 직접 재현하여 데이터를 수집하는 모듈이다.
+
+Selenium이 ddlSeason/ddlTeam 드롭다운과 ucPager 버튼을 클릭해서 일으키던 UpdatePanel postback을
+__VIEWSTATE/__EVENTVALIDATION 등 폼 상태를 유지한 채 POST 요청으로 보낸다.
+함수 반환값은 crawler.py의 브라우저 버전과 같은 형태의 pandas.DataFrame이다.
+"""
+import copy
+import http.cookiejar
+import re
+import ssl
+import urllib.error
+import urllib.parse
+import urllib.request as urlreq
+import urllib.robotparser
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from kbo_site import (
+    USER_AGENT,
+    HITTER_URL,
+    PITCHER_URL,
+    TEAM_RANK_URL,
+    CATEGORY_URLS,
+    SEASON_SELECT_ID,
+    TEAM_SELECT_ID,
+    record_table_from_html,
+    rankings_table_from_html,
+    round_trip,
+)
+from crawl_state import PAGE_ROWS_ATTR
+from metrics import span
+from table_extractor import parse_document, pager_state
+
+HTTP_TIMEOUT = 20
+# 한 팀의 2페이지 이후를 동시에 요청할 최대 개수 (요청 예산은 sleep_fn이 따로 제한)
+PAGE_FETCH_WORKERS = 4
+
+_POSTBACK_RE = re.compile(r"__doPostBack\('([^']*)','([^']*)'\)")
+# 폼 상태에 포함하지 않는 input 타입(클릭해야 전송되는 버튼류)
+_SKIP_INPUT_TYPES = ('submit', 'button', 'image', 'reset', 'file')
+
+
+class PostbackSession:
+    """ASP.NET 페이지 하나에 대한 폼 상태(hidden 필드, select 값)와 쿠키를 유지하는 HTTP 세션.
+
+    open()으로 페이지를 받은 뒤 select()/click()으로 브라우저의 드롭다운 선택과 링크 클릭을 대신한다.
+    응답 html에서 다음 postback에 필요한 폼 상태를 매번 다시 읽어 둔다.
+    """
+
+    def __init__(self, user_agent=USER_AGENT, timeout=HTTP_TIMEOUT):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.url = None
+        self.action = None
+        self.html = ''
+        self.doc = None
+        self.fields = {}
+        self.selects = {}
+        self.links = {}
+        self._cookies = http.cookiejar.CookieJar()
+        self._opener = self._build_opener(None)
+
+    def _build_opener(self, context):
+        handlers = [urlreq.HTTPCookieProcessor(self._cookies)]
+        if context is not None:
+            handlers.append(urlreq.HTTPSHandler(context=context))
+        return urlreq.build_opener(*handlers)
+
+    def _request(self, url, data=None):
+        body = urllib.parse.urlencode(data).encode('utf-8') if data is not None else None
+        req = urlreq.Request(url, data=body, headers={'User-Agent': self.user_agent})
+        if body is not None:
+            req.add_header('Content-Type', 'application/x-www-form-urlencoded')
+            req.add_header('Referer', self.url)
+        # GET은 페이지 이동, POST는 postback으로 기록 (응답 바이트 수 포함)
+        with span('navigate' if body is None else 'postback') as sp:
+            try:
+                resp = self._opener.open(req, timeout=self.timeout)
+            except urllib.error.URLError as e:
+                if not isinstance(e.reason, ssl.SSLError):
+                    raise
+                # SSL 인증서 문제(로컬 인증서 저장소 등) -> robots.txt 확인과 같이 비검증으로 재시도
+                print(f"   ⚠️ SSL 오류 발생({e.reason}), 인증서 검증을 비활성화하고 재시도한다...")
+                self._opener = self._build_opener(ssl._create_unverified_context())
+                resp = self._opener.open(req, timeout=self.timeout)
+            with resp:
+                charset = resp.headers.get_content_charset() or 'utf-8'
+                raw = resp.read()
+            sp.add(nbytes=len(raw))
+        return raw.decode(charset, errors='replace')
+
+    def _load(self, html):
+        """응답 html에서 다음 postback에 보낼 폼 상태를 읽어 둔다. 파싱한 트리는 표 추출에 재사용한다."""
+        self.html = html
+        self.doc = parse_document(html)
+        forms = self.doc.xpath('//form')
+        if forms:
+            form = forms[0]
+            self.action = urllib.parse.urljoin(self.url, form.get('action') or self.url)
+        else:
+            form = self.doc
+            self.action = self.url
+
+        fields = {}
+        for inp in form.xpath('.//input[@name]'):
+            itype = (inp.get('type') or 'text').lower()
+            if itype in _SKIP_INPUT_TYPES:
+                continue
+            if itype in ('checkbox', 'radio') and inp.get('checked') is None:
+                continue
+            fields[inp.get('name')] = inp.get('value', '')
+
+        selects = {}
+        for sel in form.xpath('.//select[@name]'):
+            name = sel.get('name')
+            options = []
+            selected = None
+            for opt in sel.xpath('.//option'):
+                text = ' '.join(opt.text_content().split())
+                value = opt.get('value', text)
+                options.append((value, text))
+                if selected is None and opt.get('selected') is not None:
+                    selected = value
+            if selected is None and options:
+                selected = options[0][0]
+            if selected is not None:
+                fields[name] = selected
+            selects[sel.get('id') or name] = (name, options)
+
+        links = {}
+        for a in form.xpath('.//a[@id and @href]'):
+            m = _POSTBACK_RE.search(a.get('href'))
+            if m:
+                links[a.get('id')] = (m.group(1), m.group(2))
+
+        self.fields = fields
+        self.selects = selects
+        self.links = links
+
+    def open(self, url):
+        """GET으로 페이지를 열고 폼 상태를 초기화한다."""
+        self.url = url
+        self._load(self._request(url))
+        return self.html
+
+    def postback(self, event_target, values=None, event_argument='', update=True):
+        """__doPostBack(event_target, event_argument)를 재현한다.
+
+        update=False면 응답 html만 반환하고 세션의 폼 상태는 그대로 둔다(페이지 원복 요청이 필요 없음).
+        """
+        data = dict(self.fields)
+        if values:
+            data.update(values)
+        data['__EVENTTARGET'] = event_target
+        data['__EVENTARGUMENT'] = event_argument
+        html = self._request(self.action or self.url, data)
+        if update:
+            self._load(html)
+        return html
+
+    def options(self, select_id):
+        """select 컨트롤의 (value, text) 목록을 반환한다."""
+        return self.selects[select_id][1]
+
+    def selected(self, select_id):
+        """select 컨트롤의 현재 선택 값을 반환한다."""
+        name = self.selects[select_id][0]
+        return self.fields.get(name)
+
+    def select(self, select_id, value=None, text=None, update=True):
+        """드롭다운 선택(AutoPostBack)을 재현한다. value 또는 보이는 text로 옵션을 지정한다."""
+        name, options = self.selects[select_id]
+        if value is None:
+            matches = [v for v, t in options if t == text]
+            if not matches:
+                raise ValueError(f"{select_id}에 '{text}' 옵션이 없음")
+            value = matches[0]
+        return self.postback(name, {name: value}, update=update)
+
+    def click(self, link_id, update=True):
+        """javascript:__doPostBack(...) 링크 클릭을 재현한다."""
+        target, argument = self.links[link_id]
+        return self.postback(target, event_argument=argument, update=update)
+
+    def pager(self):
+        """현재 폼 상태의 페이저(PagerState)를 반환한다."""
+        return pager_state(self.doc)
+
+    def fork(self, html):
+        """쿠키/연결은 공유하고 폼 상태만 html 기준인 세션 복사본을 만든다(원래 세션의 상태는 그대로)."""
+        other = copy.copy(self)
+        other._load(html)
+        return other
+
+
+def open_season(session, url, season, sleep_fn):
+    """기록 페이지를 열고 시즌을 선택한다."""
+    round_trip(sleep_fn, lambda: session.open(url))
+    if session.selected(SEASON_SELECT_ID) != season:
+        round_trip(sleep_fn, lambda: session.select(SEASON_SELECT_ID, value=season))
+
+
+def get_team_list_http(session):
+    """현재 폼 상태의 팀 드롭다운에서 '전체'를 제외한 팀 이름 목록을 반환한다."""
+    return [text for _, text in session.options(TEAM_SELECT_ID)[1:]]
+
+
+def fetch_pages(session, link_ids, sleep_fn):
+    """session의 폼 상태에서 페이저 링크들을 동시에 postback하여 응답 html을 link_ids 순서대로 반환한다.
+
+    모든 요청이 같은 폼 상태(스냅샷)에서 출발하므로 페이지를 오가며 클릭할 필요가 없다.
+    """
+    def fetch(link_id):
+        return round_trip(sleep_fn, lambda: session.click(link_id, update=False))
+
+    if len(link_ids) <= 1:
+        return [fetch(link_id) for link_id in link_ids]
+    with ThreadPoolExecutor(max_workers=min(PAGE_FETCH_WORKERS, len(link_ids))) as executor:
+        return list(executor.map(fetch, link_ids))
+
+
+def fetch_remaining_pages(session, sleep_fn):
+    """session(현재 페이지 상태)에서 나머지 모든 페이지의 html을 페이지 순서대로 반환한다.
+
+    보이는 페이저 블록의 페이지는 동시에 받고, 다음 블록(btnNext)이 있으면 복사본 세션으로 넘어가
+    같은 방식으로 이어서 받는다. 원래 세션의 폼 상태는 바꾸지 않는다.
+    """
+    htmls = []
+    snapshot = session
+    state = snapshot.pager()
+    seen = {state.current}
+    while True:
+        todo = sorted(p for p in state.links if p not in seen)
+        htmls.extend(fetch_pages(snapshot, [state.links[p] for p in todo], sleep_fn))
+        seen.update(todo)
+        if not state.next_id:
+            break
+        html = round_trip(sleep_fn, lambda: snapshot.click(state.next_id, update=False))
+        snapshot = snapshot.fork(html)
+        state = snapshot.pager()
+        if state.current in seen:
+            break
+        htmls.append(html)
+        seen.add(state.current)
+    return htmls
+
+
+def collect_team_http(session, season, team, sleep_fn):
+    """팀을 선택하여 해당 팀 선수 기록(모든 페이지)을 DataFrame으로 반환한다. 기록 표가 없으면 None."""
+    round_trip(sleep_fn, lambda: session.select(TEAM_SELECT_ID, text=team))
+    state = session.pager()
+    first_link = state.links.get(1) or state.first_id
+    if state.current != 1 and first_link:
+        # 팀을 바꿔도 페이지 번호가 유지된 경우에만 1페이지로 돌아간다
+        round_trip(sleep_fn, lambda: session.click(first_link))
+    df = record_table_from_html(session.doc)
+    if df is None:
+        return None
+    dfs = [df] + [record_table_from_html(html) for html in fetch_remaining_pages(session, sleep_fn)]
+    dfs = [d for d in dfs if d is not None]
+    df = pd.concat(dfs, ignore_index=True)
+
+    df['team'] = team
+    df['year'] = int(season)
+    # 페이지별 행 수 (crawl_state의 페이지 단위 digest에 사용)
+    df.attrs[PAGE_ROWS_ATTR] = [len(d) for d in dfs]
+    return df
+
+
+def collect_season_http(url, season, sleep_fn, session=None):
+    """url의 기록 페이지에서 season의 모든 팀 데이터를 수집하여 하나의 DataFrame으로 반환한다."""
+    session = session or PostbackSession()
+    open_season(session, url, season, sleep_fn)
+    teams = get_team_list_http(session)
+
+    dfs = []
+    for team in teams:
+        df = collect_team_http(session, season, team, sleep_fn)
+        if df is not None:
+            dfs.append(df)
+
+    if dfs:
+        return pd.concat(dfs, ignore_index=True)
+    return pd.DataFrame()
+
+
+def collect_current_season_http(season, sleep_fn, session=None):
+    """crawler.collect_current_season의 HTTP 버전. 타자 기록을 수집한다."""
+    return collect_season_http(HITTER_URL, season, sleep_fn, session)
+
+
+def collect_pitchers_season_http(season, sleep_fn, session=None):
+    """crawler.collect_pitchers_season의 HTTP 버전. 투수 기록을 수집한다."""
+    return collect_season_http(PITCHER_URL, season, sleep_fn, session)
+
+
+def collect_team_rankings_season_http(season, sleep_fn, session=None):
+    """crawler.collect_team_rankings_season의 HTTP 버전. 팀 순위를 수집한다."""
+    session = session or PostbackSession()
+    html = round_trip(sleep_fn, lambda: session.open(TEAM_RANK_URL))
+    return rankings_table_from_html(html, season)
+
+
+def reset_session(session, sleep_fn=None):
+    """다음 수집이 페이지를 새로 받아 최신 기록과 폼 상태로 시작하게 한다. 요청은 보내지 않는다(그 요청은 다음 수집이 예산을 쓴다)."""
+    session.url = None
+
+
+def open_category_http(session, category, season, sleep_fn):
+    """session이 category 기록 페이지의 season 폼 상태가 되도록 한다. 이미 그렇다면 요청을 보내지 않는다."""
+    url = CATEGORY_URLS[category]
+    if session.url != url:
+        open_season(session, url, season, sleep_fn)
+    elif session.selected(SEASON_SELECT_ID) != season:
+        round_trip(sleep_fn, lambda: session.select(SEASON_SELECT_ID, value=season))
+
+
+def list_teams_http(session, season, sleep_fn):
+    """season의 팀 이름 목록을 반환한다(타자 기록 페이지 드롭다운 기준)."""
+    open_category_http(session, 'hitters', season, sleep_fn)
+    return get_team_list_http(session)
+
+
+def collect_unit_http(session, unit, sleep_fn):
+    """crawl_pool.CrawlUnit 하나를 수집한다. team_rankings는 team 없이 시즌 단위로 수집한다."""
+    if unit.category == 'team_rankings':
+        return collect_team_rankings_season_http(unit.season, sleep_fn)
+    open_category_http(session, unit.category, unit.season, sleep_fn)
+    return collect_team_http(session, unit.season, unit.team, sleep_fn)
+
+
+def check_robots_txt(url: str) -> bool:
+    """주어진 URL에 대해 robots.txt를 확인하고 크롤링 허용 여부를 반환한다.
+
+    SSL 인증서 검증 오류가 발생하면 검증을 비활성화하고 robots.txt를 가져와 파싱한다.
+    """
+    try:
+        parsed = urllib.parse.urlparse(url)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        print(f"🔍 웹 크롤링 허가 확인: {robots_url}")
+        print("   📖 robots.txt 파일을 읽어서 크롤링이 허용되는지 확인하는 중...")
+
+        rp = urllib.robotparser.RobotFileParser()
+        rp.set_url(robots_url)
+        try:
+            rp.read()
+        except Exception as e:
+            # SSL 인증서 문제 등으로 rp.read()가 실패할 수 있음 -> 비검증으로 재시도
+            try:
+                print(f"   ⚠️ robots.txt 읽기 중 SSL 오류 발생({e}), 인증서 검증을 비활성화하고 재시도한다...")
+                data = urlreq.urlopen(robots_url, context=ssl._create_unverified_context(), timeout=10).read().decode('utf-8')
+                rp.parse(data.splitlines())
+            except Exception as e2:
+                print(f"   ❌ robots.txt를 가져오지 못함: {e2}")
+                raise
+
+        can_fetch = rp.can_fetch("*", url)
+        if can_fetch:
+            print(f"✅ 크롤링 허가 확인 완료!")
+        else:
+            print(f"❌ robots.txt가 이 URL의 크롤링을 금지한다: {robots_url}")
+        return can_fetch
+    except Exception as e:
+        print(f"⚠️  robots.txt 확인 중 오류 발생: {e}")
+        print("   💭 인터넷 연결을 확인하거나 수동으로 robots.txt를 확인해 볼 것")
+        return False
@@ -0,0 +1,312 @@
+"""kbo_fixtures.py
+벤치마크(bench.py)와 재현 서버가 쓰는 KBO 기록 페이지 fixture를 만들거나 읽는 모듈이다.
+
+build_record_page()/build_rankings_page()는 실제 페이지와 같은 구조(ASP.NET 폼 hidden 필드, ddlSeason/ddlTeam 드롭다운,
+udpContent > div.record_result > table, ucPager 링크)의 html을 원하는 행 수로 만든다. 값은 seed로 정해지므로 매번 같다.
+`python bench.py --record`로 받은 실제 페이지는 sanitize_page()로 폼 상태 값을 지워 FIXTURE_DIR(저장소에 포함)에
+<category>-<행 수>.html(팀 순위는 team_rankings.html)로 남기고, page_fixture()는 받아 둔 페이지를 먼저 쓰고
+없을 때만 위의 합성 페이지를 만든다.
+"""
+import base64
+import glob
+import json
+import os
+import random
+import re
+from html import escape
+
+from kbo_site import SEASON_SELECT_ID, TEAM_SELECT_ID
+
+FIXTURE_DIR = os.getenv('BENCH_FIXTURE_DIR', 'bench_fixtures')
+# 기록 페이지 한 쪽의 행 수 (KBO 기록 표 기준)
+PAGE_ROWS = 30
+FIRST_SEASON = 1982
+
+# (드롭다운 value, 보이는 이름)
+TEAMS = [
+    ('LG', 'LG'), ('HH', '한화'), ('SK', 'SSG'), ('SS', '삼성'), ('NC', 'NC'),
+    ('KT', 'KT'), ('LT', '롯데'), ('HT', 'KIA'), ('OB', '두산'), ('WO', '키움'),
+]
+
+HITTER_COLUMNS = ['순위', '선수명', '팀명', 'AVG', 'G', 'PA', 'AB', 'R', 'H', '2B', '3B', 'HR', 'TB', 'RBI', 'SAC', 'SF']
+PITCHER_COLUMNS = ['순위', '선수명', '팀명', 'ERA', 'G', 'W', 'L', 'SV', 'HLD', 'WPCT', 'IP', 'H', 'HR', 'BB', 'HBP',
+                   'SO', 'R', 'ER', 'WHIP']
+RANKING_COLUMNS = ['순위', '팀명', '경기', '승', '패', '무', '승률', '게임차', '최근10경기', '연속', '홈', '방문']
+
+_PREFIX = 'ctl00$ctl00$ctl00$cphContents$cphContents$cphContents$'
+_ID_PREFIX = 'cphContents_cphContents_cphContents_'
+_DETAIL_URLS = {
+    'hitters': '/Record/Player/HitterDetail/Basic.aspx',
+    'pitchers': '/Record/Player/PitcherDetail/Basic.aspx',
+}
+_FAMILY = '김이박최정강조윤장임한오서신권황안송류홍'
+_GIVEN = '민준서윤도현지우하은건우시우예준주원현우승민재원태양성훈'
+
+
+def control_name(control_id):
+    """컨트롤 id(cphContents_..._ddlSeason_ddlSeason)를 폼 name(ctl00$...$ddlSeason$ddlSeason)으로 바꾼다."""
+    return _PREFIX + control_id[len(_ID_PREFIX):].replace('_', '$')
+
+
+def _player_name(rng):
+    return rng.choice(_FAMILY) + rng.choice(_GIVEN) + rng.choice(_GIVEN)
+
+
+def _innings(rng):
+    whole = rng.randint(0, 180)
+    third = rng.choice(['', ' 1/3', ' 2/3'])
+    return f"{whole}{third}" if whole or not third else third.strip()
+
+
+def hitter_rows(n, season='2025', team=None, seed=0):
+    """타자 기록 행 n개([열 값...], 선수 id)를 만든다. team이 없으면 팀을 섞는다."""
+    rng = random.Random(f"hitters-{season}-{team}-{seed}")
+    player_ids = rng.sample(range(50000, 75000), n)
+    rows = []
+    for i in range(n):
+        name = team or rng.choice(TEAMS)[1]
+        ab = rng.randint(1, 600)
+        h = rng.randint(0, ab)
+        doubles, triples, hr = rng.randint(0, h // 4), rng.randint(0, 5), rng.randint(0, 40)
+        sac, sf = rng.randint(0, 10), rng.randint(0, 8)
+        pa = ab + rng.randint(0, 80) + sac + sf
+        values = [
+            i + 1, _player_name(rng), name, f"{h / ab:.3f}", rng.randint(1, 144), pa, ab, rng.randint(0, 110), h,
+            doubles, triples, hr, h + doubles + 2 * triples + 3 * hr, rng.randint(0, 130), sac, sf,
+        ]
+        rows.append((values, player_ids[i]))
+    return rows
+
+
+def pitcher_rows(n, season='2025', team=None, seed=0):
+    """투수 기록 행 n개를 만든다. IP는 '12 1/3' 같은 이닝 표기이다."""
+    rng = random.Random(f"pitchers-{season}-{team}-{seed}")
+    player_ids = rng.sample(range(75000, 100000), n)
+    rows = []
+    for i in range(n):
+        name = team or rng.choice(TEAMS)[1]
+        w, l = rng.randint(0, 18), rng.randint(0, 14)
+        values = [
+            i + 1, _player_name(rng), name, f"{rng.uniform(0, 9):.2f}", rng.randint(1, 70), w, l, rng.randint(0, 40),
+            rng.randint(0, 30), f"{w / (w + l):.3f}" if w + l else '-', _innings(rng), rng.randint(0, 200),
+            rng.randint(0, 30), rng.randint(0, 80), rng.randint(0, 15), rng.randint(0, 200), rng.randint(0, 100),
+            rng.randint(0, 90), f"{rng.uniform(0.8, 2.0):.2f}",
+        ]
+        rows.append((values, player_ids[i]))
+    return rows
+
+
+def ranking_rows(season='2025', seed=0):
+    """팀 순위 10행을 만든다."""
+    rng = random.Random(f"rankings-{season}-{seed}")
+    teams = [name for _, name in TEAMS]
+    rng.shuffle(teams)
+    rows = []
+    lead_wins = None
+    for i, name in enumerate(teams):
+        wins = 90 - i * 4 + rng.randint(-2, 2)
+        draws = rng.randint(0, 4)
+        losses = 144 - wins - draws
+        lead_wins = wins if lead_wins is None else lead_wins
+        last_w = rng.randint(0, 10)
+        rows.append(([
+            i + 1, name, 144, wins, losses, draws, f"{wins / (wins + losses):.3f}",
+            '0' if i == 0 else f"{(lead_wins - wins):.1f}", f"{last_w}승0무{10 - last_w}패",
+            f"{rng.randint(1, 5)}{rng.choice('승패')}", f"{wins // 2}-{draws // 2}-{losses // 2}",
+            f"{wins - wins // 2}-{draws - draws // 2}-{losses - losses // 2}",
+        ], None))
+    return rows
+
+
+def _table_html(columns, rows, category, table_class):
+    head = ''.join(f'<th scope="col">{escape(c)}</th>' for c in columns)
+    body = []
+    link_col = columns.index('선수명') if '선수명' in columns else None
+    for values, player_id in rows:
+        cells = []
+        for j, v in enumerate(values):
+            text = escape(str(v))
+            if j == link_col and player_id is not None:
+                text = f'<a href="{_DETAIL_URLS[category]}?playerId={player_id}">{text}</a>'
+            cells.append(f'<td>{text}</td>')
+        body.append('<tr>' + ''.join(cells) + '</tr>')
+    return (f'<table class="{table_class}" summary="{escape(", ".join(columns))}">'
+            f'<thead><tr>{head}</tr></thead><tbody>{"".join(body)}</tbody></table>')
+
+
+def _pager_html(pages, current):
+    if pages <= 1:
+        return '<div class="paging"></div>'
+    links = []
+
+    def link(suffix, text, cls=''):
+        target = f"{_PREFIX}ucPager${suffix}"
+        cls_attr = f' class="{cls}"' if cls else ''
+        links.append(f'<a id="{_ID_PREFIX}ucPager_{suffix}"{cls_attr} '
+                     f'href="javascript:__doPostBack(&#39;{target}&#39;,&#39;&#39;)">{text}</a>')
+
+    block_start = (current - 1) // 5 * 5 + 1
+    if block_start > 1:
+        link('btnFirst', '&lt;&lt;')
+    for page in range(block_start, min(pages, block_start + 4) + 1):
+        link(f"btnNo{page - block_start + 1}", str(page), 'on' if page == current else '')
+    if block_start + 5 <= pages:
+        link('btnNext', '&gt;')
+    return '<div class="paging">' + ''.join(links) + '</div>'
+
+
+def _select_html(control_id, options, selected, onchange=True):
+    mark = ' selected="selected"'
+    opts = ''.join(
+        f'<option value="{escape(v)}"{mark if v == selected else ""}>{escape(t)}</option>' for v, t in options
+    )
+    js = f' onchange="javascript:setTimeout(&#39;__doPostBack(\\&#39;{control_name(control_id)}\\&#39;,\\&#39;\\&#39;)&#39;, 0)"'
+    return f'<select name="{control_name(control_id)}" id="{control_id}"{js if onchange else ""}>{opts}</select>'
+
+
+def _viewstate(kb, seed, state=None):
+    # state(dict)가 있으면 앞부분에 넣어 둔다. 실제 __VIEWSTATE처럼 postback마다 그대로 되돌아오므로
+    # 재현 서버가 현재 페이지 같은 서버 측 상태를 읽을 수 있다(page_state 참고)
+    rng = random.Random(f"viewstate-{seed}")
+    padding = base64.b64encode(bytes(rng.getrandbits(8) for _ in range(kb * 768))).decode('ascii')
+    if state is None:
+        return padding
+    return base64.urlsafe_b64encode(json.dumps(state, sort_keys=True).encode('utf-8')).decode('ascii') + '.' + padding
+
+
+def page_state(viewstate):
+    """build_record_page(state=...)로 __VIEWSTATE에 넣은 dict를 꺼낸다. 없거나 읽을 수 없으면 빈 dict."""
+    head, sep, _ = (viewstate or '').partition('.')
+    if not sep:
+        return {}
+    try:
+        return json.loads(base64.urlsafe_b64decode(head.encode('ascii')))
+    except ValueError:
+        return {}
+
+
+# ASP.NET이 폼 바로 뒤에 넣는 postback 스크립트 (브라우저 모드에서 드롭다운/페이저가 폼을 제출하게 한다)
+_POSTBACK_SCRIPT = (
+    '<script type="text/javascript">var theForm = document.forms["mainForm"];'
+    'function __doPostBack(eventTarget, eventArgument) {'
+    'if (!theForm.onsubmit || (theForm.onsubmit() != false)) {'
+    'theForm.__EVENTTARGET.value = eventTarget; theForm.__EVENTARGUMENT.value = eventArgument; theForm.submit();}}'
+    '</script>'
+)
+
+
+def _page_html(action, title, controls, content, viewstate_kb, seed, padding_kb, state=None):
+    rng = random.Random(f"padding-{seed}")
+    # 실제 페이지의 메뉴/스크립트 분량을 흉내 내는 채움 html
+    menu = ''.join(
+        f'<li><a href="/Record/Menu{i}.aspx">메뉴 {i} {rng.randint(0, 999)}</a></li>' for i in range(padding_kb * 18)
+    )
+    hidden = (
+        '<div class="aspNetHidden">'
+        '<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />'
+        '<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />'
+        f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{_viewstate(viewstate_kb, seed, state)}" />'
+        '</div><div class="aspNetHidden">'
+        '<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="8E7A1B2C" />'
+        f'<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{_viewstate(1, seed + 1)}" />'
+        '</div>'
+    )
+    return (
+        '<!DOCTYPE html><html lang="ko"><head><meta charset="utf-8" /><title>' + escape(title) + '</title>'
+        '<link href="/css/common.css" rel="stylesheet" /><script src="/WebResource.axd?d=abc&amp;t=1"></script>'
+        '<script src="/ScriptResource.axd?d=def&amp;t=2"></script></head><body>'
+        f'<form method="post" action="{escape(action)}" id="mainForm">{hidden}{_POSTBACK_SCRIPT}'
+        f'<div id="gnb"><ul>{menu}</ul></div><div id="contents">{controls}'
+        f'<div id="{_ID_PREFIX}udpContent">{content}</div></div></form></body></html>'
+    )
+
+
+def build_record_page(category, rows, season='2025', team=None, page=1, page_size=None, seed=0,
+                      viewstate_kb=12, padding_kb=20, state=None):
+    """선수 기록 페이지(hitters/pitchers) html을 만든다.
+
+    rows는 (값 목록, 선수 id) 목록(hitter_rows/pitcher_rows) 또는 행 수이다. page_size를 주면 page쪽의 행만
+    표에 넣고 페이저를 붙인다(없으면 모든 행을 한 표에). state는 __VIEWSTATE에 넣을 dict이다.
+    """
+    if isinstance(rows, int):
+        rows = (hitter_rows if category == 'hitters' else pitcher_rows)(rows, season, team, seed)
+    columns = HITTER_COLUMNS if category == 'hitters' else PITCHER_COLUMNS
+    pages = 1
+    if page_size:
+        pages = max(1, -(-len(rows) // page_size))
+        rows = rows[(page - 1) * page_size:page * page_size]
+    seasons = [(str(y), str(y)) for y in range(max(int(season), 2025), FIRST_SEASON - 1, -1)]
+    team_value = next((v for v, t in TEAMS if t == team), '')
+    controls = (_select_html(SEASON_SELECT_ID, seasons, str(season))
+                + _select_html(TEAM_SELECT_ID, [('', '팀 선택')] + TEAMS, team_value))
+    content = ('<div class="record_result">' + _table_html(columns, rows, category, 'tData01 tt')
+               + _pager_html(pages, page) + '</div>')
+    action = './Basic1.aspx?sort=HRA_RT' if category == 'hitters' else './Basic1.aspx'
+    return _page_html(action, f'KBO {category} {season}', controls, content, viewstate_kb, seed, padding_kb, state)
+
+
+def build_rankings_page(season='2025', seed=0, viewstate_kb=8, padding_kb=20):
+    """팀 순위(TeamRankDaily) 페이지 html을 만든다."""
+    content = '<div class="tbl-type02">' + _table_html(RANKING_COLUMNS, ranking_rows(season, seed), None, 'tData') + '</div>'
+    return _page_html('./TeamRankDaily.aspx', f'KBO 팀 순위 {season}', '', content, viewstate_kb, seed, padding_kb)
+
+
+def fixture_name(category, rows=None):
+    """받아 둔 페이지의 이름. 선수 기록은 표의 행 수(한 쪽 크기)마다 하나씩 둔다."""
+    return category if rows is None else f"{category}-{rows}"
+
+
+def fixture_path(name, directory=FIXTURE_DIR):
+    return os.path.join(directory, f"{name}.html")
+
+
+def recorded_page(name, directory=FIXTURE_DIR):
+    """FIXTURE_DIR에 받아 둔 실제 페이지 html을 반환한다. 없으면 None."""
+    try:
+        with open(fixture_path(name, directory), encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def recorded_sizes(category, directory=FIXTURE_DIR):
+    """category의 받아 둔 페이지들의 행 수 목록 (작은 순)."""
+    sizes = []
+    for path in glob.glob(fixture_path(fixture_name(category, '*'), directory)):
+        rows = os.path.basename(path)[len(category) + 1:-len('.html')]
+        if rows.isdigit():
+            sizes.append(int(rows))
+    return sorted(sizes)
+
+
+def page_fixture(category, rows=None, season='2025', seed=0, directory=FIXTURE_DIR):
+    """category 페이지 html과 출처('recorded'/'synthetic')를 반환한다.
+
+    받아 둔 실제 페이지가 있으면 그것을 쓰고, 없으면 같은 행 수의 합성 페이지를 만든다(팀 순위는 rows 없이).
+    """
+    html = recorded_page(fixture_name(category, rows), directory)
+    if html is not None:
+        return html, 'recorded'
+    if category == 'team_rankings':
+        return build_rankings_page(season, seed), 'synthetic'
+    return build_record_page(category, rows, season, seed=seed), 'synthetic'
+
+
+# 세션마다 달라지는 ASP.NET 폼 상태 값. 같은 길이의 고정 문자열로 바꿔 파싱 비용은 그대로 둔다
+_FORM_STATE_RE = re.compile(
+    r'(<input[^>]*\bname="(?:__VIEWSTATE|__VIEWSTATEGENERATOR|__EVENTVALIDATION)"[^>]*\bvalue=")([^"]*)(")'
+)
+
+
+def sanitize_page(html):
+    """받은 페이지에서 __VIEWSTATE/__EVENTVALIDATION 같은 세션별 폼 상태 값을 같은 길이의 'A'로 바꾼다."""
+    return _FORM_STATE_RE.sub(lambda m: m.group(1) + 'A' * len(m.group(2)) + m.group(3), html)
+
+
+def save_page(name, html, directory=FIXTURE_DIR):
+    """html을 sanitize_page()로 정리해 FIXTURE_DIR에 저장하고 경로를 반환한다."""
+    os.makedirs(directory, exist_ok=True)
+    path = fixture_path(name, directory)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(sanitize_page(html))
+    return path
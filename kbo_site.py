@@ -0,0 +1,67 @@
+"""kbo_site.py
+KBO 기록 페이지의 URL, ASP.NET 컨트롤 ID와 표 파싱/요청 예산 함수처럼 브라우저(crawler.py)와
+HTTP(http_fetcher.py) 수집 모드가 함께 쓰는 것을 모아둔 모듈이다. selenium을 불러오지 않는다.
+"""
+import os
+import time
+
+import pandas as pd
+
+from rate_limiter import report_round_trip
+from table_extractor import extract_record_table, extract_rankings_table
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# 기록 페이지 서버 주소. 부하 시험 때는 replay_server.py 주소(예: http://127.0.0.1:8800)로 바꾼다
+KBO_BASE_URL = os.getenv('KBO_BASE_URL', 'https://www.koreabaseball.com').rstrip('/')
+HITTER_URL = KBO_BASE_URL + '/Record/Player/HitterBasic/Basic1.aspx?sort=HRA_RT'
+PITCHER_URL = KBO_BASE_URL + '/Record/Player/PitcherBasic/Basic1.aspx'
+TEAM_RANK_URL = KBO_BASE_URL + '/Record/TeamRank/TeamRankDaily.aspx'
+
+# ASP.NET 컨트롤 ID (name 속성은 'ctl00$ctl00$ctl00$cphContents$...' 형태)
+SEASON_SELECT_ID = 'cphContents_cphContents_cphContents_ddlSeason_ddlSeason'
+TEAM_SELECT_ID = 'cphContents_cphContents_cphContents_ddlTeam_ddlTeam'
+RECORD_RESULT_SELECTOR = '#cphContents_cphContents_cphContents_udpContent > div.record_result'
+RECORD_TABLE_SELECTOR = RECORD_RESULT_SELECTOR + ' > table'
+
+# 팀별로 나눠 수집하는 선수 기록 카테고리
+CATEGORY_URLS = {
+    'hitters': HITTER_URL,
+    'pitchers': PITCHER_URL,
+}
+
+
+def record_table_from_html(html):
+    """기록 페이지 html(또는 lxml 트리)에서 선수 기록 표를 찾아 DataFrame으로 반환한다. 표가 없으면 None."""
+    return extract_record_table(html)
+
+
+def rankings_table_from_html(html, season):
+    """팀 순위 페이지 html(또는 lxml 트리)에서 순위 표를 찾아 DataFrame으로 반환한다."""
+    # 여러 가능한 선택자를 시도해서 테이블을 찾음 (rank_result > table, table.tData, 첫 번째 table)
+    df = extract_rankings_table(html)
+    if df is None:
+        return pd.DataFrame()
+
+    # 표 헤더 차이에 대비: '팀명' -> '팀' 등
+    if '팀명' in df.columns and '팀' not in df.columns:
+        df = df.rename(columns={'팀명': '팀'})
+    if '게임차' in df.columns and 'GB' not in df.columns:
+        # leave both names; db layer accepts '게임차' too
+        pass
+    # 표에 연도 컬럼이 없다면 추가
+    df['year'] = int(season)
+    return df
+
+
+def round_trip(sleep_fn, action):
+    """sleep_fn으로 요청 예산을 쓴 뒤 서버 왕복 action()을 실행하고, 응답 시간을 sleep_fn(RateLimiter)에 보고한다."""
+    sleep_fn()
+    start = time.monotonic()
+    ok = False
+    try:
+        result = action()
+        ok = True
+        return result
+    finally:
+        report_round_trip(sleep_fn, time.monotonic() - start, ok)
@@ -1,385 +1,406 @@
-import urllib.robotparser
-import urllib.parse
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+"""main.py
+KBO 기록 크롤러 실행 파일이다. import만으로는 아무 일도 하지 않으며, pandas/selenium/psycopg2 같은 무거운 모듈은
+명령이 필요로 할 때 불러온다.
+
+    python main.py                        # crawl과 같다 (cron 호환)
+    python main.py crawl [--season 2025] [--force] [--out DIR] [--profile [DIR]]
+    python main.py load FILE [FILE ...]   # crawl --out으로 저장한 파일을 DB에 저장
+    python main.py schema                 # 테이블 생성/갱신
+    python main.py stats [--season 2025]  # 연도별 저장 건수
+    python main.py daemon [--browsers N]  # 세션을 살려 둔 수집 데몬 실행 (crawl_daemon.py)
+    python main.py submit [--season 2025] [--force] [--wait]  # 실행 중인 데몬에 수집 작업 요청
+"""
+import argparse
 import os
-import ssl
-import urllib.request as urlreq
-import time
-import pandas as pd
-from selenium.webdriver.support.ui import Select, WebDriverWait
-from bs4 import BeautifulSoup
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-import subprocess
-import re
+import os.path
+from collections import namedtuple
 from datetime import datetime
 
-# Load environment variables from .env when present (local development convenience)
-from dotenv import load_dotenv
-import os.path
+# 메인 크롤링 로직 - 현재 시즌(2025)만 수집
+CURRENT_SEASON = "2025"  # 🎯 현재 시즌만!
+
+Settings = namedtuple('Settings', ['fetch_mode', 'workers', 'rps', 'burst', 'force', 'journal_max_age_hours'])
+
+
+def load_env():
+    """.env 파일이 있으면 환경 변수로 읽어 온다. (로컬 개발 편의용)"""
+    from dotenv import load_dotenv
+
+    # 현재 디렉토리의 절대 경로
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    load_dotenv(os.path.join(current_dir, '.env'))
+
+
+def load_settings():
+    """🛡️ 크롤링 에티켓 설정을 환경 변수에서 읽는다."""
+    return Settings(
+        # 수집 모드: 'http'(기본, 브라우저 없이 postback 재현) 또는 'browser'(Selenium)
+        fetch_mode=os.getenv('FETCH_MODE', 'http').lower(),
+        # 동시에 여는 세션(브라우저/HTTP) 수
+        workers=int(os.getenv('CRAWL_WORKERS', '1')),
+        # 모든 세션이 공유하는 서버 요청 예산: 초당 요청 수와 한 번에 몰아 보낼 수 있는 요청 수.
+        # 응답이 느려지거나 오류가 나면 자동으로 감속한다.
+        rps=float(os.getenv('CRAWL_RPS', '2.0')),
+        burst=int(os.getenv('CRAWL_BURST', '2')),
+        # 참이면 변경 확인(probe/페이지 digest)을 무시하고 모든 데이터를 다시 저장한다
+        force=os.getenv('CRAWL_FORCE', 'False').lower() in ('true', '1', 't'),
+        # 중단된 실행을 이어받을 수 있는 시간(시간 단위). 이보다 오래된 저널 기록은 버린다
+        journal_max_age_hours=float(os.getenv('JOURNAL_MAX_AGE_HOURS', '12')),
+    )
 
-# 현재 디렉토리의 절대 경로
-current_dir = os.path.dirname(os.path.abspath(__file__))
-# .env 파일 절대 경로
-env_path = os.path.join(current_dir, '.env')
-load_dotenv(env_path)
 
-# optional app modules (present in repo)
-try:
-    from crawler import collect_current_season, collect_pitchers_season, collect_team_rankings_season
-    from db import (
-        get_conn,
-        create_tables,
-        count_hitters_by_year,
-        count_pitchers_by_year,
-        count_team_rankings_by_year,
-        df_to_hitters_table,
-        df_to_pitchers_table,
-        df_to_team_rankings_table,
-    )
-except Exception:
-    # allow running without DB modules for quick CSV-only tests
-    collect_current_season = None
-    collect_pitchers_season = None
-    collect_team_rankings_season = None
-    df_to_hitters_table = None
-    df_to_pitchers_table = None
-    df_to_team_rankings_table = None
-    get_conn = None
-    create_tables = None
-    count_hitters_by_year = None
-    count_pitchers_by_year = None
-    count_team_rankings_by_year = None
-
-# 🛡️ 크롤링 에티켓 설정
-DELAY_BETWEEN_REQUESTS = 2.0
-USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-
-
-def check_robots_txt(url: str) -> bool:
-    """주어진 URL에 대해 robots.txt를 확인하고 크롤링 허용 여부를 반환한다.
-
-    SSL 인증서 검증 오류가 발생하면 검증을 비활성화하고 robots.txt를 가져와 파싱한다.
+def open_browser(settings):
+    """크롬 브라우저를 실행하고 대상 페이지에 접속한 드라이버를 반환한다. (브라우저 풀의 워커마다 호출됨)"""
+    from browser import create_driver, open_page
+    from kbo_site import HITTER_URL
+
+    print("\n🚀 3단계: 크롬 브라우저 실행")
+    print("   💻 자동화된 크롬 브라우저를 실행한다...")
+    # 여러 세션을 동시에 띄울 때는 항상 headless로 실행
+    driver = create_driver(headless=True if settings.workers > 1 else None)
+    print("   ✅ 크롬 브라우저가 성공적으로 실행됨!")
+    print("   💡 Chrome DevTools 메시지는 정상적인 브라우저 실행 로그이다 (무시해도 됨)")
+
+    print(f"\n🌐 4단계: KBO 공식 홈페이지 접속")
+    print(f"   🔗 접속 중: {HITTER_URL}")
+    # robots.txt 확인 통과 후에만 접속
+    open_page(driver, HITTER_URL)
+    print("   ✅ KBO 타자 기록 페이지에 성공적으로 접속!")
+    return driver
+
+
+def crawl(settings, season, state=None, journal=None, sink=None, warm=None):
+    """FETCH_MODE에 따라 HTTP 또는 브라우저 세션 풀로 season의 모든 카테고리를 수집한다.
+
+    HTTP 수집에서 다시 시도해도 실패한 작업 단위는 브라우저 풀로 다시 수집한다. 반환값은 {category: DataFrame}.
+    state(CrawlState)를 넘기면 지난 저장 이후 바뀐 페이지의 행만 반환한다.
+    journal(CrawlJournal)을 넘기면 이전 실행에서 끝난 작업 단위는 다시 수집하지 않는다.
+    sink(unit, df)를 넘기면 팀 하나가 끝날 때마다 결과를 바로 넘긴다(pipeline.StreamWriter.put).
+    warm({mode: crawl_pool.WarmSessions})을 넘기면 세션을 새로 열지 않고 보관 중인 세션을 빌려 쓴다(crawl_daemon.py).
+    """
+    from crawl_pool import CATEGORIES, crawl_categories
+    from rate_limiter import RateLimiter
+
+    limiter = RateLimiter(settings.rps, settings.burst)
+    modes = ['http', 'browser'] if settings.fetch_mode == 'http' else ['browser']
+    frames = crawl_categories([season], CATEGORIES, modes, settings.workers, limiter,
+                              lambda: open_browser(settings), state, journal, sink, warm)
+    print(f"   ⏱️ 서버 요청 {limiter.requests}회, 예산 대기 {limiter.waited:.1f}초, 오류 {limiter.errors}회, 최종 속도 {limiter.rate:.2f} req/s")
+    return frames
+
+
+def fetch_rankings(settings, season, warm=None):
+    """FETCH_MODE에 맞는 방법으로 season 팀 순위표를 한 번 받는다(crawl_state.CrawlState.probe_rankings용).
+
+    브라우저 모드에서 warm({mode: crawl_pool.WarmSessions})이 있으면 보관 중인 드라이버를 빌려 쓴다.
     """
+    from rate_limiter import RateLimiter
+
+    limiter = RateLimiter(settings.rps, settings.burst)
+    if settings.fetch_mode == 'http':
+        from http_fetcher import collect_team_rankings_season_http
+
+        return collect_team_rankings_season_http(season, limiter)
+
+    from crawler import collect_team_rankings_season
+
+    pool = (warm or {}).get('browser')
+    driver = pool.checkout(limiter) if pool is not None else open_browser(settings)
     try:
-        parsed = urllib.parse.urlparse(url)
-        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-        print(f"🔍 웹 크롤링 허가 확인: {robots_url}")
-        print("   📖 robots.txt 파일을 읽어서 크롤링이 허용되는지 확인하는 중...")
+        return collect_team_rankings_season(driver, season, limiter)
+    finally:
+        if pool is not None:
+            pool.checkin(driver)
+        else:
+            driver.quit()
+
+
+def print_preview(df):
+    try:
+        print(f"\n📋 수집된 데이터 미리보기 (상위 10명):")
+        print("=" * 80)
+        print(df.head(10).to_string(index=False))
+    except Exception:
+        print(df.head(10))
+
 
-        rp = urllib.robotparser.RobotFileParser()
-        rp.set_url(robots_url)
+def crawl_and_load(settings, season, state=None, journal=None, warm=None):
+    """수집과 DB 저장을 겹쳐서 진행한다. 팀 하나가 끝날 때마다 저장 스레드가 batch로 upsert하고,
+    모든 카테고리를 한 트랜잭션으로 커밋한다. 반환값은 {category: DataFrame(비어 있음)}."""
+    from crawl_pool import CATEGORIES
+    import metrics
+    from crawl_state import PROBE_CATEGORY
+    from db import load_session, create_tables, UpsertCounts
+    from pipeline import StreamWriter
+
+    print('\n🔁 DB 연결 시도 중...')
+    written = []
+    with load_session() as session:
         try:
-            rp.read()
+            create_tables(session.conn)
         except Exception as e:
-            # SSL 인증서 문제 등으로 rp.read()가 실패할 수 있음 -> 비검증으로 재시도
-            try:
-                print(f"   ⚠️ robots.txt 읽기 중 SSL 오류 발생({e}), 인증서 검증을 비활성화하고 재시도한다...")
-                data = urlreq.urlopen(robots_url, context=ssl._create_unverified_context(), timeout=10).read().decode('utf-8')
-                rp.parse(data.splitlines())
-            except Exception as e2:
-                print(f"   ❌ robots.txt를 가져오지 못함: {e2}")
-                raise
-
-        can_fetch = rp.can_fetch("*", url)
-        if can_fetch:
-            print(f"✅ 크롤링 허가 확인 완료!")
-        else:
-            print(f"❌ robots.txt가 이 URL의 크롤링을 금지한다: {robots_url}")
-        return can_fetch
-    except Exception as e:
-        print(f"⚠️  robots.txt 확인 중 오류 발생: {e}")
-        print("   💭 인터넷 연결을 확인하거나 수동으로 robots.txt를 확인해 볼 것")
-        return False
-
-
-print("🤖 KBO 타자 기록 크롤러를 시작한다!")
-print("📊 2025년 현재 시즌 모든 팀의 타자 기록을 수집한다")
-print("🎯 교육/연구 목적으로만 사용")
-print("=" * 60)
-
-# 크롤링 대상 URL
-target_url = 'https://www.koreabaseball.com/Record/Player/HitterBasic/Basic1.aspx?sort=HRA_RT'
-
-print("\n🚨 1단계: 크롤링 허가 확인")
-print("   💡 웹사이트의 robots.txt를 확인해서 크롤링이 허용되는지 검사한다")
-
-# 🚨 robots.txt 강제 확인
-if not check_robots_txt(target_url):
-    print("\n🛑 크롤링 중단 중")
-    print("📖 자세한 내용: https://www.koreabaseball.com/robots.txt")
-    exit(1)  # 프로그램 강제 종료
-
-print("\n⏰ 2단계: 안전한 크롤링 설정")
-print("   🛡️  KBO 서버에 무리가 가지 않도록 요청 간격을 2초로 설정한다")
-print("   🌐 정상적인 웹브라우저로 인식되도록 User-Agent를 설정한다")
-
-# 크롬 옵션 설정
-chrome_options = Options()
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-chrome_options.add_argument(f"--user-agent={USER_AGENT}")
-
-# EC2나 서버 환경에서는 Headless 모드로 실행 (UI 없이 백그라운드 실행)
-is_headless = os.getenv('HEADLESS', 'False').lower() in ('true', '1', 't')
-if is_headless:
-    print("   🖥️ Headless 모드로 실행한다 (서버/EC2 환경용)")
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
-
-print("\n🚀 3단계: 크롬 브라우저 실행")
-print("   💻 자동화된 크롬 브라우저를 실행한다...")
-
-# 크롬드라이버 실행 - ChromeDriverManager를 사용, 로컬 Chrome 버전에서 major 추출해 시도
-chromedriver_path_env = os.getenv('CHROMEDRIVER_PATH')
-print(f"   🧪 디버그: CHROMEDRIVER_PATH env raw repr: {repr(chromedriver_path_env)}")
-if chromedriver_path_env:
-    print(f"   🧪 디버그: os.path.exists -> {os.path.exists(chromedriver_path_env)}")
-else:
-    # fallback to project drivers folder if .env wasn't read for any reason
-    local_drv = os.path.join(os.getcwd(), 'drivers', 'chromedriver.exe')
-    if os.path.exists(local_drv):
-        chromedriver_path_env = local_drv
-        print(f"   🧪 디버그: .env 미탐지, 로컬 드라이버 경로 사용 -> {chromedriver_path_env}")
-    else:
-        print(f"   🧪 디버그: 로컬 드라이버도 없음: {local_drv}")
-
-try:
-    svc = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=svc, options=chrome_options)
-    print("   ✅ webdriver-manager로 드라이버 설치/실행 성공")
-except Exception as e_wdm:
-    print(f"   ⚠️ webdriver-manager 실패: {e_wdm}")
-    # CHROMEDRIVER_PATH 있으면 시도
-    if chromedriver_path_env and os.path.exists(chromedriver_path_env):
-        try:
-            svc = Service(chromedriver_path_env)
-            driver = webdriver.Chrome(service=svc, options=chrome_options)
-            print("   ✅ CHROMEDRIVER_PATH에 있는 드라이버로 실행 성공")
-        except Exception as e_env:
-            print(f"   ❌ CHROMEDRIVER_PATH 드라이버 실행 실패: {e_env}")
-            raise RuntimeError("chromedriver 실행 실패. CHROMEDRIVER_PATH를 확인할 것.")
-    else:
-        # 시도: 로컬 chrome 실행파일에서 버전 추출하고 major로 설치 시도
-        chrome_candidates = [
-            os.getenv('CHROME_PATH'),
-            r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-            r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
-        ]
-        chrome_version = None
-        for c in chrome_candidates:
-            if not c:
+            print('   ⚠️ 테이블 생성/확인 실패:', e)
+            session.conn.rollback()
+
+        print(f"\n🗓️  {season}시즌 데이터 수집을 시작한다 (수집과 저장을 함께 진행)...")
+        # --profile이면 단계별 메모리가 섞이지 않도록 저장도 수집 스레드에서 한다
+        with StreamWriter(session, background=not metrics.profiling()) as writer:
+            frames = crawl(settings, season, state, journal, writer.put, warm)
+
+        print(f"\n📊 6단계: 수집 결과 정리 및 저장")
+        if 'hitters' in writer.preview:
+            print_preview(writer.preview['hitters'])
+        for category in CATEGORIES:
+            if category not in frames:
+                print(f'   ⚠️ {category} 수집 실패: 일부 팀만 저장되었을 수 있음')
                 continue
-            try:
-                if os.path.exists(c):
-                    out = subprocess.check_output([c, '--version'], stderr=subprocess.STDOUT, timeout=5)
-                    s = out.decode('utf-8', errors='ignore')
-                    m = re.search(r"(\d+)(?:\.\d+)*", s)
-                    if m:
-                        chrome_version = m.group(0)
-                        break
-            except Exception:
+            if category in writer.errors:
                 continue
+            c = writer.counts.get(category, UpsertCounts(0, 0, 0))
+            print(f"   ✅ DB: {category} 테이블 저장 완료 (신규 {c.inserted}건, 변경 {c.updated}건, 변경 없음 {c.unchanged}건)")
+            written.append(category)
+    print('   ✅ DB: 모든 카테고리를 한 트랜잭션으로 커밋함')
+    if state is not None and state.skipped_pages:
+        print(f"   ♻️ 지난 저장 이후 그대로인 {state.skipped_pages}개 페이지는 저장을 건너뜀")
+
+    # DB 커밋이 끝난 카테고리의 digest만 기록 (모두 저장되었을 때만 probe도 기록)
+    if state is not None:
+        if len(written) == len(CATEGORIES):
+            written.append(PROBE_CATEGORY)
+        state.commit(written)
+    # 모든 카테고리가 저장되었으면 저널은 더 이상 필요 없다
+    if journal is not None and len(written) >= len(CATEGORIES):
+        journal.clear()
+    return frames
+
+
+def save_frames(frames, season, out_dir):
+    """수집 결과를 out_dir/<category>_<season>.pkl로 저장한다(열 타입 유지). 나중에 load 명령으로 DB에 저장한다."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for category, df in frames.items():
+        path = os.path.join(out_dir, f"{category}_{season}.pkl")
+        df.to_pickle(path)
+        paths.append(path)
+        print(f"   💾 {category}: {len(df)}건 -> {path}")
+    return paths
+
+
+def run_crawl(settings, season=CURRENT_SEASON, out_dir=None, warm=None, check_robots=True, keep_pool=False,
+              profile_dir=None):
+    """1~6단계 크롤링을 실행한다. out_dir가 있으면 DB 대신 파일로 저장한다. 성공하면 0을 반환한다.
+
+    crawl_daemon.py는 robots.txt를 직접 확인하고(check_robots=False), 세션(warm)과 DB 연결 풀(keep_pool)을 작업 사이에 유지한다.
+    실행이 끝나면(예외가 나도) 단계별 소요 시간을 JSON 실행 보고서와 Prometheus textfile로 남긴다(metrics.py).
+    profile_dir가 있으면 단계별 cProfile/tracemalloc 보고서를 그 디렉토리에 남긴다(profiler.py).
+    """
+    import time
+    import metrics
 
-        if chrome_version:
-            major = chrome_version.split('.')[0]
-            try:
-                print(f"   ℹ️ 로컬 Chrome 버전 감지: {chrome_version}, major={major} -> 해당 major용 드라이버 설치 시도")
-                svc = Service(ChromeDriverManager(version=major).install())
-                driver = webdriver.Chrome(service=svc, options=chrome_options)
-                print("   ✅ webdriver-manager(major)로 드라이버 설치/실행 성공")
-            except Exception as e_major:
-                print(f"   ⚠️ webdriver-manager(major) 실패: {e_major}")
-                raise RuntimeError("chromedriver를 찾을 수 없음. chromedriver를 설치하거나 CHROMEDRIVER_PATH를 설정할 것.")
-        else:
-            raise RuntimeError("chromedriver를 찾을 수 없음. chromedriver를 설치하거나 CHROMEDRIVER_PATH를 설정할 것.")
-
-driver.implicitly_wait(10)
-
-wait = WebDriverWait(driver, 10)
-
-print("   ✅ 크롬 브라우저가 성공적으로 실행됨!")
-print("   💡 Chrome DevTools 메시지는 정상적인 브라우저 실행 로그이다 (무시해도 됨)")
-
-print(f"\n🌐 4단계: KBO 공식 홈페이지 접속")
-print(f"   🔗 접속 중: {target_url}")
-
-# robots.txt 확인 통과 후에만 접속
-driver.get(target_url)
-
-# 일부 사이트는 접속 직후 동의/쿠키/팝업 창이 떠서 자동화가 멈춤.
-# 자주 등장하는 알람과 동의 버튼을 자동으로 닫아 진행을 도움.
-try:
-    # 짧게 대기 후 JS alert가 있는지 확인
-    time.sleep(0.8)
-    alert = driver.switch_to.alert
-    alert_text = alert.text if hasattr(alert, 'text') else ''
-    alert.accept()
-    print(f"   ✅ 페이지의 JS alert를 수락함: {alert_text}")
-except Exception:
-    # 알럿이 없으면 무시
-    pass
-
-# 흔한 동의/쿠키 버튼들을 XPath로 시도해서 클릭
-popup_xpaths = [
-    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'동의')]",
-    "//button[contains(., '확인')]",
-    "//button[contains(., '동의함')]",
-    "//button[contains(., '수락')]",
-    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'agree')]",
-    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'accept')]",
-    "//button[contains(., '닫기')]",
-]
-for xp in popup_xpaths:
+    metrics.reset()
+    profiler = None
+    if profile_dir is not None:
+        from profiler import StageProfiler
+
+        profiler = StageProfiler(profile_dir).start()
+    started = time.time()
+    code = 1
     try:
-        el = driver.find_element(By.XPATH, xp)
-        el.click()
-        print(f"   ✅ 팝업 버튼을 클릭함 (XPath): {xp}")
-        time.sleep(0.6)
-        break
-    except Exception:
-        continue
-
-# 디버깅용 스크린샷 기능 제거됨
-
-print("   ✅ KBO 타자 기록 페이지에 성공적으로 접속!")
-
-# 🛡️ 안전한 대기 함수
-def safe_sleep():
-    """서버 부하 방지를 위한 적절한 대기"""
-    time.sleep(DELAY_BETWEEN_REQUESTS)
-    print("     ⏳ 서버 부하 방지를 위해 2초 대기 중...")
-
-def create_table(driver):
-    kbo_page = driver.page_source
-    soup = BeautifulSoup(kbo_page, 'html.parser')
-    table = soup.select_one('#cphContents_cphContents_cphContents_udpContent > div.record_result > table')
-    table = pd.read_html(str(table), flavor='html5lib')[0]
-    return table
-
-def team_list(driver):
-    safe_sleep()
-    combobox = driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ddlTeam_ddlTeam')
-    safe_sleep()
-    options = combobox.find_elements(By.TAG_NAME, 'option')[1:]
-    teams = [option.text for option in options]
-    return teams
-
-def page_click(driver):
-    df1 = create_table(driver)
-    page_count = len(driver.find_elements(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_udpContent > div.record_result > div > a'))
-    if page_count > 1:
-        print("     📄 2페이지가 있어서 추가로 수집한다...")
-        driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ucPager_btnNo2').click()
-        df2 = create_table(driver)
-        safe_sleep()
-        driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ucPager_btnNo1').click()
-        df = pd.concat([df1, df2])
+        code = _run_crawl(settings, season, out_dir, warm, check_robots, keep_pool)
+        return code
+    finally:
+        report = metrics.run_report(started, time.time(), code, command='crawl', season=season,
+                                    fetch_mode=settings.fetch_mode, workers=settings.workers)
+        metrics.write_run_report(report)
+        print(f"\n⏱️ 단계별 소요 시간 (총 {report['duration_seconds']:.1f}초)")
+        for line in metrics.summary_lines(report):
+            print(f"   {line}")
+        if profiler is not None:
+            paths = profiler.finish(report)
+            print(f"\n🔬 프로파일 결과: {profile_dir} ({len(paths)}개 파일)")
+            for line in profiler.summary_lines():
+                print(f"   {line}")
+
+
+def _run_crawl(settings, season, out_dir, warm, check_robots, keep_pool):
+    from http_fetcher import check_robots_txt
+    from kbo_site import HITTER_URL, KBO_BASE_URL
+
+    print("🤖 KBO 타자 기록 크롤러를 시작한다!")
+    print(f"📊 {season}년 시즌 모든 팀의 타자 기록을 수집한다")
+    print("🎯 교육/연구 목적으로만 사용")
+    print("=" * 60)
+
+    print("\n🚨 1단계: 크롤링 허가 확인")
+    print("   💡 웹사이트의 robots.txt를 확인해서 크롤링이 허용되는지 검사한다")
+
+    # 🚨 robots.txt 강제 확인
+    if check_robots and not check_robots_txt(HITTER_URL):
+        print("\n🛑 크롤링 중단 중")
+        print(f"📖 자세한 내용: {KBO_BASE_URL}/robots.txt")
+        return 1
+
+    print("\n⏰ 2단계: 안전한 크롤링 설정")
+    print(f"   🛡️  KBO 서버에 무리가 가지 않도록 모든 세션의 요청을 초당 {settings.rps}회(최대 {settings.burst}회 연속) 이하로 제한한다")
+    print("   🐢 응답이 느려지거나 오류가 나면 요청 속도를 자동으로 줄인다")
+    print("   🌐 정상적인 웹브라우저로 인식되도록 User-Agent를 설정한다")
+
+    print(f"\n📅 5단계: 데이터 수집 시작")
+    print(f"   🎯 수집 대상: {season}시즌 KBO 전체 팀 타자/투수 기록과 팀 순위")
+    if settings.fetch_mode == 'http':
+        print("   ⚡ HTTP 모드: 브라우저 없이 ASP.NET postback을 직접 요청한다")
     else:
-        df = df1
-    return df 
+        print("   🌐 브라우저 모드: 크롬으로 드롭다운/페이저를 조작한다")
+    print(f"   🧵 동시 세션 {settings.workers}개, 전체 요청 예산 초당 {settings.rps}회")
+
+    from crawl_journal import CrawlJournal
+    from crawl_state import CrawlState
+
+    # 지난 실행 이후 바뀐 것만 저장하기 위한 수집 상태 (SQLite). 파일로 저장할 때는 전체를 수집한다
+    # --force면 비교 없이 전체를 저장하되 digest는 새로 기록한다
+    state = CrawlState(force=settings.force) if out_dir is None else None
+    run_needed = True
+    if state is not None and not settings.force:
+        if season != CURRENT_SEASON:
+            # 팀 순위표는 현재 시즌 순위만 보여 주므로 지난 시즌과 비교할 수 없다
+            print(f"\n🔎 {season}시즌은 현재 시즌이 아니라 변경 확인 없이 수집한다 (바뀐 페이지만 저장)")
+        else:
+            print("\n🔎 팀 순위표로 지난 실행 이후 경기 결과가 바뀌었는지 확인한다...")
+            try:
+                run_needed = state.probe_rankings(season, lambda s: fetch_rankings(settings, s, warm))
+            except Exception as e:
+                print(f"   ⚠️ 변경 확인 실패({e}): 전체 수집을 진행한다")
 
-# 메인 크롤링 로직 - 현재 시즌(2025)만 수집
-dfs = []
-current_season = "2025"  # 🎯 현재 시즌만!
-
-print(f"\n📅 5단계: 데이터 수집 시작")
-print(f"   🎯 수집 대상: {current_season}시즌 KBO 전체 팀 타자 기록")
-
-print(f"\n🗓️  {current_season}시즌 데이터 수집을 시작한다...")
-safe_sleep()
-
-# 시즌 선택
-season_combo = driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ddlSeason_ddlSeason')
-season_combo = Select(season_combo)
-season_combo.select_by_value(current_season)
-teams = team_list(driver)
-
-print(f"⚾ 발견된 팀 목록: {len(teams)}개")
-print(f"   📋 {', '.join(teams)}")
-print(f"\n🔄 각 팀별로 선수 기록을 차례대로 수집한다...")
-
-for team_idx, team in enumerate(teams, 1):
-    print(f"\n   🏟️  [{team_idx:2d}/{len(teams)}] {team} 팀 선수 기록 수집 중...")
-    safe_sleep()
-    
-    combobox = driver.find_element(By.CSS_SELECTOR, '#cphContents_cphContents_cphContents_ddlTeam_ddlTeam')
-    team_combo = Select(combobox)
-    team_combo.select_by_visible_text(team)
-    safe_sleep()
-    
-    df = page_click(driver)
-    df['year'] = current_season
-    dfs.append(df)
-    print(f"     ✅ {team} 팀 {len(df)}명 선수 기록 수집 완료!")
-
-# 결과 처리
-print(f"\n📊 6단계: 수집 결과 정리 및 저장")
-if dfs:
-    result = pd.concat(dfs, ignore_index=True)
-    print(f"✅ 데이터 수집 성공!")
-    print(f"   📈 총 {len(result)}명의 선수 기록을 수집 완료 ({current_season}시즌)")
+    # 끝난 작업 단위를 기록하는 재시작용 저널 (중간에 죽으면 다음 실행이 이어받는다)
+    journal = CrawlJournal(f"daily-{season}", max_age=settings.journal_max_age_hours * 3600)
+    if run_needed and journal.pending_units():
+        print(f"   ♻️ 중단된 이전 실행에서 끝난 작업 단위 {journal.pending_units()}개를 이어받는다")
 
+    code = 0
     try:
-        print(f"\n📋 수집된 데이터 미리보기 (상위 10명):")
-        print("=" * 80)
-        print(result.head(10).to_string(index=False))
-    except Exception:
-        print(result.head(10))
+        if not run_needed:
+            print(f"\n📊 6단계: 수집 결과 정리 및 저장")
+            print("✅ 지난 실행 이후 바뀐 경기 결과가 없어 수집/저장을 건너뜀 (CRAWL_FORCE=true 또는 --force로 강제 실행)")
+        elif out_dir is None:
+            # DB 저장: 환경 변수로 Postgres가 설정되어 있으면 수집하면서 바로 업서트
+            from db import close_pool
 
-    # DB 저장 시도: 환경 변수로 Postgres가 설정되어 있으면 자동으로 업서트
-    if df_to_hitters_table and get_conn:
-        try:
-            print('\n🔁 DB 연결 시도 중...')
-            conn = get_conn()
             try:
-                create_tables(conn)
-            except Exception:
-                # create_tables 내부에서 커밋하므로 실패해도 계속
-                pass
-            conn.close()
+                crawl_and_load(settings, season, state, journal, warm)
+            except Exception as e_conn:
+                print('   ⚠️ DB 연결/저장 실패:', e_conn)
+                code = 1
+            finally:
+                if not keep_pool:
+                    close_pool()
+        else:
+            # 파일로 저장: DB 없이 수집만 하고 결과를 남긴다
+            print(f"\n🗓️  {season}시즌 데이터 수집을 시작한다...")
+            from crawl_pool import CATEGORIES
+
+            frames = crawl(settings, season, None, journal, warm=warm)
+            result = frames.get('hitters')
+            print(f"\n📊 6단계: 수집 결과 정리 및 저장")
+            if result is not None and len(result) > 0:
+                print(f"✅ 데이터 수집 성공!")
+                print(f"   📈 총 {len(result)}명의 선수 기록을 수집 완료 ({season}시즌)")
+                print_preview(result)
+            # 끝까지 실패한 카테고리가 있어도 수집된 카테고리는 저장한다(저널이 남아 다음 실행이 나머지를 이어받는다)
+            save_frames(frames, season, out_dir)
+            missing = [category for category in CATEGORIES if category not in frames]
+            if missing:
+                print(f"❌ 오류: {', '.join(missing)} 수집 실패")
+                print('   💭 인터넷 연결이나 KBO 홈페이지 상태를 확인해볼 것')
+                code = 1
+            elif result is None or len(result) == 0:
+                print('❌ 오류: 데이터가 수집되지 않았음.')
+                print('   💭 인터넷 연결이나 KBO 홈페이지 상태를 확인해볼 것')
+                code = 1
+            else:
+                journal.clear()
+    finally:
+        if state is not None:
+            state.close()
+        journal.close()
+
+    print(f"\n🏁 크롤링 완료!")
+    if code == 0:
+        print(f"   ✅ 모든 작업이 성공적으로 완료됨!")
+        print(f"   🎉 {season}시즌 KBO 기록을 성공적으로 수집함!")
+    return code
+
+
+def run_load(paths):
+    """crawl --out으로 저장한 <category>_<season>.pkl 파일들을 한 트랜잭션으로 DB에 저장한다."""
+    import pandas as pd
+    from db import load_session, create_tables, close_pool, WRITERS
+
+    try:
+        with load_session() as session:
+            create_tables(session.conn)
+            for path in paths:
+                category = os.path.basename(path).rsplit('.', 1)[0].rsplit('_', 1)[0]
+                if category not in WRITERS:
+                    print(f"   ⚠️ 카테고리를 알 수 없는 파일: {path}")
+                    return 1
+                c = session.write(category, pd.read_pickle(path))
+                print(f"   ✅ DB: {category} 테이블 저장 완료 (신규 {c.inserted}건, 변경 {c.updated}건, 변경 없음 {c.unchanged}건)")
+    finally:
+        close_pool()
+    print('   ✅ DB: 모든 파일을 한 트랜잭션으로 커밋함')
+    return 0
+
+
+def run_schema():
+    """테이블을 생성하거나 빠진 컬럼을 추가한다."""
+    from db import pooled_conn, create_tables, close_pool
+
+    try:
+        with pooled_conn() as conn:
+            create_tables(conn)
+    finally:
+        close_pool()
+    print("✅ 테이블 생성/확인 완료")
+    return 0
+
+
+def run_stats(season=CURRENT_SEASON):
+    """season에 저장된 카테고리별 레코드 수를 출력한다."""
+    from db import (
+        pooled_conn,
+        close_pool,
+        count_hitters_by_year,
+        count_pitchers_by_year,
+        count_team_rankings_by_year,
+    )
+
+    try:
+        with pooled_conn() as conn:
+            print(f"📊 {season}시즌 저장 현황")
+            print(f"   hitters: {count_hitters_by_year(conn, season)}건")
+            print(f"   pitchers: {count_pitchers_by_year(conn, season)}건")
+            print(f"   team_rankings: {count_team_rankings_by_year(conn, season)}건")
+    finally:
+        close_pool()
+    return 0
+
+
+def run_submit(season=CURRENT_SEASON, force=False, wait=False, addr=None):
+    """실행 중인 수집 데몬에 작업을 보내고 응답을 출력한다. wait이면 작업이 끝날 때까지 기다린다."""
+    import json
+    import crawl_daemon
+
+    payload = {'cmd': 'crawl', 'season': season, 'force': force, 'wait': wait}
+    try:
+        response = crawl_daemon.request(payload, addr or crawl_daemon.DAEMON_ADDR)
+    except OSError as e:
+        print(f"❌ 수집 데몬에 연결할 수 없음({e}). python main.py daemon으로 먼저 실행할 것")
+        return 1
+    print(json.dumps(response, ensure_ascii=False))
+    if not response.get('ok'):
+        return 1
+    return 1 if wait and response['job']['state'] != 'done' else 0
 
-            # 히터 저장
-            try:
-                n = df_to_hitters_table(result)
-                print(f"   ✅ DB: hitters 테이블에 {n}건 저장(업서트) 완료")
-            except Exception as e:
-                print('   ⚠️ DB에 hitters 저장 실패:', e)
-
-            # 투수/팀 데이터는 crawler 모듈의 함수로 수집하여 저장
-            if collect_pitchers_season:
-                try:
-                    pitchers_df = collect_pitchers_season(driver, current_season, safe_sleep)
-                    if pitchers_df is not None and len(pitchers_df) > 0:
-                        m = df_to_pitchers_table(pitchers_df)
-                        print(f"   ✅ DB: pitchers 테이블에 {m}건 저장(업서트) 완료")
-                except Exception as e:
-                    print('   ⚠️ pitchers 수집/저장 실패:', e)
-
-            if collect_team_rankings_season:
-                try:
-                    rankings_df = collect_team_rankings_season(driver, current_season, safe_sleep)
-                    if rankings_df is not None and len(rankings_df) > 0:
-                        k = df_to_team_rankings_table(rankings_df)
-                        print(f"   ✅ DB: team_rankings 테이블에 {k}건 저장(업서트) 완료")
-                except Exception as e:
-                    print('   ⚠️ team_rankings 수집/저장 실패:', e)
-
-        except Exception as e_conn:
-            print('   ⚠️ DB 연결 실패:', e_conn)
-
-else:
-    print('❌ 오류: 데이터가 수집되지 않았음.')
-    print('   💭 인터넷 연결이나 KBO 홈페이지 상태를 확인해볼 것')
-
-print(f"\n🏁 크롤링 완료!")
-print(f"   🤖 크롬 브라우저를 자동으로 종료 중...")
-driver.quit()
-print(f"   ✅ 모든 작업이 성공적으로 완료됨!")
-print(f"   🎉 {current_season}시즌 KBO 타자 기록을 성공적으로 수집함!")
 
 def log_crawling_result(result: str):
     """크롤링 결과를 로그 파일에 기록."""
@@ -390,9 +411,73 @@ def log_crawling_result(result: str):
     with open(log_file, "a") as f:
         f.write(log_entry)
 
-if __name__ == "__main__":
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='KBO 기록 크롤러')
+    parser.set_defaults(command='crawl', season=CURRENT_SEASON, force=False, out=None, profile=None)
+    sub = parser.add_subparsers(dest='command')
+
+    p = sub.add_parser('crawl', help='기록을 수집하여 DB(또는 --out 디렉토리)에 저장한다 (기본 명령)')
+    p.add_argument('--season', default=CURRENT_SEASON)
+    p.add_argument('--force', action='store_true', help='변경 확인을 무시하고 전체를 다시 저장한다')
+    p.add_argument('--out', help='DB 대신 이 디렉토리에 <category>_<season>.pkl로 저장한다')
+    p.add_argument('--profile', nargs='?', const='', metavar='DIR',
+                   help='단계별 CPU/메모리 프로파일을 DIR(기본: profiles/<시각>)에 남긴다. 세션 1개, 저장 스레드 없이 실행한다')
+
+    p = sub.add_parser('load', help='crawl --out으로 저장한 파일을 DB에 저장한다')
+    p.add_argument('paths', nargs='+')
+
+    sub.add_parser('schema', help='테이블을 생성/갱신한다')
+
+    p = sub.add_parser('stats', help='연도별 저장 건수를 출력한다')
+    p.add_argument('--season', default=CURRENT_SEASON)
+
+    p = sub.add_parser('daemon', help='세션을 살려 둔 채 로컬 소켓으로 수집 작업을 받는다')
+    p.add_argument('--addr', help='대기 주소 host:port (기본: CRAWL_DAEMON_ADDR 또는 127.0.0.1:8765)')
+    p.add_argument('--browsers', type=int, help='미리 띄워 둘 크롬 수 (기본: browser 모드면 CRAWL_WORKERS, 아니면 0)')
+
+    p = sub.add_parser('submit', help='실행 중인 수집 데몬에 수집 작업을 보낸다')
+    p.add_argument('--season', default=CURRENT_SEASON)
+    p.add_argument('--force', action='store_true', help='변경 확인을 무시하고 전체를 다시 저장한다')
+    p.add_argument('--wait', action='store_true', help='작업이 끝날 때까지 기다린다')
+    p.add_argument('--addr', help='데몬 주소 host:port')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    load_env()
+    command = args.command or 'crawl'
+
+    if command == 'load':
+        return run_load(args.paths)
+    if command == 'schema':
+        return run_schema()
+    if command == 'stats':
+        return run_stats(args.season)
+    if command == 'submit':
+        return run_submit(args.season, args.force, args.wait, args.addr)
+
+    settings = load_settings()
+    if command == 'daemon':
+        import crawl_daemon
+
+        return crawl_daemon.serve(settings, args.addr or crawl_daemon.DAEMON_ADDR, args.browsers)
+    if args.force:
+        settings = settings._replace(force=True)
+    profile_dir = None
+    if args.profile is not None:
+        profile_dir = args.profile or os.path.join('profiles', datetime.now().strftime('%Y%m%d-%H%M%S'))
+        # 단계별 CPU/메모리를 섞이지 않게 재려고 수집 세션은 하나만 쓴다
+        settings = settings._replace(workers=1)
     try:
-        log_crawling_result("크롤링 성공")
+        code = run_crawl(settings, args.season, args.out, profile_dir=profile_dir)
     except Exception as e:
         log_crawling_result(f"크롤링 실패: {e}")
-        raise
\ No newline at end of file
+        raise
+    log_crawling_result("크롤링 성공" if code == 0 else f"크롤링 실패: 종료 코드 {code}")
+    return code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
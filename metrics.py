@@ -0,0 +1,207 @@
+"""metrics.py
+수집/저장 파이프라인의 단계별 소요 시간, 바이트 수, 행 수를 모으는 모듈이다.
+
+각 모듈은 핫패스를 `with span('parse', nbytes=len(html)):`처럼 감싸고, 실행이 끝나면
+write_run_report()가 JSON 실행 보고서와 node_exporter textfile collector용 Prometheus 파일을 남긴다.
+느린 밤이 KBO 서버(navigate/postback) 때문인지, 파서(parse/extract/coerce) 때문인지, RDS(connect/upsert) 때문인지 구분할 수 있다.
+
+단계 이름
+  navigate    : 페이지 GET (브라우저 driver.get / HTTP open)
+  postback    : 드롭다운/페이저 postback 요청과 표가 다시 그려질 때까지의 대기
+  page_source : 브라우저에서 표 html을 꺼내는 시간
+  parse       : html -> lxml 트리
+  extract     : lxml 표 -> DataFrame
+  coerce      : 열 타입 적용(stat_schema)과 DB 레코드 변환
+  connect     : DB 연결/풀에서 연결 빌리기
+  upsert      : INSERT ... ON CONFLICT / COPY 실행
+  collect     : 작업 단위(시즌, 카테고리, 팀) 하나의 수집 전체 (navigate~coerce를 포함)
+  write       : 카테고리 batch 하나의 DB 저장 전체 (coerce, upsert를 포함)
+"""
+import json
+import os
+import threading
+import time
+
+RUN_REPORT_PATH = os.getenv('RUN_REPORT_PATH', 'run_report.json')
+# node_exporter --collector.textfile.directory 안의 *.prom 경로. 비어 있으면 쓰지 않는다
+PROM_TEXTFILE_PATH = os.getenv('PROM_TEXTFILE_PATH', '')
+PROM_PREFIX = 'kbo_crawl'
+
+_lock = threading.Lock()
+_stages = {}
+# profiler.StageProfiler가 걸려 있으면 span마다 enter(stage)/exit(token)을 호출한다
+_profiler = None
+
+
+def set_profiler(profiler):
+    """span에 프로파일러를 건다(None이면 뗀다)."""
+    global _profiler
+    _profiler = profiler
+
+
+def profiling():
+    """profiler.StageProfiler가 걸려 있으면 True."""
+    return _profiler is not None
+
+
+class _Stat:
+    __slots__ = ('calls', 'errors', 'seconds', 'max_seconds', 'bytes', 'rows')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.bytes = 0
+        self.rows = 0
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'seconds': round(self.seconds, 6),
+            'max_seconds': round(self.max_seconds, 6),
+            'avg_ms': round(self.seconds / self.calls * 1000, 3) if self.calls else 0.0,
+            'bytes': self.bytes,
+            'rows': self.rows,
+        }
+
+
+def record(stage, seconds, nbytes=0, rows=0, ok=True):
+    """stage에 한 번의 실행 결과를 더한다."""
+    with _lock:
+        stat = _stages.get(stage)
+        if stat is None:
+            stat = _stages[stage] = _Stat()
+        stat.calls += 1
+        stat.seconds += seconds
+        if seconds > stat.max_seconds:
+            stat.max_seconds = seconds
+        stat.bytes += nbytes or 0
+        stat.rows += rows or 0
+        if not ok:
+            stat.errors += 1
+
+
+class span:
+    """with 블록의 소요 시간을 stage에 기록한다. 블록 안에서 알게 된 바이트/행 수는 add()로 더한다.
+
+    예외가 나면 errors에 세고 예외는 그대로 전달한다.
+    """
+
+    __slots__ = ('stage', 'nbytes', 'rows', '_start', '_token')
+
+    def __init__(self, stage, nbytes=0, rows=0):
+        self.stage = stage
+        self.nbytes = nbytes
+        self.rows = rows
+
+    def add(self, nbytes=0, rows=0):
+        self.nbytes += nbytes or 0
+        self.rows += rows or 0
+
+    def __enter__(self):
+        self._token = _profiler.enter(self.stage) if _profiler is not None else None
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.stage, time.perf_counter() - self._start, self.nbytes, self.rows, exc_type is None)
+        if self._token is not None and _profiler is not None:
+            _profiler.exit(self._token)
+        return False
+
+
+def reset():
+    """모은 값을 모두 지운다. 실행(작업)을 시작할 때 호출한다."""
+    with _lock:
+        _stages.clear()
+
+
+def snapshot():
+    """{stage: {calls, errors, seconds, max_seconds, avg_ms, bytes, rows}}를 반환한다."""
+    with _lock:
+        return {stage: stat.to_dict() for stage, stat in sorted(_stages.items())}
+
+
+def run_report(started, finished, code, **extra):
+    """한 번의 실행 보고서(dict)를 만든다. extra는 그대로 담는다(season, command 등)."""
+    report = {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+        'finished': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(finished)),
+        'finished_ts': round(finished, 3),
+        'duration_seconds': round(finished - started, 3),
+        'success': code == 0,
+        'exit_code': code,
+        'stages': snapshot(),
+    }
+    report.update(extra)
+    return report
+
+
+def _write_atomic(path, text):
+    # node_exporter가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓴 뒤 rename한다
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def prometheus_text(report, prefix=PROM_PREFIX):
+    """보고서를 Prometheus text exposition 형식 문자열로 만든다."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text else f"{prefix}_{name} {value}")
+
+    stages = report['stages']
+    metric('stage_seconds', 'gauge', 'Total seconds spent in the stage during the last run.',
+           [({'stage': s}, v['seconds']) for s, v in stages.items()])
+    metric('stage_max_seconds', 'gauge', 'Slowest single call of the stage during the last run.',
+           [({'stage': s}, v['max_seconds']) for s, v in stages.items()])
+    metric('stage_calls', 'gauge', 'Number of calls of the stage during the last run.',
+           [({'stage': s}, v['calls']) for s, v in stages.items()])
+    metric('stage_errors', 'gauge', 'Number of failed calls of the stage during the last run.',
+           [({'stage': s}, v['errors']) for s, v in stages.items()])
+    metric('stage_bytes', 'gauge', 'Bytes handled by the stage during the last run.',
+           [({'stage': s}, v['bytes']) for s, v in stages.items()])
+    metric('stage_rows', 'gauge', 'Rows handled by the stage during the last run.',
+           [({'stage': s}, v['rows']) for s, v in stages.items()])
+    metric('last_run_duration_seconds', 'gauge', 'Wall time of the last run.', [({}, report['duration_seconds'])])
+    metric('last_run_success', 'gauge', '1 if the last run succeeded.', [({}, int(report['success']))])
+    metric('last_run_timestamp_seconds', 'gauge', 'Unix time the last run finished.', [({}, report['finished_ts'])])
+    return '\n'.join(lines) + '\n'
+
+
+def write_run_report(report, path=RUN_REPORT_PATH, prom_path=PROM_TEXTFILE_PATH):
+    """보고서를 JSON(path)과 Prometheus textfile(prom_path, 설정된 경우)로 저장한다. 실패해도 실행은 계속한다."""
+    try:
+        if path:
+            _write_atomic(path, json.dumps(report, ensure_ascii=False, indent=2) + '\n')
+        if prom_path:
+            _write_atomic(prom_path, prometheus_text(report))
+    except OSError as e:
+        print(f"   ⚠️ 실행 보고서 저장 실패: {e}")
+
+
+def summary_lines(report):
+    """보고서의 단계별 요약을 출력용 문자열 목록으로 만든다(시간이 오래 걸린 순)."""
+    lines = []
+    stages = sorted(report['stages'].items(), key=lambda kv: kv[1]['seconds'], reverse=True)
+    for stage, v in stages:
+        extra = []
+        if v['bytes']:
+            extra.append(f"{v['bytes'] / 1024:.0f}KB")
+        if v['rows']:
+            extra.append(f"{v['rows']}행")
+        if v['errors']:
+            extra.append(f"오류 {v['errors']}회")
+        tail = f" ({', '.join(extra)})" if extra else ''
+        lines.append(f"{stage:<12} {v['seconds']:8.2f}초 / {v['calls']}회, 평균 {v['avg_ms']:.1f}ms{tail}")
+    return lines
@@ -0,0 +1,104 @@
+"""pipeline.py
+수집과 DB 저장을 겹쳐서 진행하는 producer/consumer 파이프라인이다.
+
+수집 워커(crawl_pool.CrawlPool)는 팀 하나를 끝낼 때마다 DataFrame을 크기가 정해진 큐에 넣고,
+저장 스레드 하나가 카테고리별로 batch_rows행씩 모아 db.LoadSession으로 upsert한다.
+큐가 가득 차면 수집 워커가 기다리므로 메모리에는 큐와 카테고리별 batch 하나만 올라간다.
+"""
+import os
+import queue
+import threading
+
+import pandas as pd
+
+from db import UpsertCounts
+
+BATCH_ROWS = int(os.getenv('PIPELINE_BATCH_ROWS', '500'))
+QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '8'))
+PREVIEW_ROWS = 10
+
+_STOP = object()
+
+
+class StreamWriter:
+    """put(unit, df)로 받은 DataFrame을 저장 스레드에서 session(db.LoadSession)에 batch로 저장한다.
+
+    counts는 카테고리별 UpsertCounts 합계, errors는 저장에 실패한 카테고리 -> 마지막 예외,
+    preview는 카테고리별 처음 PREVIEW_ROWS행이다. session의 커밋은 호출한 쪽(load_session)이 한다.
+    background=False면 저장 스레드 없이 put()을 부른 스레드에서 바로 batch를 모으고 저장한다(--profile용).
+    """
+
+    def __init__(self, session, batch_rows=BATCH_ROWS, queue_size=QUEUE_SIZE, background=True):
+        self.session = session
+        self.batch_rows = max(1, int(batch_rows))
+        self.counts = {}
+        self.errors = {}
+        self.preview = {}
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._batches = {}
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name='stream-writer', daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def put(self, unit, df):
+        """unit(crawl_pool.CrawlUnit)의 df를 저장 큐에 넣는다. 큐가 가득 차 있으면 빌 때까지 기다린다."""
+        if self._thread is None:
+            self._add(unit.category, df)
+            return
+        while True:
+            try:
+                self._queue.put((unit.category, df), timeout=1)
+                return
+            except queue.Full:
+                if not self._thread.is_alive():
+                    raise RuntimeError('저장 스레드가 종료되어 더 이상 저장할 수 없음')
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            self._add(*item)
+        self._flush_all()
+
+    def _add(self, category, df):
+        if category not in self.preview:
+            self.preview[category] = df.head(PREVIEW_ROWS)
+        batch = self._batches.setdefault(category, [])
+        batch.append(df)
+        if sum(len(d) for d in batch) >= self.batch_rows:
+            self._flush(category)
+
+    def _flush_all(self):
+        for category in list(self._batches):
+            self._flush(category)
+
+    def _flush(self, category):
+        batch = self._batches.pop(category, None)
+        if not batch:
+            return
+        df = pd.concat(batch, ignore_index=True)
+        try:
+            c = self.session.write(category, df)
+        except Exception as e:
+            # session.write가 savepoint로 이 batch만 되돌렸으므로 다음 batch는 계속 저장한다
+            print(f"   ⚠️ DB에 {category} 저장 실패: {e}")
+            self.errors[category] = e
+            return
+        total = self.counts.get(category, UpsertCounts(0, 0, 0))
+        self.counts[category] = UpsertCounts(*(a + b for a, b in zip(total, c)))
+
+    def close(self):
+        """남은 batch를 모두 저장하고 저장 스레드가 끝날 때까지 기다린다."""
+        if self._thread is None:
+            self._flush_all()
+        elif self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
@@ -0,0 +1,187 @@
+"""profiler.py
+`python main.py crawl --profile [DIR]`로 켜는 단계별 CPU/메모리 프로파일러이다.
+
+metrics.span으로 감싼 단계 중 profile_stages(기본: collect, parse, extract, coerce, write)에 들어갈 때마다
+tracemalloc으로 단계 안에서 늘어난 메모리와 최대 메모리를 재고, 가장 바깥 단계에서는 그 스레드의 cProfile을 켠다.
+실행이 끝나면 run 디렉토리에 다음을 남긴다.
+
+    <stage>.prof          : pstats 원본 (snakeviz 등으로 열 수 있음)
+    <stage>_hotspots.txt  : 누적 시간/자체 시간 순 상위 함수
+    memory.json           : 단계별 호출 수, 최대 메모리 증가(peak_kb), 누적 순증가(net_kb)
+    memory_top.txt        : 실행이 끝날 때 살아 있는 할당 상위 줄
+    report.json           : metrics 실행 보고서 (단계별 소요 시간)
+
+cProfile은 한 스레드에서 겹쳐 켤 수 없으므로 collect 안의 parse/extract/coerce는 collect.prof에 함께 잡히고,
+메모리는 겹친 단계도 각각 따로 잰다.
+tracemalloc의 최대 메모리는 프로세스 전체 값이라 다른 스레드의 할당이 섞이지 않도록
+--profile은 수집 세션 1개, 저장 스레드 없이(pipeline.StreamWriter(background=False)) 실행한다.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import tracemalloc
+
+import metrics
+
+PROFILE_STAGES = ('collect', 'parse', 'extract', 'coerce', 'write')
+HOTSPOT_LINES = 40
+
+
+class _StageStat:
+    __slots__ = ('calls', 'peak', 'net')
+
+    def __init__(self):
+        self.calls = 0
+        self.peak = 0
+        self.net = 0
+
+
+class StageProfiler:
+    """metrics.span에 걸어 단계별 cProfile과 tracemalloc 값을 모은다. start()/finish()로 켜고 끈다."""
+
+    def __init__(self, run_dir, profile_stages=PROFILE_STAGES, frames=1):
+        self.run_dir = run_dir
+        self.profile_stages = tuple(profile_stages)
+        self.frames = frames
+        self._profiles = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self):
+        os.makedirs(self.run_dir, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        metrics.set_profiler(self)
+        return self
+
+    def enter(self, stage):
+        """metrics.span.__enter__에서 호출된다. exit()에 넘길 토큰을 반환한다."""
+        if stage not in self.profile_stages:
+            return None
+        stack = self._stack()
+        self._fold_peak(stack)
+        start_mem, _ = tracemalloc.get_traced_memory()
+        profile = None
+        if not stack:
+            # 같은 스레드에서 바깥 단계가 cProfile을 켜 두었으면 그 단계의 통계에 포함된다
+            profile = self._profile(stage)
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+에서 다른 스레드의 프로파일러가 켜져 있으면 이 구간은 메모리만 잰다
+                profile = None
+        token = [stage, start_mem, start_mem, profile]
+        stack.append(token)
+        return token
+
+    def exit(self, token):
+        """metrics.span.__exit__에서 호출된다."""
+        if token is None:
+            return
+        stack = self._stack()
+        self._fold_peak(stack)
+        current, _ = tracemalloc.get_traced_memory()
+        stack.remove(token)
+        stage, start_mem, peak, profile = token
+        if profile is not None:
+            profile.disable()
+        with self._lock:
+            stat = self._stats.setdefault(stage, _StageStat())
+            stat.calls += 1
+            stat.peak = max(stat.peak, peak - start_mem)
+            stat.net += current - start_mem
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @staticmethod
+    def _fold_peak(stack):
+        # reset_peak() 전에 지금까지의 최대값을 열려 있는 단계 모두에 반영해 두면 안쪽 단계가 바깥 단계의 최대값을 지우지 않는다
+        _, peak = tracemalloc.get_traced_memory()
+        for token in stack:
+            token[2] = max(token[2], peak)
+        tracemalloc.reset_peak()
+
+    def _profile(self, stage):
+        # 스레드마다 단계별 Profile 하나를 재사용하고 끝날 때 합친다
+        key = (threading.get_ident(), stage)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = self._profiles[key] = cProfile.Profile()
+        return profile
+
+    def finish(self, report=None):
+        """프로파일러를 떼고 run 디렉토리에 보고서를 쓴다. 쓴 파일 경로 목록을 반환한다."""
+        metrics.set_profiler(None)
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        tracemalloc.stop()
+        paths = []
+
+        by_stage = {}
+        for (_, stage), profile in self._profiles.items():
+            by_stage.setdefault(stage, []).append(profile)
+        for stage, profiles in sorted(by_stage.items()):
+            try:
+                stats = pstats.Stats(profiles[0])
+            except TypeError:
+                # 한 번도 켜지지 않은 Profile은 통계가 없다
+                continue
+            for profile in profiles[1:]:
+                try:
+                    stats.add(profile)
+                except TypeError:
+                    continue
+            path = os.path.join(self.run_dir, f"{stage}.prof")
+            stats.dump_stats(path)
+            paths.append(path)
+            paths.append(self._write_hotspots(stage, stats))
+
+        memory = {
+            stage: {'calls': s.calls, 'peak_kb': round(s.peak / 1024, 1), 'net_kb': round(s.net / 1024, 1)}
+            for stage, s in sorted(self._stats.items())
+        }
+        path = os.path.join(self.run_dir, 'memory.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(memory, f, ensure_ascii=False, indent=2)
+        paths.append(path)
+
+        if snapshot is not None:
+            path = os.path.join(self.run_dir, 'memory_top.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                for stat in snapshot.statistics('lineno')[:HOTSPOT_LINES]:
+                    f.write(f"{stat}\n")
+            paths.append(path)
+
+        if report is not None:
+            path = os.path.join(self.run_dir, 'report.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            paths.append(path)
+        return paths
+
+    def _write_hotspots(self, stage, stats):
+        path = os.path.join(self.run_dir, f"{stage}_hotspots.txt")
+        buf = io.StringIO()
+        stats.stream = buf
+        for sort_key, title in (('cumulative', '누적 시간 순'), ('tottime', '자체 시간 순')):
+            buf.write(f"==== {stage}: {title} 상위 {HOTSPOT_LINES}개 ====\n")
+            stats.sort_stats(sort_key).print_stats(HOTSPOT_LINES)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(buf.getvalue())
+        return path
+
+    def summary_lines(self):
+        """단계별 메모리 요약을 출력용 문자열 목록으로 만든다."""
+        with self._lock:
+            return [
+                f"{stage:<8} {s.calls}회, 최대 증가 {s.peak / 1024 / 1024:.1f}MB, 누적 순증가 {s.net / 1024 / 1024:.1f}MB"
+                for stage, s in sorted(self._stats.items())
+            ]
@@ -0,0 +1,90 @@
+"""rate_limiter.py
+KBO 서버 요청 속도를 제한하는 공유 토큰 버킷 모듈이다.
+
+실제 서버 왕복(페이지 이동, postback, HTTP 요청) 직전에만 토큰을 하나 쓰고,
+로컬 DOM 조회나 파싱에는 대기하지 않는다. 응답 시간이 느려지거나 오류가 나면
+허용 속도를 절반으로 줄이고, 정상 응답이 이어지면 설정한 최대 속도까지 조금씩 되돌린다(AIMD).
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class RateLimiter:
+    """초당 rate개 요청, 최대 burst개까지 몰아서 보낼 수 있는 적응형 토큰 버킷.
+
+    sleep_fn 자리에 그대로 넘길 수 있다: limiter()는 토큰 하나를 얻을 때까지 대기한다.
+    record(latency, ok)로 응답 결과를 알려주면 속도를 조절한다.
+    """
+
+    def __init__(self, rate=2.0, burst=2, min_rate=None, slow_latency=3.0,
+                 backoff=0.5, recover_step=None, cooldown=1.0):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.min_rate = float(min_rate) if min_rate else self.max_rate / 8
+        self.slow_latency = slow_latency
+        self.backoff = backoff
+        self.recover_step = recover_step or self.max_rate / 10
+        self.cooldown = cooldown
+        self.requests = 0
+        self.errors = 0
+        self.waited = 0.0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._last_backoff = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 대기한다. 실제로 대기한 시간(초)을 반환한다."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # 토큰을 미리 차감하고(음수 허용) 부족분만큼 대기 -> 여러 스레드가 순서대로 슬롯을 받는다
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.requests += 1
+            self.waited += delay
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    __call__ = acquire
+
+    def record(self, latency, ok=True):
+        """서버 왕복 결과를 반영한다. 느린 응답/오류면 감속, 정상이면 최대 속도 쪽으로 회복."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if not ok:
+                self.errors += 1
+            if not ok or latency > self.slow_latency:
+                # 같은 원인으로 여러 워커가 동시에 보고해도 cooldown 안에서는 한 번만 감속
+                if now - self._last_backoff >= self.cooldown:
+                    self.rate = max(self.min_rate, self.rate * self.backoff)
+                    self._last_backoff = now
+            else:
+                self.rate = min(self.max_rate, self.rate + self.recover_step)
+
+    @contextmanager
+    def track(self):
+        """토큰을 얻은 뒤 with 블록의 서버 왕복 시간과 성공 여부를 record()로 보고한다."""
+        self.acquire()
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(time.monotonic() - start, ok)
+
+
+def report_round_trip(sleep_fn, latency, ok=True):
+    """sleep_fn이 RateLimiter처럼 record()를 가지고 있으면 왕복 결과를 보고한다."""
+    record = getattr(sleep_fn, 'record', None)
+    if record is not None:
+        record(latency, ok)
@@ -0,0 +1,262 @@
+"""replay_server.py
+KBO 기록 페이지(HitterBasic/PitcherBasic/TeamRankDaily)를 흉내 내는 로컬 서버이다.
+실제 사이트에 부하를 주지 않고 HTTP/브라우저 수집 모드, 병렬 풀, 요청 예산(RateLimiter)을 처음부터 끝까지 시험한다.
+
+    python replay_server.py --port 8800 --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+    KBO_BASE_URL=http://127.0.0.1:8800 python main.py crawl --out /tmp/replay
+
+페이지는 kbo_fixtures가 실제 페이지 구조로 만든다. ddlSeason/ddlTeam 선택과 ucPager(btnNo1~5, btnNext, btnFirst)
+postback을 처리하며, 현재 페이지는 실제 사이트처럼 __VIEWSTATE에 담아 주고받는다.
+
+    --latency-ms/--jitter-ms : 페이지 응답마다 더하는 지연 (기본 + 0~jitter 균등 분포)
+    --concurrency            : 동시에 처리하는 페이지 요청 수. 넘치는 요청은 줄을 서므로 부하에 따라 응답이 느려진다
+    --error-rate             : 이 비율만큼 503 응답
+    --drop-rate              : 이 비율만큼 응답 없이 연결을 끊음
+    --hitters/--pitchers     : 팀마다 선수 수 (한 쪽 30행이므로 페이지 수가 정해진다)
+
+GET /__stats 는 지금까지의 요청 수와 주입한 오류 수를 JSON으로 돌려준다(?reset=1이면 0으로 되돌림).
+"""
+import argparse
+import functools
+import json
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import kbo_fixtures
+from kbo_fixtures import PAGE_ROWS, TEAMS, control_name, page_state
+from kbo_site import HITTER_URL, PITCHER_URL, TEAM_RANK_URL, SEASON_SELECT_ID, TEAM_SELECT_ID
+
+REPLAY_ADDR = '127.0.0.1:8800'
+# 페이지 html 캐시 크기 (category, season, team, page 조합 수)
+PAGE_CACHE_SIZE = 512
+
+PATHS = {
+    urllib.parse.urlparse(HITTER_URL).path: 'hitters',
+    urllib.parse.urlparse(PITCHER_URL).path: 'pitchers',
+    urllib.parse.urlparse(TEAM_RANK_URL).path: 'team_rankings',
+}
+_SEASON_FIELD = control_name(SEASON_SELECT_ID)
+_TEAM_FIELD = control_name(TEAM_SELECT_ID)
+_PAGER_PREFIX = control_name('cphContents_cphContents_cphContents_ucPager_')
+_TEAM_NAMES = dict(TEAMS)
+
+
+class ReplaySite:
+    """요청(category, 폼 값)을 받아 다음 페이지 html을 만드는 가짜 KBO 사이트. 서버 없이도 쓸 수 있다."""
+
+    def __init__(self, season='2025', hitters=45, pitchers=35, page_size=PAGE_ROWS, seed=0):
+        self.season = str(season)
+        self.players = {'hitters': hitters, 'pitchers': pitchers}
+        self.page_size = page_size
+        self.seed = seed
+        self.page = functools.lru_cache(maxsize=PAGE_CACHE_SIZE)(self._page)
+        self._rows = functools.lru_cache(maxsize=PAGE_CACHE_SIZE)(self._team_rows)
+
+    def _team_rows(self, category, season, team):
+        if team is None:
+            # 팀 선택 전(전체)은 모든 팀의 선수를 한 표에 순위를 다시 매겨 보여 준다
+            rows = [row for _, name in TEAMS for row in self._rows(category, season, name)]
+            return tuple(([i + 1] + values[1:], player_id) for i, (values, player_id) in enumerate(rows))
+        make = kbo_fixtures.hitter_rows if category == 'hitters' else kbo_fixtures.pitcher_rows
+        return tuple(make(self.players[category], season, team, self.seed))
+
+    def _page(self, category, season, team, page):
+        if category == 'team_rankings':
+            return kbo_fixtures.build_rankings_page(season, self.seed)
+        rows = list(self._rows(category, season, team))
+        pages = max(1, -(-len(rows) // self.page_size))
+        page = min(max(page, 1), pages)
+        return kbo_fixtures.build_record_page(
+            category, rows, season, team, page, self.page_size, self.seed,
+            state={'season': season, 'team': team, 'page': page},
+        )
+
+    def open(self, category):
+        """GET: 현재 시즌, 팀 전체, 1쪽."""
+        return self.page(category, self.season, None, 1)
+
+    def postback(self, category, form):
+        """POST: 폼 값과 __EVENTTARGET으로 다음 상태를 정해 html을 반환한다."""
+        if category == 'team_rankings':
+            return self.open(category)
+        state = page_state(form.get('__VIEWSTATE'))
+        season = form.get(_SEASON_FIELD) or state.get('season') or self.season
+        team = _TEAM_NAMES.get(form.get(_TEAM_FIELD, '')) or None
+        target = form.get('__EVENTTARGET', '')
+        page = state.get('page', 1)
+        if target.startswith(_PAGER_PREFIX):
+            button = target[len(_PAGER_PREFIX):]
+            block_start = (page - 1) // 5 * 5 + 1
+            if button.startswith('btnNo'):
+                page = block_start + int(button[len('btnNo'):]) - 1
+            elif button == 'btnNext':
+                page = block_start + 5
+            elif button == 'btnFirst':
+                page = 1
+        elif target in (_SEASON_FIELD, _TEAM_FIELD):
+            page = 1
+        return self.page(category, season, team, page)
+
+
+class ReplayStats:
+    """서버가 받은 요청 수. 부하 시험이 실제로 보낸 요청 수를 확인하는 데 쓴다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def add(self, key, n=1):
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + n
+
+    def snapshot(self, reset=False):
+        with self._lock:
+            counts = dict(sorted(self._counts.items()))
+            if reset:
+                self._counts.clear()
+        return counts
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8'):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.stats.add('bytes', len(data))
+
+    def _serve_page(self, category, make_html):
+        server = self.server
+        with server.slots:
+            delay = server.latency + server.rng.uniform(0, server.jitter)
+            if delay:
+                time.sleep(delay)
+            roll = server.rng.random()
+            if roll < server.drop_rate:
+                server.stats.add('dropped')
+                self.close_connection = True
+                return
+            if roll < server.drop_rate + server.error_rate:
+                server.stats.add('errors')
+                self._send(503, '<html><body>Service Unavailable</body></html>')
+                return
+            self._send(200, make_html())
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        server = self.server
+        if url.path == '/robots.txt':
+            self._send(200, 'User-agent: *\nAllow: /\n', 'text/plain; charset=utf-8')
+        elif url.path == '/__stats':
+            reset = urllib.parse.parse_qs(url.query).get('reset') == ['1']
+            self._send(200, json.dumps(server.stats.snapshot(reset)), 'application/json')
+        elif url.path in PATHS:
+            category = PATHS[url.path]
+            server.stats.add(f'get.{category}')
+            self._serve_page(category, lambda: server.site.open(category))
+        elif url.path.endswith(('.axd', '.css', '.js')):
+            self._send(200, '', 'text/javascript' if url.path.endswith(('.axd', '.js')) else 'text/css')
+        else:
+            self._send(404, '<html><body>Not Found</body></html>')
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8', errors='replace')
+        category = PATHS.get(url.path)
+        if category is None:
+            self._send(404, '<html><body>Not Found</body></html>')
+            return
+        form = {k: v[0] for k, v in urllib.parse.parse_qs(body, keep_blank_values=True).items()}
+        server = self.server
+        server.stats.add(f'postback.{category}')
+        self._serve_page(category, lambda: server.site.postback(category, form))
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, addr, site, latency_ms=0, jitter_ms=0, error_rate=0.0, drop_rate=0.0, concurrency=0,
+                 seed=0, verbose=False):
+        super().__init__(addr, _Handler)
+        self.site = site
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.slots = threading.BoundedSemaphore(concurrency) if concurrency > 0 else _NoLimit()
+        self.rng = random.Random(seed)
+        self.stats = ReplayStats()
+        self.verbose = verbose
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _NoLimit:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+def start(site=None, addr='127.0.0.1:0', **options):
+    """백그라운드 스레드에서 서버를 띄우고 ReplayServer를 반환한다(port 0이면 빈 포트). 끝나면 shutdown()을 부른다."""
+    host, _, port = addr.rpartition(':')
+    server = ReplayServer((host or '127.0.0.1', int(port)), site or ReplaySite(), **options)
+    threading.Thread(target=server.serve_forever, name='replay-server', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='KBO 기록 페이지 재현 서버 (부하 시험용)')
+    parser.add_argument('--addr', default=REPLAY_ADDR, help='host:port')
+    parser.add_argument('--port', type=int, help='--addr의 포트만 바꾼다')
+    parser.add_argument('--season', default='2025', help='처음 열었을 때 선택된 시즌')
+    parser.add_argument('--hitters', type=int, default=45, help='팀마다 타자 수')
+    parser.add_argument('--pitchers', type=int, default=35, help='팀마다 투수 수')
+    parser.add_argument('--page-size', type=int, default=PAGE_ROWS)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--concurrency', type=int, default=0, help='동시에 처리하는 요청 수 (0: 제한 없음)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503 응답 비율')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='응답 없이 연결을 끊는 비율')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true', help='요청마다 로그를 남긴다')
+    args = parser.parse_args(argv)
+
+    host, _, port = args.addr.rpartition(':')
+    if args.port is not None:
+        port = args.port
+    site = ReplaySite(args.season, args.hitters, args.pitchers, args.page_size, args.seed)
+    server = ReplayServer((host or '127.0.0.1', int(port)), site, args.latency_ms, args.jitter_ms, args.error_rate,
+                          args.drop_rate, args.concurrency, args.seed, args.verbose)
+    print(f"🧪 KBO 기록 페이지 재현 서버: {server.base_url}")
+    print(f"   💡 KBO_BASE_URL={server.base_url} python main.py crawl --out /tmp/replay")
+    try:
+        server.serve_forever(poll_interval=0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"🏁 재현 서버 종료: {json.dumps(server.stats.snapshot(), ensure_ascii=False)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
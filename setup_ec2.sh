@@ -2,7 +2,7 @@
 # EC2에서 KBO 크롤러를 설정하고 실행하는 스크립트 (개선된 버전)
 #
 # 이 스크립트는 다음 작업을 수행합니다:
-# 1. 시스템 패키지 설치: Python 가상환경, unzip, wget, cron 등 필수 패키지를 설치합니다.
+# 1. 시스템 패키지 설치: Python 3.11 이상과 가상환경, unzip, wget, cron 등 필수 패키지를 설치합니다.
 # 2. Python 가상환경 설정 및 패키지 설치: requirements.txt에 정의된 Python 라이브러리를 안전한 가상환경 내에 설치합니다.
 # 3. Chrome 설치: 의존성 문제를 자동으로 해결하며 최신 버전의 Google Chrome을 설치합니다.
 # 4. ChromeDriver 설치: 설치된 Chrome 버전에 정확히 맞는 ChromeDriver를 안정적인 방식으로 다운로드하고 설치합니다.
@@ -18,12 +18,24 @@ sudo apt-get update
 # python3-venv는 가상환경 생성을 위해 필수입니다.
 sudo apt-get install -y python3-pip python3-venv unzip wget cron jq
 
+# requirements.txt의 pandas 3.x는 Python 3.11 이상이 필요합니다.
+# 시스템 python3가 3.10 이하(Ubuntu 22.04 등)면 deadsnakes PPA에서 python3.11을 설치해 가상환경에 사용합니다.
+PYTHON_BIN=python3
+if ! python3 -c 'import sys; sys.exit(sys.version_info < (3, 11))'; then
+    echo "   ... 시스템 Python이 3.11 미만이므로 python3.11을 설치합니다"
+    sudo apt-get install -y software-properties-common
+    sudo add-apt-repository -y ppa:deadsnakes/ppa
+    sudo apt-get update
+    sudo apt-get install -y python3.11 python3.11-venv
+    PYTHON_BIN=python3.11
+fi
+
 # 2. Python 가상환경 설정 및 패키지 설치
 echo "✅ 2. Python 가상환경 설정 및 패키지 설치 중..."
 # 기존 가상환경이 있다면 삭제하여 깨끗한 상태에서 시작
 rm -rf venv
-# 가상환경 생성
-python3 -m venv venv
+# 가상환경 생성 (Python 3.11 이상)
+$PYTHON_BIN -m venv venv
 # 가상환경 활성화
 source venv/bin/activate
 # 가상환경 내의 pip로 패키지 설치 (sudo 불필요)
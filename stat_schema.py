@@ -0,0 +1,137 @@
+"""stat_schema.py
+수집한 기록 표(타자/투수/팀 순위)의 열 타입을 정하는 모듈이다.
+
+추출 직후(팀 하나를 수집할 때마다) apply_schema()로 팀/선수 이름은 category, 경기 수 같은 횟수는 int16,
+비율은 float32, 선수 id는 Int32로 바꾸고, 투수 이닝(IP)은 float 이닝과 정확한 아웃 카운트(IP_OUTS)로 나눈다.
+여러 시즌을 메모리에 올리는 백필에서 object 열보다 메모리를 몇 배 덜 쓰고, DB 변환도 숫자 열 그대로 처리한다.
+"""
+import numpy as np
+import pandas as pd
+
+from metrics import span
+
+_PLACEHOLDERS = ['', '-', '—', '–']
+# 'N', 'N 1/3', 'N 2/3'(N은 쉼표/소수 허용) 또는 분수만 있는 '1/3'
+_INNINGS_RE = r'^(?:(?P<whole>[\d,]+(?:\.\d+)?)(?:\s+(?P<num>\d+)/(?P<den>\d+))?|(?P<fnum>\d+)/(?P<fden>\d+))$'
+
+CATEGORY = 'category'
+COUNT = 'count'    # int16 (빈 값이 있으면 Int16, 범위를 넘으면 int32/Int32)
+RATE = 'rate'      # float32
+INNINGS = 'innings'
+ID = 'id'          # Int32 (선수 id처럼 int16 범위를 넘는 정수 키)
+
+_COMMON = {
+    '순위': COUNT, '선수명': CATEGORY, '팀명': CATEGORY, 'team': CATEGORY, 'year': COUNT, 'player_id': ID,
+}
+HITTER_SCHEMA = dict(_COMMON, **{
+    'AVG': RATE, 'G': COUNT, 'PA': COUNT, 'AB': COUNT, 'R': COUNT, 'H': COUNT, '2B': COUNT, '3B': COUNT,
+    'HR': COUNT, 'TB': COUNT, 'RBI': COUNT, 'SAC': COUNT, 'SF': COUNT,
+})
+PITCHER_SCHEMA = dict(_COMMON, **{
+    'ERA': RATE, 'G': COUNT, 'W': COUNT, 'L': COUNT, 'SV': COUNT, 'HLD': COUNT, 'WPCT': RATE, 'IP': INNINGS,
+    'H': COUNT, 'HR': COUNT, 'BB': COUNT, 'HBP': COUNT, 'SO': COUNT, 'R': COUNT, 'ER': COUNT, 'WHIP': RATE,
+})
+TEAM_RANKINGS_SCHEMA = {
+    '순위': COUNT, '팀': CATEGORY, '팀명': CATEGORY, '경기': COUNT, '승': COUNT, '패': COUNT, '무': COUNT,
+    '승률': RATE, '게임차': RATE, 'year': COUNT,
+}
+SCHEMAS = {
+    'hitters': HITTER_SCHEMA,
+    'pitchers': PITCHER_SCHEMA,
+    'team_rankings': TEAM_RANKINGS_SCHEMA,
+}
+
+
+def clean_text_column(series):
+    """문자열로 바꿔 앞뒤 공백을 제거하고, 빈 값/대시 표시는 NaN으로 만든다."""
+    s = series.astype(object)
+    missing = s.isna()
+    s = s.where(missing, s.astype(str)).str.strip()
+    return s.mask(missing | s.isin(_PLACEHOLDERS))
+
+
+def parse_innings_column(series):
+    """이닝 컬럼 전체를 한 번에 해석하여 (ip, outs)를 반환한다.
+
+    ip는 float64 이닝(db._parse_fractional_innings와 같은 값), outs는 아웃 카운트(정수 이닝 + n/3 형태일 때만, 아니면 NaN).
+    대시 표시나 해석할 수 없는 값은 둘 다 NaN이 된다.
+    """
+    s = clean_text_column(series)
+    parts = s.str.extract(_INNINGS_RE)
+    whole = pd.to_numeric(parts['whole'].str.replace(',', '', regex=False), errors='coerce')
+    num = pd.to_numeric(parts['num'].fillna(parts['fnum']), errors='coerce')
+    den = pd.to_numeric(parts['den'].fillna(parts['fden']), errors='coerce')
+    has_fraction = num.notna() & den.notna()
+
+    frac = (num / den.where(den != 0)).where(has_fraction, 0.0)
+    ip = whole.fillna(0.0).where(whole.notna() | has_fraction) + frac
+
+    integral = whole.isna() | (whole == np.trunc(whole))
+    thirds = ~has_fraction | (den == 3)
+    outs = (whole.fillna(0.0) * 3 + num.where(has_fraction, 0.0)).where(integral & thirds & ip.notna())
+    # 1/3 이닝은 아웃 카운트로 다시 계산해 부동소수 오차를 없앤다
+    ip = ip.where(outs.isna(), outs / 3)
+    return ip.astype('float64'), outs.astype('float64')
+
+
+def _numeric(series):
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series
+    s = clean_text_column(series).str.replace(',', '', regex=False).str.replace('%', '', regex=False)
+    return pd.to_numeric(s, errors='coerce')
+
+
+def _count(series):
+    return _narrow_int(np.trunc(_numeric(series).astype('float64')))
+
+
+def _narrow_int(num, nullable=False):
+    """정수 값(float64)을 범위에 맞는 가장 작은 정수 타입으로 바꾼다. 빈 값이 있거나 nullable이면 Int16 등을 쓴다.
+
+    합계 행이나 잘못 읽은 값이 int16 범위를 넘으면 값이 넘쳐 바뀌거나 변환이 실패하지 않도록 int32/int64로 넓힌다.
+    """
+    nullable = nullable or num.isna().any()
+    largest = num.abs().max() if len(num) else 0
+    for dtype in ('int16', 'int32', 'int64'):
+        if pd.isna(largest) or largest <= np.iinfo(dtype).max:
+            break
+    return num.astype(dtype.capitalize() if nullable else dtype)
+
+
+def apply_schema(df, category):
+    """category('hitters'/'pitchers'/'team_rankings')의 열 타입을 df에 적용한 새 DataFrame을 반환한다.
+
+    스키마에 없는 열(링크 열 등)은 그대로 두고, IP가 있으면 IP_OUTS(Int16, 범위를 넘으면 Int32) 열을 더한다.
+    """
+    schema = SCHEMAS.get(category)
+    if schema is None or df is None:
+        return df
+    with span('coerce', rows=len(df)):
+        return _apply_schema(df, schema)
+
+
+def _apply_schema(df, schema):
+    columns = {}
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if kind == CATEGORY:
+            columns[col] = series if isinstance(series.dtype, pd.CategoricalDtype) else clean_text_column(series).astype('category')
+        elif kind == COUNT:
+            columns[col] = _count(series)
+        elif kind == RATE:
+            columns[col] = _numeric(series).astype('float32')
+        elif kind == ID:
+            columns[col] = series if series.dtype == 'Int32' else np.trunc(_numeric(series).astype('float64')).astype('Int32')
+        elif kind == INNINGS:
+            if 'IP_OUTS' in df.columns:
+                continue
+            ip, outs = parse_innings_column(series)
+            columns[col] = ip.astype('float32')
+            columns['IP_OUTS'] = _narrow_int(outs, nullable=True)
+    if not columns:
+        return df
+    typed = df.assign(**columns)
+    typed.attrs = dict(df.attrs)
+    return typed
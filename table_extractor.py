@@ -0,0 +1,206 @@
+"""table_extractor.py
+KBO 기록 페이지 html에서 기록 표를 lxml로 한 번만 파싱하여 DataFrame으로 만드는 모듈이다.
+
+BeautifulSoup으로 페이지를 파싱한 뒤 표를 다시 문자열로 만들어 pd.read_html(html5lib)로
+또 파싱하던 과정을 대신한다. 셀을 한 번 순회하면서 열 배열을 만들고, 링크가 있는 셀의 href는
+'<열 이름>_link' 열에 함께 담는다(예: '선수명_link'). 선수 상세 페이지 링크(...?playerId=12345)가 있으면
+선수 id를 'player_id' 열(Int32)로도 담는다.
+결과 DataFrame의 열 이름/숫자 변환은 pd.read_html과 같게 맞춘다.
+"""
+import re
+from collections import namedtuple
+
+from lxml import etree
+from lxml import html as lxml_html
+import numpy as np
+import pandas as pd
+
+from metrics import span
+
+LINK_SUFFIX = '_link'
+PLAYER_ID_COLUMN = 'player_id'
+_PLAYER_ID_RE = r'[?&]playerId=(\d+)'
+
+_UDP_CONTENT = "//*[@id='cphContents_cphContents_cphContents_udpContent']"
+RECORD_TABLE_XPATH = _UDP_CONTENT + "/div[contains(concat(' ', normalize-space(@class), ' '), ' record_result ')]/table"
+# 페이저: btnNo1~btnNoN(번호 링크), btnFirst/btnNext(블록 이동 링크)
+_PAGER_NO_RE = re.compile(r'ucPager_btnNo\d+$')
+PagerState = namedtuple('PagerState', ['links', 'current', 'first_id', 'next_id'])
+# 팀 순위 표는 여러 후보를 차례로 시도한다
+RANK_TABLE_XPATHS = [
+    _UDP_CONTENT + "/div[contains(concat(' ', normalize-space(@class), ' '), ' rank_result ')]/table",
+    "//table[contains(concat(' ', normalize-space(@class), ' '), ' tData ')]",
+    "//table",
+]
+
+
+def parse_document(source):
+    """html 문자열(또는 bytes)을 lxml 트리로 파싱한다. 이미 파싱된 트리는 그대로 반환한다."""
+    if isinstance(source, etree._Element):
+        return source
+    if isinstance(source, str):
+        # 인코딩 선언이 있는 str은 lxml이 거부하므로 bytes로 넘긴다
+        source = source.encode('utf-8')
+    parser = lxml_html.HTMLParser(encoding='utf-8')
+    with span('parse', nbytes=len(source)):
+        return lxml_html.fromstring(source, parser=parser)
+
+
+def _cell_text(cell):
+    return ' '.join(cell.text_content().split())
+
+
+def _unique_columns(names):
+    """중복된 열 이름에 pd.read_html처럼 '.1', '.2'를 붙인다."""
+    seen = {}
+    result = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            result.append(f"{name}.{seen[name]}")
+        else:
+            seen[name] = 0
+            result.append(name)
+    return result
+
+
+def _to_numeric_column(values):
+    """열 전체가 숫자(천 단위 쉼표 허용)면 숫자 배열로, 아니면 문자열 Series로 만든다.
+
+    빈 칸이 있거나 실수가 섞이면 float64, 모두 정수면 int64 (pd.read_html과 같은 규칙).
+    """
+    numbers = []
+    all_int = True
+    for v in values:
+        if v is None:
+            numbers.append(np.nan)
+            all_int = False
+            continue
+        t = v.replace(',', '')
+        try:
+            numbers.append(int(t))
+        except ValueError:
+            try:
+                numbers.append(float(t))
+            except ValueError:
+                return pd.Series(values, dtype=object)
+            all_int = False
+    return np.array(numbers, dtype=np.int64 if all_int else np.float64)
+
+
+def player_id_column(links):
+    """링크(href) 목록/Series에서 playerId 값을 뽑아 Int32 Series로 반환한다. playerId가 없는 링크는 NA."""
+    ids = pd.Series(links, dtype=object).str.extract(_PLAYER_ID_RE, expand=False)
+    return pd.to_numeric(ids, errors='coerce').astype('Int32')
+
+
+def _cells(row):
+    return [c for c in row if c.tag in ('td', 'th')]
+
+
+def table_to_frame(table, keep_links=True):
+    """lxml table 요소를 DataFrame으로 변환한다."""
+    with span('extract') as sp:
+        df = _table_to_frame(table, keep_links)
+        sp.add(rows=len(df))
+    return df
+
+
+def _table_to_frame(table, keep_links):
+    header_rows = table.xpath('./thead/tr')
+    body_rows = table.xpath('./tbody/tr | ./tr | ./tfoot/tr')
+    if header_rows:
+        header_cells = _cells(header_rows[-1])
+    else:
+        # thead가 없으면 th로만 된 첫 행을 헤더로 사용
+        first = body_rows[0] if body_rows else None
+        if first is None or first.find('td') is not None:
+            header_cells = []
+        else:
+            header_cells = _cells(first)
+            body_rows = body_rows[1:]
+
+    rows = [_cells(r) for r in body_rows]
+    names = [_cell_text(c) for c in header_cells]
+    width = max([len(names)] + [len(cells) for cells in rows])
+    names = names + list(range(len(names), width))
+    columns = [[] for _ in range(width)]
+    links = [[] for _ in range(width)]
+
+    for cells in rows:
+        for i in range(width):
+            if i < len(cells):
+                cell = cells[i]
+                text = _cell_text(cell)
+                columns[i].append(text if text != '' else None)
+                if keep_links:
+                    anchor = cell.find('.//a')
+                    links[i].append(anchor.get('href') if anchor is not None else None)
+            else:
+                columns[i].append(None)
+                links[i].append(None)
+
+    names = _unique_columns(names)
+    data = {}
+    for i, name in enumerate(names):
+        data[name] = _to_numeric_column(columns[i])
+    if keep_links:
+        for i, name in enumerate(names):
+            if any(h is not None for h in links[i]):
+                data[f"{name}{LINK_SUFFIX}"] = pd.Series(links[i], dtype=object)
+                if PLAYER_ID_COLUMN not in data and any(h and 'playerId=' in h for h in links[i]):
+                    data[PLAYER_ID_COLUMN] = player_id_column(links[i])
+    return pd.DataFrame(data)
+
+
+def find_record_table(source):
+    """기록 페이지에서 선수 기록 표 요소를 찾는다. 없으면 None."""
+    found = parse_document(source).xpath(RECORD_TABLE_XPATH)
+    return found[0] if found else None
+
+
+def extract_record_table(source, keep_links=True):
+    """기록 페이지 html(또는 트리)에서 선수 기록 표를 DataFrame으로 반환한다. 표가 없으면 None."""
+    table = find_record_table(source)
+    if table is None:
+        return None
+    return table_to_frame(table, keep_links)
+
+
+def extract_rankings_table(source):
+    """팀 순위 페이지 html(또는 트리)에서 순위 표를 DataFrame으로 반환한다. 표가 없으면 None."""
+    doc = parse_document(source)
+    for xpath in RANK_TABLE_XPATHS:
+        found = doc.xpath(xpath)
+        if found:
+            return table_to_frame(found[0], keep_links=False)
+    return None
+
+
+def pager_state(source):
+    """기록 표 아래 ucPager 블록을 읽어 PagerState를 반환한다.
+
+    links는 보이는 페이지 번호(링크 텍스트) -> 링크 id, current는 'on' 클래스가 붙은 현재 페이지.
+    페이지가 하나뿐이면 links가 비어 있다.
+    """
+    links = {}
+    current = None
+    first_id = None
+    next_id = None
+    for a in parse_document(source).xpath("//a[contains(@id, 'ucPager_btn')]"):
+        link_id = a.get('id')
+        if _PAGER_NO_RE.search(link_id):
+            text = a.text_content().strip()
+            if not text.isdigit():
+                continue
+            page = int(text)
+            links[page] = link_id
+            if 'on' in (a.get('class') or '').split():
+                current = page
+        elif link_id.endswith('ucPager_btnFirst'):
+            first_id = link_id
+        elif link_id.endswith('ucPager_btnNext'):
+            next_id = link_id
+    if current is None:
+        current = min(links) if links else 1
+    return PagerState(links, current, first_id, next_id)